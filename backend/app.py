@@ -1,9 +1,187 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import abc
+from array import array
+import base64
+import bisect
+import cProfile
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+import hashlib
+import heapq
+import hmac
+import json
 import logging
+import marshal
+import math
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import os
+import pstats
+import re
+import sqlite3
+import threading
+import time
+import tracemalloc
+import uuid
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+
+# Formatos de transporte opcionales: MessagePack y un codificador JSON más rápido
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
-CORS(app)
+# Exponer las cabeceras de diagnóstico al frontend
+CORS(app, expose_headers=['Server-Timing', 'X-Cache'])
+
+# Número de celdas de la tabla (objetos x capacidad) a partir del cual las
+# decisiones se guardan empaquetadas en bits
+app.config['UMBRAL_CELDAS_BAJO_CONSUMO'] = int(os.environ.get('UMBRAL_CELDAS_BAJO_CONSUMO', 50_000_000))
+
+# Presupuesto por defecto de ramificación y poda
+app.config['RAMIFICACION_MAX_NODOS'] = int(os.environ.get('RAMIFICACION_MAX_NODOS', 1_000_000))
+app.config['RAMIFICACION_TIEMPO_LIMITE_MS'] = int(os.environ.get('RAMIFICACION_TIEMPO_LIMITE_MS', 2000))
+
+# Tamaño del lote y procesos del pool compartido por /optimizar/lote y por
+# las resoluciones del servidor de producción (0 = número de CPUs)
+app.config['LOTE_MAX_PROBLEMAS'] = int(os.environ.get('LOTE_MAX_PROBLEMAS', 1000))
+app.config['LOTE_PROCESOS'] = int(os.environ.get('LOTE_PROCESOS', 0))
+
+# Tabla dinámica en paralelo: procesos que se reparten el eje de capacidad
+# (0 = número de CPUs, 1 = siempre en serie) y capacidad escalada a partir
+# de la cual se usan
+app.config['DINAMICA_PROCESOS'] = int(os.environ.get('DINAMICA_PROCESOS', 0))
+app.config['DINAMICA_CAPACIDAD_PARALELA'] = int(os.environ.get('DINAMICA_CAPACIDAD_PARALELA', 1_000_000))
+
+# Servidor de producción: resolver /optimizar y /optimizar/frontera en el pool
+# de procesos y segundos de espera a las peticiones en curso al detenerse
+app.config['RESOLUCION_EN_PROCESOS'] = os.environ.get('RESOLUCION_EN_PROCESOS', '0') == '1'
+app.config['SERVIDOR_DRENAJE_SEGUNDOS'] = float(os.environ.get('SERVIDOR_DRENAJE_SEGUNDOS', 30))
+
+# Caché de resultados de /optimizar (TTL 0 = sin caducidad)
+app.config['CACHE_MAX_ENTRADAS'] = int(os.environ.get('CACHE_MAX_ENTRADAS', 1024))
+app.config['CACHE_TTL_SEGUNDOS'] = float(os.environ.get('CACHE_TTL_SEGUNDOS', 0))
+
+# Almacén persistente de resultados compartido entre procesos: fichero SQLite
+# (vacío = deshabilitado), tamaño máximo de los resultados guardados y número
+# de resultados más pedidos que el servidor de producción precarga en la
+# caché en memoria al arrancar
+app.config['ALMACEN_RUTA'] = os.environ.get('ALMACEN_RUTA', '')
+app.config['ALMACEN_MAX_BYTES'] = int(os.environ.get('ALMACEN_MAX_BYTES', 256 * 1024 ** 2))
+app.config['ALMACEN_PRECARGA'] = int(os.environ.get('ALMACEN_PRECARGA', 100))
+
+# Sesiones de reoptimización incremental: celdas totales retenidas y
+# segundos de inactividad antes de descartar una sesión
+app.config['SESIONES_MAX_CELDAS'] = int(os.environ.get('SESIONES_MAX_CELDAS', 50_000_000))
+app.config['SESIONES_TTL_SEGUNDOS'] = float(os.environ.get('SESIONES_TTL_SEGUNDOS', 900))
+
+# Trabajos asíncronos: hilos de resolución, trabajos retenidos, plazo por
+# defecto y segundos que se conservan los trabajos finalizados
+app.config['TRABAJOS_HILOS'] = int(os.environ.get('TRABAJOS_HILOS', 2))
+app.config['TRABAJOS_MAX_PENDIENTES'] = int(os.environ.get('TRABAJOS_MAX_PENDIENTES', 100))
+app.config['TRABAJOS_DEADLINE_MS'] = int(os.environ.get('TRABAJOS_DEADLINE_MS', 600_000))
+app.config['TRABAJOS_RETENCION_SEGUNDOS'] = float(os.environ.get('TRABAJOS_RETENCION_SEGUNDOS', 3600))
+
+# Control de admisión: objetos por problema, memoria estimada y tiempo
+# estimado máximos para una petición síncrona
+app.config['ADMISION_MAX_OBJETOS'] = int(os.environ.get('ADMISION_MAX_OBJETOS', 100_000))
+app.config['ADMISION_MAX_MEMORIA_BYTES'] = int(os.environ.get('ADMISION_MAX_MEMORIA_BYTES', 2 * 1024 ** 3))
+app.config['ADMISION_MAX_TIEMPO_MS'] = int(os.environ.get('ADMISION_MAX_TIEMPO_MS', 30_000))
+
+# Perfilado de /optimizar: token de administración (vacío = deshabilitado),
+# una de cada N resoluciones perfiladas por muestreo (0 = sin muestreo),
+# directorio de los informes y número máximo de informes conservados
+app.config['PERFILADO_TOKEN'] = os.environ.get('PERFILADO_TOKEN', '')
+app.config['PERFILADO_MUESTREO'] = int(os.environ.get('PERFILADO_MUESTREO', 0))
+app.config['PERFILADO_DIRECTORIO'] = os.environ.get('PERFILADO_DIRECTORIO', 'perfiles')
+app.config['PERFILADO_MAX_INFORMES'] = int(os.environ.get('PERFILADO_MAX_INFORMES', 100))
+
+# Máximo de selecciones alternativas por petición; la tabla de /optimizar con
+# 'alternativas' guarda k entradas por celda
+app.config['ALTERNATIVAS_MAX_K'] = int(os.environ.get('ALTERNATIVAS_MAX_K', 10))
+
+# Número máximo de presupuestos con selección en /optimizar/frontera
+MAX_PUNTOS_FRONTERA = 1000
+
+# Motores de resolución disponibles para el campo 'solver'
+SOLVERS = ('auto', 'dinamica', 'pareto', 'ramificacion')
+
+# Columnas del formato columnar de entrada; 'cantidades' es opcional
+COLUMNAS = ('nombres', 'pesos', 'ganancias')
+COLUMNAS_OPCIONALES = ('cantidades',)
+
+# Tipos admitidos para el nombre de un objeto (bool es subclase de int y
+# también se admite en la lista de objetos)
+TIPOS_NOMBRE = {str, int, float, bool}
+
+# Formatos de la selección en la respuesta de /optimizar; los campos de
+# presentación no cambian el resultado y no forman parte de la clave de caché
+FORMATOS_SELECCION = ('nombres', 'indices', 'mascara')
+CAMPOS_PRESENTACION = ('formato_seleccion',)
+
+# Tipos MIME aceptados para MessagePack; el primero es el de las respuestas
+TIPOS_MSGPACK = ('application/msgpack', 'application/x-msgpack')
+
+# Secuencia de dígitos que puede ser un entero fuera de los 64 bits (el mayor
+# uint64 tiene 20 dígitos y el menor int64, 19 con signo): orjson lo
+# convertiría en float y perdería precisión
+DIGITOS_ENTERO_GRANDE = re.compile(rb'-\d{19}|\d{20}')
+
+# Modos de resolución y error relativo por defecto del modo aproximado
+MODOS = ('exacto', 'aproximado')
+EPSILON_POR_DEFECTO = 0.01
+
+# Segundos entre las consultas de progreso de un trabajo que se resuelve en el
+# pool de procesos (también es la latencia máxima de su cancelación)
+INTERVALO_PROGRESO_SEGUNDOS = 0.1
+
+# Tamaño máximo del núcleo al que se aplica la eliminación de dominados,
+# que cuesta O(k log k) en Python
+REDUCCION_MAX_DOMINANCIA = 20_000
+
+# Celdas mínimas del tramo de capacidad de cada proceso de la tabla paralela
+# y segundos máximos de espera en una sincronización entre bloques de filas
+TRAMO_MINIMO_PARALELO = 65_536
+PLAZO_SINCRONIZACION_SEGUNDOS = 60
+
+# Costes medidos de cada unidad de trabajo: una celda de la tabla vectorizada,
+# una entrada de la tabla de alternativas, un estado de la frontera de Pareto
+# y un nodo de ramificación y poda (ns), y memoria de un estado de la frontera
+# (bytes)
+COSTE_NS_CELDA = 3
+COSTE_NS_ALTERNATIVA = 20
+COSTE_NS_ESTADO = 1000
+COSTE_NS_NODO = 1000
+BYTES_ESTADO = 200
+
+# Versión del esquema del almacén persistente (un cambio lo vacía), segundos
+# máximos de espera al bloqueo de escritura del fichero, usos pendientes y
+# segundos máximos antes de volcar el contador de usos al fichero, y fracción
+# de ALMACEN_MAX_BYTES ocupada tras un desalojo (el margen evita desalojar en
+# cada escritura)
+VERSION_ALMACEN = 1
+PLAZO_BLOQUEO_ALMACEN_SEGUNDOS = 5
+ALMACEN_USOS_PENDIENTES = 256
+ALMACEN_SEGUNDOS_VOLCADO = 5
+ALMACEN_FRACCION_TRAS_DESALOJO = 0.9
+
+# Relación entre el coste de un estado o un nodo y el de una celda
+COSTE_RELATIVO_PARETO = COSTE_NS_ESTADO // COSTE_NS_CELDA
+COSTE_RELATIVO_RAMIFICACION = COSTE_NS_NODO // COSTE_NS_CELDA
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -51,114 +229,3946 @@ def knapsack_dynamic_programming(capacidad, objetos):
     
     return seleccionados[::-1], ganancia_total, peso_total
 
-def validar_entrada(data):
+def _peso_entero(peso):
     """
-    Valida los datos de entrada del request.
+    Convierte un peso a entero para usarlo como índice de la tabla dp.
     
     Args:
-        data (dict): Datos del request JSON
+        peso (int|float): Peso del objeto
     
     Returns:
-        tuple: (es_valido, mensaje_error)
+        int: Peso como entero
+    
+    Raises:
+        ValueError: Si el peso no es un valor entero
     """
-    # Verificar que los campos requeridos existan
-    if 'capacidad' not in data:
-        return False, "Campo 'capacidad' es requerido"
+    if isinstance(peso, float):
+        if not peso.is_integer():
+            raise ValueError(f"El peso {peso} no es entero; la programación dinámica requiere pesos enteros")
+        return int(peso)
+    return peso
+
+def _tipo_ganancias(ganancias):
+    """
+    Elige el dtype de NumPy capaz de representar exactamente las ganancias.
     
-    if 'objetos' not in data:
-        return False, "Campo 'objetos' es requerido"
+    Args:
+        ganancias (list): Ganancias de los objetos
     
-    # Validar capacidad
-    capacidad = data['capacidad']
-    if not isinstance(capacidad, (int, float)) or capacidad <= 0:
-        return False, "La capacidad debe ser un número positivo"
+    Returns:
+        numpy.dtype: int64 para enteros, float64 si hay decimales y object
+        si la suma de las ganancias desborda int64
+    """
+    if getattr(ganancias, 'typecode', None) == 'd' or any(isinstance(g, float) for g in ganancias):
+        return np.float64
+    if sum(ganancias) > np.iinfo(np.int64).max:
+        return object
+    return np.int64
+
+def _tabla_dinamica(capacidad, pesos, ganancias, bajo_consumo=False, progreso=None):
+    """
+    Calcula la programación dinámica de la mochila fila por fila con NumPy.
+    
+    Cada objeto se procesa con un único desplazamiento vectorizado sobre todo
+    el eje de capacidad: fila[w] = max(fila[w], fila[w - peso] + ganancia).
+    Sólo se conserva la fila actual de valores y una tabla con las decisiones
+    de tomar o no cada objeto, suficiente para la reconstrucción.
+    
+    En modo de bajo consumo las decisiones se empaquetan en bits (un bit por
+    celda en lugar de un byte), de modo que la memoria pico queda en O(C)
+    para la fila más n*C bits para las decisiones.
     
-    # Validar objetos
-    objetos = data['objetos']
-    if not isinstance(objetos, list) or len(objetos) == 0:
-        return False, "Los objetos deben ser una lista no vacía"
+    Args:
+        capacidad (int): Capacidad máxima de la mochila
+        pesos (list): Pesos enteros de los objetos
+        ganancias (list): Ganancias de los objetos
+        bajo_consumo (bool): Empaquetar las decisiones en bits
+        progreso (callable, optional): Se llama con (filas_completadas, filas_totales)
+            tras cada fila; puede lanzar una excepción para interrumpir el cálculo
+    
+    Returns:
+        tuple: (fila, decisiones) donde fila[w] es la máxima ganancia con
+        capacidad w y decisiones[i][w] indica si el objeto i mejora la celda w
+    """
+    n = len(pesos)
+    fila = np.zeros(capacidad + 1, dtype=_tipo_ganancias(ganancias))
+    if bajo_consumo:
+        decisiones = np.zeros((n, (capacidad + 8) // 8), dtype=np.uint8)
+        mejora = np.zeros(capacidad + 1, dtype=bool)
+    else:
+        decisiones = np.zeros((n, capacidad + 1), dtype=bool)
     
-    for i, obj in enumerate(objetos):
-        if not isinstance(obj, dict):
-            return False, f"El objeto {i} debe ser un diccionario"
+    for i in range(n):
+        if progreso is not None:
+            progreso(i, n)
         
-        # Verificar campos requeridos del objeto
-        if 'nombre' not in obj:
-            return False, f"El objeto {i} debe tener un campo 'nombre'"
+        peso = pesos[i]
+        if peso > capacidad:
+            continue
         
-        if 'peso' not in obj:
-            return False, f"El objeto {i} debe tener un campo 'peso'"
+        # Se calcula el candidato completo antes de escribir en la fila,
+        # por lo que se lee siempre la fila del objeto anterior
+        candidato = fila[:capacidad + 1 - peso] + ganancias[i]
+        if bajo_consumo:
+            mejora[:peso] = False
+            np.greater(candidato, fila[peso:], out=mejora[peso:])
+            decisiones[i] = np.packbits(mejora)
+        else:
+            np.greater(candidato, fila[peso:], out=decisiones[i, peso:])
+        np.maximum(fila[peso:], candidato, out=fila[peso:])
+    
+    if progreso is not None:
+        progreso(n, n)
+    
+    return fila, decisiones
+
+def _reconstruir(decisiones, pesos, capacidad):
+    """
+    Reconstruye los índices de los objetos seleccionados a partir de las decisiones.
+    
+    Args:
+        decisiones (numpy.ndarray): Tabla de decisiones de _tabla_dinamica,
+            booleana o empaquetada en bits
+        pesos (list): Pesos enteros de los objetos
+        capacidad (int): Capacidad desde la que se reconstruye
+    
+    Returns:
+        list: Índices de los objetos seleccionados en orden ascendente
+    """
+    empaquetada = decisiones.dtype == np.uint8
+    indices = []
+    w = capacidad
+    for i in range(len(pesos) - 1, -1, -1):
+        if empaquetada:
+            tomar = (decisiones[i, w >> 3] >> (7 - (w & 7))) & 1
+        else:
+            tomar = decisiones[i, w]
+        if tomar:
+            indices.append(i)
+            w -= pesos[i]
+    
+    return indices[::-1]
+
+def _procesos_dinamica(capacidad):
+    """
+    Devuelve el número de procesos con los que se calcula una tabla.
+    
+    Args:
+        capacidad (int): Capacidad escalada
+    
+    Returns:
+        int: Procesos (1 = en serie); cada uno recibe al menos
+        TRAMO_MINIMO_PARALELO celdas de capacidad
+    """
+    if capacidad < app.config['DINAMICA_CAPACIDAD_PARALELA']:
+        return 1
+    procesos = app.config['DINAMICA_PROCESOS'] or os.cpu_count() or 1
+    return max(1, min(procesos, (capacidad + 1) // TRAMO_MINIMO_PARALELO))
+
+# Procesos auxiliares de tablas paralelas en marcha en todo el servicio. El
+# contador está en memoria compartida y los procesos del pool lo heredan, así
+# que el límite se aplica también a las tablas que se calculan dentro del pool
+_procesos_auxiliares = None
+_lock_auxiliares = threading.Lock()
+
+def _contador_auxiliares():
+    """Devuelve el contador compartido de procesos auxiliares, creándolo en el primer uso."""
+    global _procesos_auxiliares
+    with _lock_auxiliares:
+        if _procesos_auxiliares is None:
+            _procesos_auxiliares = multiprocessing.Value('i', 0)
+        return _procesos_auxiliares
+
+def _auxiliares_libres():
+    """Procesos auxiliares que quedan libres (DINAMICA_PROCESOS - 1 en total)."""
+    maximo = (app.config['DINAMICA_PROCESOS'] or os.cpu_count() or 1) - 1
+    return max(0, maximo - _contador_auxiliares().value)
+
+@contextmanager
+def _reservar_procesos(procesos):
+    """
+    Reserva procesos auxiliares para una tabla paralela mientras dura el bloque.
+    
+    La reserva no espera: si otras tablas ocupan el presupuesto, se concede
+    lo que queda libre (o ninguno, y la tabla se calcula en serie).
+    
+    Args:
+        procesos (int): Procesos deseados, incluido el que calcula el primer tramo
+    
+    Yields:
+        int: Procesos concedidos, incluido el que calcula el primer tramo
+    """
+    contador = _contador_auxiliares()
+    with contador.get_lock():
+        concedidos = min(procesos - 1, _auxiliares_libres())
+        contador.value += concedidos
+    try:
+        yield concedidos + 1
+    finally:
+        with contador.get_lock():
+            contador.value -= concedidos
+
+def _bloques_paralelos(pesos, activos, tramo):
+    """
+    Agrupa las filas de la tabla paralela en bloques entre sincronizaciones.
+    
+    Dentro de un bloque cada proceso avanza sin esperar a los demás
+    recalculando por su cuenta un margen a la izquierda de su tramo tan ancho
+    como la suma de los pesos del bloque (las celdas de las que dependen las
+    suyas); el margen se limita a un cuarto del tramo.
+    
+    Returns:
+        list: Parejas (inicio, fin) de posiciones en activos
+    """
+    bloques = []
+    inicio, margen = 0, 0
+    for posicion, i in enumerate(activos):
+        if posicion > inicio and margen + pesos[i] > tramo // 4:
+            bloques.append((inicio, posicion))
+            inicio, margen = posicion, 0
+        margen += pesos[i]
+    bloques.append((inicio, len(activos)))
+    return bloques
+
+def _calcular_tramo(memoria_filas, memoria_decisiones, tipo, bajo_consumo, capacidad, pesos, ganancias,
+                    activos, bloques, inicio, fin, barrera, progreso=None):
+    """
+    Calcula las celdas [inicio, fin) de todas las filas de la tabla paralela.
+    
+    Se ejecuta en cada proceso de la tabla (el primer tramo en el proceso que
+    resuelve). Las filas están en memoria compartida con doble búfer: el
+    bloque b lee la fila b % 2 y escribe la otra, así que basta una espera en
+    la barrera por bloque. Cada bloque se calcula in situ sobre una copia
+    local de [inicio - margen, fin), como _tabla_dinamica, y sólo se escriben
+    las decisiones y los valores del propio tramo.
+    """
+    filas, decisiones = _vistas_paralelas(memoria_filas, memoria_decisiones, tipo, bajo_consumo,
+                                          capacidad, len(pesos))
+    mejora = np.zeros(fin - inicio, dtype=bool)
+    margenes = [sum(pesos[activos[p]] for p in range(primera, ultima)) for primera, ultima in bloques]
+    # Búfer local reutilizado en todos los bloques, del tamaño del mayor margen
+    copia = np.empty(fin - max(inicio - max(margenes), 0), dtype=tipo)
+    try:
+        for b, (primera, ultima) in enumerate(bloques):
+            if progreso is not None:
+                progreso(primera, len(activos))
+            
+            izquierda = max(inicio - margenes[b], 0)
+            local = copia[len(copia) - (fin - izquierda):]
+            np.copyto(local, filas[b % 2, izquierda:fin])
+            for p in range(primera, ultima):
+                i = activos[p]
+                peso = pesos[i]
+                if peso >= len(local):
+                    # Ninguna celda del tramo admite el objeto; las decisiones ya son 0
+                    continue
+                candidato = local[:len(local) - peso] + ganancias[i]
+                # Celdas del tramo con candidato; a la izquierda de izquierda +
+                # peso la fila no cambia (sólo ocurre si izquierda = 0)
+                desde = max(inicio, izquierda + peso)
+                if bajo_consumo:
+                    mejora[:desde - inicio] = False
+                    np.greater(candidato[desde - izquierda - peso:], local[desde - izquierda:],
+                               out=mejora[desde - inicio:])
+                    decisiones[i, inicio >> 3:(fin + 7) >> 3] = np.packbits(mejora)
+                else:
+                    np.greater(candidato[desde - izquierda - peso:], local[desde - izquierda:],
+                               out=decisiones[i, desde:fin])
+                np.maximum(local[peso:], candidato, out=local[peso:])
+            
+            filas[(b + 1) % 2, inicio:fin] = local[inicio - izquierda:]
+            barrera.wait(PLAZO_SINCRONIZACION_SEGUNDOS)
+    except BaseException:
+        # Liberar a los demás procesos si este no puede continuar
+        barrera.abort()
+        raise
+    finally:
+        del filas, decisiones
+
+def _vistas_paralelas(memoria_filas, memoria_decisiones, tipo, bajo_consumo, capacidad, n):
+    """Devuelve las filas y la tabla de decisiones sobre la memoria compartida."""
+    filas = np.ndarray((2, capacidad + 1), dtype=tipo, buffer=memoria_filas.buf)
+    if bajo_consumo:
+        decisiones = np.ndarray((n, (capacidad + 8) // 8), dtype=np.uint8, buffer=memoria_decisiones.buf)
+    else:
+        decisiones = np.ndarray((n, capacidad + 1), dtype=bool, buffer=memoria_decisiones.buf)
+    return filas, decisiones
+
+def _trabajador_tramo(*argumentos):
+    """Punto de entrada de los procesos de la tabla paralela."""
+    try:
+        _calcular_tramo(*argumentos)
+    except threading.BrokenBarrierError:
+        # El proceso que interrumpió la tabla es el que informa del error
+        pass
+
+def _resolver_paralelo(capacidad, pesos, ganancias, bajo_consumo, procesos, progreso=None):
+    """
+    Resuelve la mochila repartiendo el eje de capacidad entre varios procesos.
+    
+    Cada fila depende sólo de la anterior, así que cada proceso calcula un
+    tramo contiguo de capacidades (múltiplo de 64 celdas, para que las
+    decisiones empaquetadas no compartan bytes) y los procesos se
+    sincronizan por bloques de filas (ver _bloques_paralelos). Las dos filas
+    de valores y la tabla de decisiones viven en memoria compartida y la
+    selección se reconstruye directamente sobre ella, sin copiarla. Devuelve
+    la misma selección que _tabla_dinamica.
+    
+    Args:
+        capacidad (int): Capacidad máxima de la mochila
+        pesos (list): Pesos enteros de los objetos
+        ganancias (list): Ganancias de los objetos (int64 o float64)
+        bajo_consumo (bool): Empaquetar las decisiones en bits
+        procesos (int): Número de tramos, incluido el de este proceso
+        progreso (callable, optional): Notificación por bloque de filas; si
+            lanza una excepción se detienen todos los procesos
+    
+    Returns:
+        tuple: (indices, ganancia_total)
+    """
+    n = len(pesos)
+    tipo = _tipo_ganancias(ganancias)
+    activos = [i for i in range(n) if pesos[i] <= capacidad]
+    limites = [(capacidad + 1) * k // procesos // 64 * 64 for k in range(procesos)] + [capacidad + 1]
+    bloques = _bloques_paralelos(pesos, activos, limites[1])
+    
+    ancho_decisiones = (capacidad + 8) // 8 if bajo_consumo else capacidad + 1
+    memoria_filas = SharedMemory(create=True, size=2 * (capacidad + 1) * np.dtype(tipo).itemsize)
+    memoria_decisiones = SharedMemory(create=True, size=n * ancho_decisiones)
+    trabajadores = []
+    filas = decisiones = None
+    try:
+        filas, decisiones = _vistas_paralelas(memoria_filas, memoria_decisiones, tipo, bajo_consumo,
+                                              capacidad, n)
+        # La memoria compartida nueva está a cero: la fila inicial y las
+        # decisiones de los objetos que no caben no necesitan escribirse
+        anotar_medicion('memoria_tabla_bytes', filas.nbytes + decisiones.nbytes)
+        logger.info(f"Tabla en paralelo: {procesos} procesos, {len(bloques)} bloques de filas")
         
-        if 'ganancia' not in obj:
-            return False, f"El objeto {i} debe tener un campo 'ganancia'"
+        contexto = multiprocessing.get_context()
+        barrera = contexto.Barrier(procesos)
+        argumentos = (memoria_filas, memoria_decisiones, tipo, bajo_consumo, capacidad, pesos,
+                      ganancias, activos, bloques)
+        for k in range(1, procesos):
+            trabajador = contexto.Process(target=_trabajador_tramo, daemon=True,
+                                          args=argumentos + (limites[k], limites[k + 1], barrera))
+            trabajador.start()
+            trabajadores.append(trabajador)
         
-        # Validar tipos y valores
-        if not isinstance(obj['peso'], (int, float)) or obj['peso'] <= 0:
-            return False, f"El peso del objeto {i} debe ser un número positivo"
+        try:
+            _calcular_tramo(*argumentos, limites[0], limites[1], barrera, progreso)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("Un proceso de la tabla paralela terminó sin completar su tramo")
+        if progreso is not None:
+            progreso(n, n)
         
-        if not isinstance(obj['ganancia'], (int, float)) or obj['ganancia'] < 0:
-            return False, f"La ganancia del objeto {i} debe ser un número no negativo"
+        with medir_etapa('reconstruccion'):
+            indices = _reconstruir(decisiones, pesos, capacidad)
+        return indices, filas[len(bloques) % 2, capacidad].item()
+    finally:
+        for trabajador in trabajadores:
+            trabajador.join()
+        # Las vistas deben liberarse antes de cerrar la memoria compartida
+        filas = decisiones = None
+        for memoria in (memoria_filas, memoria_decisiones):
+            memoria.close()
+            memoria.unlink()
+
+def _resolver_vectorizado(capacidad, pesos, ganancias, bajo_consumo=False, progreso=None):
+    """
+    Resuelve la mochila vectorizada trabajando sólo con pesos y ganancias.
     
-    return True, ""
+    Args:
+        capacidad (int): Capacidad máxima de la mochila
+        pesos (list): Pesos enteros de los objetos
+        ganancias (list): Ganancias de los objetos
+        bajo_consumo (bool): Empaquetar las decisiones en bits
+        progreso (callable, optional): Notificación por fila, ver _tabla_dinamica
+    
+    Returns:
+        tuple: (indices, ganancia_total)
+    """
+    procesos = _procesos_dinamica(capacidad)
+    if procesos > 1 and _tipo_ganancias(ganancias) is not object:
+        with _reservar_procesos(procesos) as procesos:
+            if procesos > 1:
+                return _resolver_paralelo(capacidad, pesos, ganancias, bajo_consumo, procesos, progreso)
+    
+    fila, decisiones = _tabla_dinamica(capacidad, pesos, ganancias, bajo_consumo, progreso)
+    anotar_medicion('memoria_tabla_bytes', fila.nbytes + decisiones.nbytes)
+    with medir_etapa('reconstruccion'):
+        indices = _reconstruir(decisiones, pesos, capacidad)
+    
+    ganancia_total = fila[capacidad]
+    if isinstance(ganancia_total, np.generic):
+        ganancia_total = ganancia_total.item()
+    
+    return indices, ganancia_total
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Endpoint para verificar el estado del servicio."""
-    return jsonify({
-        "status": "healthy",
-        "service": "Portfolio Optimization Service",
-        "version": "1.0.0"
-    })
+def knapsack_vectorizado(capacidad, objetos, bajo_consumo=False):
+    """
+    Resuelve el problema de la mochila con programación dinámica vectorizada.
+    
+    Devuelve exactamente el mismo resultado que knapsack_dynamic_programming
+    pero calcula cada fila de la tabla con operaciones de NumPy, evitando el
+    bucle interpretado sobre todas las capacidades.
+    
+    Args:
+        capacidad (int): Capacidad máxima de la mochila
+        objetos (list): Lista de objetos con nombre, peso y ganancia
+        bajo_consumo (bool): Guardar las decisiones empaquetadas en bits
+            para reducir la memoria de la tabla a n*C bits
+    
+    Returns:
+        tuple: (seleccionados, ganancia_total, peso_total)
+    """
+    pesos = [_peso_entero(obj['peso']) for obj in objetos]
+    ganancias = [obj['ganancia'] for obj in objetos]
+    
+    indices, ganancia_total = _resolver_vectorizado(capacidad, pesos, ganancias, bajo_consumo)
+    
+    seleccionados = [objetos[i]['nombre'] for i in indices]
+    peso_total = sum(objetos[i]['peso'] for i in indices)
+    
+    return seleccionados, ganancia_total, peso_total
 
-@app.route('/optimizar', methods=['POST'])
-def optimizar():
+def _mejores_selecciones(capacidad, pesos, ganancias, k, guardar_filas=False, progreso=None):
     """
-    Endpoint principal para optimizar la selección de proyectos de inversión.
+    Calcula las k mejores selecciones distintas con una sola tabla dinámica.
+    
+    Cada celda guarda las k mejores ganancias en lugar de sólo la mejor. Al
+    procesar un objeto, las k ganancias sin tomarlo (fila[w]) y las k
+    tomándolo (fila[w - peso] + ganancia) ya están ordenadas, así que basta
+    una mezcla de k pasos vectorizada sobre todo el eje de capacidad. Cada
+    subconjunto aparece una sola vez entre los candidatos de una celda, por
+    lo que las k entradas son selecciones distintas. Para la reconstrucción
+    se guarda de qué candidato procede cada entrada (un byte por entrada).
+    
+    La primera entrada de cada celda desempata igual que _tabla_dinamica, de
+    modo que la mejor selección es la misma que la del motor dinámico.
+    
+    Args:
+        capacidad (int): Capacidad máxima de la mochila
+        pesos (list): Pesos enteros de los objetos
+        ganancias (list): Ganancias de los objetos
+        k (int): Número de selecciones
+        guardar_filas (bool): Conservar la mejor ganancia por capacidad tras
+            cada objeto, que usa _sensibilidad
+        progreso (callable, optional): Notificación por fila, ver _tabla_dinamica
     
     Returns:
-        JSON: Resultado de la optimización o error
+        tuple: (alternativas, filas) donde alternativas son parejas
+        (indices, ganancia_total) de mayor a menor ganancia (menos de k si
+        no hay tantas selecciones factibles) y filas[i][w] es la mejor
+        ganancia con los i primeros objetos y capacidad w, o None
     """
-    try:
-        # Obtener datos del request
-        data = request.get_json()
+    n = len(pesos)
+    tipo = _tipo_ganancias(ganancias)
+    if tipo is np.int64 and sum(ganancias) > np.iinfo(np.int64).max // 2:
+        tipo = object
+    # Las ganancias nunca son negativas: un valor negativo es una entrada vacía
+    vacia = np.iinfo(np.int64).min // 2 if tipo is np.int64 else -math.inf
+    fila = np.full((k, capacidad + 1), vacia, dtype=tipo)
+    fila[0] = 0
+    
+    tipo_origen = np.int8 if 2 * k <= np.iinfo(np.int8).max else np.int16
+    origenes = np.empty((n, k, capacidad + 1), dtype=tipo_origen)
+    origenes[:] = np.arange(k, dtype=tipo_origen)[:, None]
+    filas = None
+    if guardar_filas:
+        filas = np.empty((n + 1, capacidad + 1), dtype=tipo)
+        filas[0] = 0
+    
+    for i in range(n):
+        if progreso is not None:
+            progreso(i, n)
         
-        if not data:
-            return jsonify({
-                "error": "Datos JSON requeridos"
-            }), 400
+        peso = pesos[i]
+        if peso <= capacidad:
+            m = capacidad + 1 - peso
+            # La fila se sobrescribe rango a rango, así que se lee de una copia
+            sin_tomar = fila[:, peso:].copy()
+            tomando = fila[:, :m] + ganancias[i]
+            columnas = np.arange(m)
+            # Entradas ya tomadas de 'tomando'; las de 'sin_tomar' son r - b
+            b = np.zeros(m, dtype=tipo_origen)
+            for r in range(k):
+                valor_a, valor_b = sin_tomar[r - b, columnas], tomando[b, columnas]
+                tomar = valor_b > valor_a
+                fila[r, peso:] = np.where(tomar, valor_b, valor_a)
+                origenes[i, r, peso:] = np.where(tomar, b + k, r - b)
+                b += tomar
         
-        # Validar entrada
-        es_valido, mensaje_error = validar_entrada(data)
-        if not es_valido:
-            return jsonify({
-                "error": mensaje_error
-            }), 400
+        if filas is not None:
+            filas[i + 1] = fila[0]
+    
+    if progreso is not None:
+        progreso(n, n)
+    anotar_medicion('memoria_tabla_bytes', fila.nbytes + origenes.nbytes + (filas.nbytes if filas is not None else 0))
+    
+    alternativas = []
+    with medir_etapa('reconstruccion'):
+        for r in range(k):
+            ganancia_total = fila[r, capacidad]
+            if ganancia_total < 0:
+                break
+            indices, w, rango = [], capacidad, r
+            for i in range(n - 1, -1, -1):
+                procedencia = int(origenes[i, rango, w])
+                if procedencia >= k:
+                    indices.append(i)
+                    w -= pesos[i]
+                    procedencia -= k
+                rango = procedencia
+            if isinstance(ganancia_total, np.generic):
+                ganancia_total = ganancia_total.item()
+            alternativas.append((indices[::-1], ganancia_total))
+    
+    return alternativas, filas
+
+def _sensibilidad(capacidad, pesos, unidad, capacidad_escalada, pesos_escalados, ganancias, filas, indices):
+    """
+    Calcula para cada objeto los rangos de ganancia y peso que mantienen óptima una selección.
+    
+    Con filas (la mejor ganancia usando los objetos anteriores a j) y una
+    fila equivalente de los objetos posteriores, calculada hacia atrás, la
+    mejor ganancia sin j con capacidad c es max(previa[a] + posterior[c - a]).
+    Cambiar la ganancia de j sólo altera las selecciones que lo contienen, de
+    modo que la selección sigue siendo óptima mientras no la supere la mejor
+    sin j (si j está seleccionado) o la mejor con j (si no lo está). Al
+    aumentar el peso de un objeto seleccionado la selección sigue siendo
+    óptima mientras quepa; al reducir el de cualquier objeto, se busca por
+    bisección la menor capacidad con la que una selección que lo contiene
+    supera a la óptima.
+    
+    Args:
+        capacidad (int|float): Capacidad original
+        pesos (list): Pesos originales de los objetos
+        unidad (int): Factor de escala de escalar_problema
+        capacidad_escalada (int): Capacidad escalada
+        pesos_escalados (list): Pesos escalados
+        ganancias (list): Ganancias de los objetos
+        filas (numpy.ndarray): Filas de _mejores_selecciones
+        indices (list): Índices de la selección óptima
+    
+    Returns:
+        list: Por objeto, {"seleccionado", "ganancia": {"minima", "maxima"},
+        "peso": {"minimo", "maximo"}}; None indica que el valor puede
+        cambiar sin límite en esa dirección
+    """
+    n = len(pesos)
+    seleccionados = set(indices)
+    optimo = filas[n, capacidad_escalada]
+    holgura = math.floor(capacidad - sum(pesos[i] for i in indices))
+    tolerancia = 1e-9 * max(1, abs(optimo)) if filas.dtype == np.float64 else 0
+    posterior = np.zeros(capacidad_escalada + 1, dtype=filas.dtype)
+    
+    def numero(valor):
+        return valor.item() if isinstance(valor, np.generic) else valor
+    
+    rangos = [None] * n
+    for j in range(n - 1, -1, -1):
+        previa = filas[j]
+        peso, ganancia = pesos_escalados[j], ganancias[j]
         
-        capacidad = int(data['capacidad'])
-        objetos = data['objetos']
+        def sin_j(c):
+            # Mejor ganancia sin j con capacidad c
+            return (previa[:c + 1] + posterior[c::-1]).max()
         
-        logger.info(f"Optimizando portafolio con capacidad {capacidad} y {len(objetos)} objetos")
+        if j in seleccionados:
+            ganancia_rango = {"minima": numero(max(ganancia - (optimo - sin_j(capacidad_escalada)), 0)),
+                              "maxima": None}
+            peso_maximo = pesos[j] + holgura
+        else:
+            maxima = None
+            if peso <= capacidad_escalada:
+                maxima = numero(optimo - sin_j(capacidad_escalada - peso))
+            ganancia_rango = {"minima": None, "maxima": maxima}
+            peso_maximo = None
         
-        # Ejecutar algoritmo de optimización
-        seleccionados, ganancia_total, peso_total = knapsack_dynamic_programming(capacidad, objetos)
+        # Menor capacidad escalada c de una selección con j que supera al óptimo
+        # al reducir el peso de j; el peso reducido debe seguir siendo positivo
+        bajo = max(capacidad_escalada + 1, peso)
+        alto = int((capacidad + pesos[j] - 1) // unidad)
+        peso_minimo = None
+        if bajo <= alto and ganancia + sin_j(alto - peso) > optimo + tolerancia:
+            while bajo < alto:
+                medio = (bajo + alto) // 2
+                if ganancia + sin_j(medio - peso) > optimo + tolerancia:
+                    alto = medio
+                else:
+                    bajo = medio + 1
+            peso_minimo = pesos[j] - math.ceil(bajo * unidad - capacidad) + 1
         
-        # Preparar respuesta
-        resultado = {
-            "seleccionados": seleccionados,
-            "ganancia_total": ganancia_total,
-            "peso_total": peso_total
+        rangos[j] = {
+            "seleccionado": j in seleccionados,
+            "ganancia": ganancia_rango,
+            "peso": {"minimo": peso_minimo, "maximo": peso_maximo}
         }
         
-        logger.info(f"Optimización completada: {len(seleccionados)} proyectos seleccionados")
+        if peso <= capacidad_escalada:
+            candidato = posterior[:capacidad_escalada + 1 - peso] + ganancia
+            np.maximum(posterior[peso:], candidato, out=posterior[peso:])
+    
+    return rangos
+
+def escalar_problema(capacidad, pesos, resolucion=None):
+    """
+    Reduce la escala de la capacidad y los pesos antes de construir la tabla.
+    
+    Todos los pesos se dividen por su máximo común divisor y la capacidad se
+    trunca a esa misma unidad, lo que no cambia el conjunto de selecciones
+    factibles. Si se indica una resolución, los pesos se redondean hacia
+    arriba a múltiplos de ella, de modo que la selección obtenida nunca
+    excede la capacidad original aunque pueda dejar de ser óptima.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        resolucion (int|float, optional): Unidad mínima de redondeo de los pesos
+    
+    Returns:
+        tuple: (capacidad_escalada, pesos_escalados, unidad) donde unidad es
+        el factor por el que se dividieron capacidad y pesos
+    """
+    unidad = 1
+    if resolucion is not None:
+        pesos = [int(-(-peso // resolucion)) for peso in pesos]
+        capacidad = capacidad // resolucion
+        unidad = resolucion
+    else:
+        pesos = [_peso_entero(peso) for peso in pesos]
+    
+    divisor = math.gcd(*pesos) if pesos else 1
+    if divisor > 1:
+        pesos = [peso // divisor for peso in pesos]
+        capacidad = capacidad // divisor
+        unidad *= divisor
+    
+    return int(capacidad), pesos, unidad
+
+class LimiteExcedido(Exception):
+    """Se lanza cuando un motor de resolución supera su presupuesto de trabajo."""
+
+def _es_entero(valor):
+    """Indica si un número tiene valor entero."""
+    return isinstance(valor, int) or (isinstance(valor, float) and valor.is_integer())
+
+def _resolver_pareto(capacidad, pesos, ganancias, max_estados=None, progreso=None):
+    """
+    Resuelve la mochila fusionando listas de pares (peso, ganancia) no dominados.
+    
+    Implementa el esquema de Nemhauser-Ullmann: tras procesar cada objeto se
+    conserva sólo la frontera de Pareto de las selecciones parciales, es decir,
+    los pares ordenados por peso con ganancia estrictamente creciente. El coste
+    depende del tamaño de la frontera y no de la capacidad, y los pesos pueden
+    tener decimales.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+        max_estados (int, optional): Número máximo de estados a procesar
+        progreso (callable, optional): Notificación por objeto procesado,
+            ver _tabla_dinamica
+    
+    Returns:
+        tuple: (indices, ganancia_total)
+    
+    Raises:
+        LimiteExcedido: Si se procesan más de max_estados estados
+    """
+    # Cada estado es (peso, ganancia, camino); el camino es una lista enlazada
+    # (indice, camino_anterior) compartida entre estados para no copiar selecciones
+    frontera = [(0, 0, None)]
+    estados = 0
+    
+    for i in range(len(pesos)):
+        if progreso is not None:
+            progreso(i, len(pesos))
+        
+        peso, ganancia = pesos[i], ganancias[i]
+        if peso > capacidad or ganancia <= 0:
+            continue
         
-        return jsonify(resultado)
+        desplazada = [(w + peso, v + ganancia, (i, camino))
+                      for w, v, camino in frontera if w + peso <= capacidad]
+        # Cada objeto recorre la frontera completa y fusiona los desplazados
+        estados += len(frontera) + len(desplazada)
+        if max_estados is not None and estados > max_estados:
+            raise LimiteExcedido(f"La frontera de Pareto supera {max_estados} estados")
         
-    except Exception as e:
-        logger.error(f"Error en optimización: {str(e)}")
-        return jsonify({
-            "error": "Error interno del servidor",
-            "details": str(e)
-        }), 500
+        # A igual peso se visita primero la mayor ganancia; sólo se conservan
+        # los estados que mejoran la ganancia de todos los más livianos
+        nueva = []
+        for estado in heapq.merge(frontera, desplazada, key=lambda e: (e[0], -e[1])):
+            if not nueva or estado[1] > nueva[-1][1]:
+                nueva.append(estado)
+        frontera = nueva
+    
+    _, ganancia_total, camino = frontera[-1]
+    indices = []
+    while camino is not None:
+        indice, camino = camino
+        indices.append(indice)
+    
+    return indices[::-1], ganancia_total
+
+def _resolver_ramificacion(capacidad, pesos, ganancias, max_nodos=None, tiempo_limite=None):
+    """
+    Resuelve la mochila con ramificación y poda usando la cota de Dantzig.
+    
+    Los objetos se ordenan por ganancia/peso y se exploran en profundidad,
+    primero incluyendo cada objeto. Cada nodo se poda si la relajación lineal
+    (llenar en orden de razón y tomar una fracción del primer objeto que no
+    cabe) no supera la mejor solución conocida, que se inicializa con la
+    solución voraz.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+        max_nodos (int, optional): Número máximo de nodos a explorar
+        tiempo_limite (float, optional): Tiempo máximo en segundos
+    
+    Returns:
+        tuple: (indices, ganancia_total, optimo_probado) donde optimo_probado
+        es False si se agotó el presupuesto antes de cerrar la búsqueda
+    """
+    orden = sorted((i for i in range(len(pesos)) if pesos[i] <= capacidad and ganancias[i] > 0),
+                   key=lambda i: ganancias[i] / pesos[i], reverse=True)
+    p = [pesos[i] for i in orden]
+    g = [ganancias[i] for i in orden]
+    m = len(orden)
+    
+    # Sumas acumuladas para calcular la cota en O(log n)
+    pesos_acumulados = [0]
+    ganancias_acumuladas = [0]
+    for j in range(m):
+        pesos_acumulados.append(pesos_acumulados[-1] + p[j])
+        ganancias_acumuladas.append(ganancias_acumuladas[-1] + g[j])
+    
+    # Con ganancias enteras la cota puede truncarse
+    enteras = all(isinstance(valor, int) for valor in g)
+    
+    def cota(k, restante, ganancia):
+        j = bisect.bisect_right(pesos_acumulados, pesos_acumulados[k] + restante, k) - 1
+        valor = ganancia + ganancias_acumuladas[j] - ganancias_acumuladas[k]
+        if j < m:
+            valor += g[j] * (restante - (pesos_acumulados[j] - pesos_acumulados[k])) / p[j]
+        return math.floor(valor) if enteras else valor
+    
+    # Solución inicial voraz por razón ganancia/peso
+    mejor_ganancia, mejor_camino, restante = 0, None, capacidad
+    for j in range(m):
+        if p[j] <= restante:
+            restante -= p[j]
+            mejor_ganancia += g[j]
+            mejor_camino = (j, mejor_camino)
+    
+    inicio = time.perf_counter()
+    nodos = 0
+    optimo_probado = True
+    pila = [(0, capacidad, 0, None)]
+    while pila:
+        nodos += 1
+        if max_nodos is not None and nodos > max_nodos:
+            optimo_probado = False
+            break
+        if tiempo_limite is not None and nodos % 1024 == 0 and time.perf_counter() - inicio > tiempo_limite:
+            optimo_probado = False
+            break
+        
+        k, restante, ganancia, camino = pila.pop()
+        if ganancia > mejor_ganancia:
+            mejor_ganancia, mejor_camino = ganancia, camino
+        if k == m or cota(k, restante, ganancia) <= mejor_ganancia:
+            continue
+        
+        # Se apila primero la exclusión para explorar antes la inclusión
+        pila.append((k + 1, restante, ganancia, camino))
+        if p[k] <= restante:
+            pila.append((k + 1, restante - p[k], ganancia + g[k], (k, camino)))
+    
+    indices = []
+    while mejor_camino is not None:
+        j, mejor_camino = mejor_camino
+        indices.append(orden[j])
+    
+    logger.info(f"Ramificación y poda: {nodos} nodos, óptimo probado: {optimo_probado}")
+    return sorted(indices), mejor_ganancia, optimo_probado
+
+def _validar_objeto(i, obj):
+    """
+    Valida un objeto de la lista de proyectos.
+    
+    Args:
+        i (int): Posición del objeto en la lista
+        obj (dict): Objeto con nombre, peso y ganancia
+    
+    Returns:
+        str: Mensaje de error, vacío si el objeto es válido
+    """
+    if not isinstance(obj, dict):
+        return f"El objeto {i} debe ser un diccionario"
+    
+    # Verificar campos requeridos del objeto
+    if 'nombre' not in obj:
+        return f"El objeto {i} debe tener un campo 'nombre'"
+    
+    if 'peso' not in obj:
+        return f"El objeto {i} debe tener un campo 'peso'"
+    
+    if 'ganancia' not in obj:
+        return f"El objeto {i} debe tener un campo 'ganancia'"
+    
+    # Validar tipos y valores
+    if not isinstance(obj['nombre'], (str, int, float)):
+        return f"El nombre del objeto {i} debe ser un texto o un número"
+    
+    if not isinstance(obj['peso'], (int, float)) or obj['peso'] <= 0:
+        return f"El peso del objeto {i} debe ser un número positivo"
+    
+    if not isinstance(obj['ganancia'], (int, float)) or obj['ganancia'] < 0:
+        return f"La ganancia del objeto {i} debe ser un número no negativo"
+    
+    if 'cantidad' in obj and (not isinstance(obj['cantidad'], int) or isinstance(obj['cantidad'], bool)
+                              or obj['cantidad'] <= 0):
+        return f"La cantidad del objeto {i} debe ser un entero positivo"
+    
+    return ""
+
+def expandir_cantidades(pesos, ganancias, cantidades=None):
+    """
+    Expande los objetos con cantidad en partes de 1, 2, 4, ... unidades.
+    
+    Un objeto con cantidad k se divide en partes de 1, 2, 4, ..., 2^(p-1)
+    unidades más una parte con el resto, de modo que cualquier número de
+    unidades entre 0 y k es la suma de un subconjunto de partes. Así el
+    problema acotado se resuelve como uno 0/1 con O(log k) objetos por
+    proyecto en lugar de k copias.
+    
+    Args:
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+        cantidades (list, optional): Unidades disponibles de cada objeto
+    
+    Returns:
+        tuple: (pesos, ganancias, origen), donde origen[j] es la pareja
+        (índice del objeto, unidades) de la parte j; sin cantidades se
+        devuelven las mismas columnas y origen es None
+    """
+    if cantidades is None:
+        return pesos, ganancias, None
+    
+    pesos_expandidos, ganancias_expandidas, origen = [], [], []
+    for i, restantes in enumerate(cantidades):
+        parte = 1
+        while restantes > 0:
+            unidades = min(parte, restantes)
+            pesos_expandidos.append(pesos[i] * unidades)
+            ganancias_expandidas.append(ganancias[i] * unidades)
+            origen.append((i, unidades))
+            restantes -= unidades
+            parte *= 2
+    return pesos_expandidos, ganancias_expandidas, origen
+
+def _seleccion_por_objeto(nombres, origen, indices):
+    """
+    Agrupa las partes seleccionadas por objeto original.
+    
+    Returns:
+        dict: Nombres seleccionados y, si el problema tiene cantidades, las
+        unidades elegidas de cada uno en el mismo orden
+    """
+    if origen is None:
+        return {"seleccionados": [nombres[i] for i in indices]}
+    
+    unidades = {}
+    for j in indices:
+        i, parte = origen[j]
+        unidades[i] = unidades.get(i, 0) + parte
+    
+    return {
+        "seleccionados": [nombres[i] for i in unidades],
+        "cantidades": list(unidades.values())
+    }
+
+def _voraz_y_cota(capacidad, pesos, ganancias):
+    """
+    Calcula la solución voraz por razón ganancia/peso y la cota de Dantzig.
+    
+    La solución voraz se compara con el mejor objeto individual, por lo que
+    su ganancia es al menos la mitad del óptimo.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+    
+    Returns:
+        tuple: (indices, ganancia, cota_superior)
+    """
+    orden = sorted((i for i in range(len(pesos)) if pesos[i] <= capacidad and ganancias[i] > 0),
+                   key=lambda i: ganancias[i] / pesos[i], reverse=True)
+    
+    indices, ganancia, restante = [], 0, capacidad
+    cota = None
+    for i in orden:
+        if pesos[i] <= restante:
+            indices.append(i)
+            restante -= pesos[i]
+            ganancia += ganancias[i]
+        elif cota is None:
+            # Primer objeto que no cabe: la relajación lineal toma una fracción
+            cota = ganancia + ganancias[i] * restante / pesos[i]
+    if cota is None:
+        cota = ganancia
+    
+    if orden:
+        mejor = max(orden, key=lambda i: ganancias[i])
+        if ganancias[mejor] > ganancia:
+            indices, ganancia = [mejor], ganancias[mejor]
+    
+    return sorted(indices), ganancia, cota
+
+def _dominados(capacidad, pesos, ganancias, candidatos):
+    """
+    Busca los objetos que se pueden descartar por estar dominados.
+    
+    El objeto j está dominado por i si i no pesa más ni gana menos (con
+    empates resueltos por posición). Descartar j es seguro si j no cabe
+    junto a todos los que lo dominan: en cualquier solución que contenga j
+    falta alguno de ellos, y cambiar j por él no empeora la solución. La
+    suma de pesos de los dominantes se obtiene con un árbol de Fenwick
+    indexado por el rango de la ganancia.
+    
+    Returns:
+        set: Objetos de candidatos que se pueden descartar
+    """
+    orden = sorted(candidatos, key=lambda i: (pesos[i], -ganancias[i], i))
+    rangos = {ganancia: k + 1 for k, ganancia in
+              enumerate(sorted({ganancias[i] for i in candidatos}, reverse=True))}
+    arbol = [0] * (len(rangos) + 1)
+    
+    descartados = set()
+    for j in orden:
+        # Peso total de los objetos ya vistos con ganancia >= la de j
+        rango, suma = rangos[ganancias[j]], 0
+        while rango > 0:
+            suma += arbol[rango]
+            rango -= rango & -rango
+        if pesos[j] + suma > capacidad:
+            descartados.add(j)
+        
+        rango = rangos[ganancias[j]]
+        while rango < len(arbol):
+            arbol[rango] += pesos[j]
+            rango += rango & -rango
+    return descartados
+
+def reducir_problema(capacidad, pesos, ganancias):
+    """
+    Reduce el problema antes de resolverlo, dejando sólo un núcleo por decidir.
+    
+    Se descartan los objetos que no caben o no aportan ganancia. Después se
+    fijan con las cotas de Dembo y Hammer los objetos cuya relajación lineal
+    con la decisión contraria no puede superar a la solución voraz: si r es
+    la razón del objeto crítico, z = r·C + Σ max(0, g - r·p) acota cualquier
+    solución y fijar un objeto al revés cuesta |g - r·p|. Los objetos que
+    quedan lejos de la razón crítica se deciden así sin resolver nada, como
+    en el núcleo de Pisinger. Por último se descartan los dominados del
+    núcleo (ver _dominados).
+    
+    Los objetos fijados están en toda solución mejor que la voraz, por lo
+    que la solución final es la mejor entre la voraz y la de los fijados más
+    el núcleo.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+    
+    Returns:
+        dict: 'nucleo' (objetos por resolver), 'fijos' (objetos incluidos),
+        'capacidad' (capacidad restante para el núcleo), 'voraz' (índices y
+        ganancia de la solución voraz) y 'estadisticas'
+    """
+    n = len(pesos)
+    p = np.asarray(pesos, dtype=np.float64)
+    g = np.asarray(ganancias, dtype=np.float64)
+    
+    pesados = p > capacidad
+    sin_ganancia = ~pesados & (g <= 0)
+    validos = np.flatnonzero(~pesados & ~sin_ganancia)
+    estadisticas = {
+        "objetos": n,
+        "pesados": int(pesados.sum()),
+        "sin_ganancia": int(sin_ganancia.sum()),
+        "fijados_dentro": 0,
+        "fijados_fuera": 0,
+        "dominados": 0
+    }
+    voraz_indices, voraz_ganancia = [], 0
+    
+    fijos, nucleo = [], validos.tolist()
+    if p[validos].sum() <= capacidad:
+        # Caben todos: no queda nada por decidir
+        fijos, nucleo = nucleo, []
+    elif len(validos):
+        # Razón del objeto crítico: el primero que no cabe en orden de razón
+        razones = g[validos] / p[validos]
+        orden = validos[np.argsort(-razones, kind='stable')]
+        k = np.searchsorted(np.cumsum(p[orden]), capacidad, side='right')
+        critico = orden[k]
+        r = g[critico] / p[critico]
+        
+        # Solución voraz (como _voraz_y_cota, sin ordenar en Python): los
+        # objetos anteriores al crítico y después los que todavía quepan
+        voraz_indices = orden[:k].tolist()
+        restante = capacidad - sum(pesos[i] for i in voraz_indices)
+        siguientes = orden[k + 1:]
+        for i in siguientes[p[siguientes] <= restante].tolist():
+            if pesos[i] <= restante:
+                voraz_indices.append(i)
+                restante -= pesos[i]
+        voraz_ganancia = sum(ganancias[i] for i in voraz_indices)
+        mejor = int(validos[np.argmax(g[validos])])
+        if ganancias[mejor] > voraz_ganancia:
+            voraz_indices, voraz_ganancia = [mejor], ganancias[mejor]
+        voraz_indices.sort()
+        
+        margen = g[validos] - r * p[validos]
+        cota = r * capacidad + np.maximum(margen, 0).sum()
+        
+        # Una solución mejor que la voraz gana al menos voraz + 1 si las
+        # ganancias son enteras; la tolerancia cubre el redondeo de la cota
+        umbral = voraz_ganancia + 1 if _pesos_enteros(ganancias) else voraz_ganancia
+        decididos = cota - np.abs(margen) + 1e-9 * max(abs(cota), 1) < umbral
+        fijos = validos[decididos & (margen > 0)].tolist()
+        nucleo = validos[~decididos].tolist()
+        estadisticas["fijados_fuera"] = int((decididos & (margen < 0)).sum())
+    
+    restante = capacidad - sum(pesos[i] for i in fijos)
+    if restante < 0:
+        # Los fijados no caben juntos: ninguna solución supera a la voraz
+        estadisticas["fijados_fuera"] += len(fijos) + len(nucleo)
+        fijos, nucleo, restante = [], [], capacidad
+    else:
+        que_caben = [i for i in nucleo if pesos[i] <= restante]
+        estadisticas["fijados_fuera"] += len(nucleo) - len(que_caben)
+        nucleo = que_caben
+    
+    if 1 < len(nucleo) <= REDUCCION_MAX_DOMINANCIA:
+        dominados = _dominados(restante, pesos, ganancias, nucleo)
+        nucleo = [i for i in nucleo if i not in dominados]
+        estadisticas["dominados"] = len(dominados)
+    
+    estadisticas["fijados_dentro"] = len(fijos)
+    estadisticas["nucleo"] = len(nucleo)
+    return {
+        "nucleo": nucleo,
+        "fijos": fijos,
+        "capacidad": restante,
+        "voraz": (voraz_indices, voraz_ganancia),
+        "estadisticas": estadisticas
+    }
+
+def _resolver_fptas(capacidad, pesos, ganancias, epsilon, progreso=None):
+    """
+    Resuelve la mochila de forma aproximada escalando las ganancias (FPTAS).
+    
+    Las ganancias se dividen por K = epsilon * LB / n, siendo LB la ganancia
+    voraz (al menos la mitad del óptimo), y se redondean hacia abajo. Con las
+    ganancias escaladas se calcula el peso mínimo para cada ganancia posible,
+    que nunca supera la cota de Dantzig escalada (a lo sumo 2n/epsilon), de
+    modo que el coste es O(n²/epsilon) e independiente de la capacidad. El
+    redondeo pierde como mucho K por objeto, así que la solución cumple
+    ganancia >= óptimo - epsilon * LB >= (1 - epsilon) * óptimo.
+    
+    Args:
+        capacidad (int|float): Capacidad máxima de la mochila
+        pesos (list): Pesos de los objetos
+        ganancias (list): Ganancias de los objetos
+        epsilon (float): Error relativo máximo, entre 0 y 1
+        progreso (callable, optional): Notificación por fila, ver _tabla_dinamica
+    
+    Returns:
+        tuple: (indices, ganancia_total, cota_superior) donde cota_superior
+        es una cota probada de la ganancia óptima
+    """
+    voraz, ganancia_voraz, cota_dantzig = _voraz_y_cota(capacidad, pesos, ganancias)
+    candidatos = [i for i in range(len(pesos)) if pesos[i] <= capacidad and ganancias[i] > 0]
+    n = len(candidatos)
+    if n == 0:
+        return [], 0, 0
+    
+    factor = epsilon * ganancia_voraz / n
+    escaladas = [int(ganancias[i] // factor) for i in candidatos]
+    maximo = min(int(cota_dantzig // factor), sum(escaladas))
+    
+    # peso_minimo[q] = menor peso con el que se alcanza exactamente la ganancia escalada q
+    peso_minimo = np.full(maximo + 1, np.inf)
+    peso_minimo[0] = 0
+    decisiones = np.zeros((n, (maximo + 8) // 8), dtype=np.uint8)
+    mejora = np.zeros(maximo + 1, dtype=bool)
+    for k, i in enumerate(candidatos):
+        if progreso is not None:
+            progreso(k, n)
+        
+        q = escaladas[k]
+        if q == 0 or q > maximo:
+            continue
+        candidato = peso_minimo[:maximo + 1 - q] + pesos[i]
+        mejora[:q] = False
+        np.less(candidato, peso_minimo[q:], out=mejora[q:])
+        decisiones[k] = np.packbits(mejora)
+        np.minimum(peso_minimo[q:], candidato, out=peso_minimo[q:])
+    
+    q = int(np.flatnonzero(peso_minimo <= capacidad)[-1])
+    
+    seleccion = set()
+    for k in range(n - 1, -1, -1):
+        if (decisiones[k, q >> 3] >> (7 - (q & 7))) & 1:
+            seleccion.add(candidatos[k])
+            q -= escaladas[k]
+    
+    # Completar con los objetos que aún quepan, en orden de razón
+    restante = capacidad - sum(pesos[i] for i in seleccion)
+    for i in sorted(candidatos, key=lambda i: ganancias[i] / pesos[i], reverse=True):
+        if i not in seleccion and pesos[i] <= restante:
+            seleccion.add(i)
+            restante -= pesos[i]
+    
+    indices = sorted(seleccion)
+    ganancia_total = sum(ganancias[i] for i in indices)
+    if ganancia_total < ganancia_voraz:
+        indices, ganancia_total = voraz, ganancia_voraz
+    
+    # El óptimo pierde a lo sumo factor por objeto al escalar
+    cota_superior = min(cota_dantzig, ganancia_total + n * factor)
+    
+    logger.info(f"FPTAS con epsilon {epsilon}: {n} objetos, {maximo + 1} ganancias escaladas")
+    return indices, ganancia_total, max(cota_superior, ganancia_total)
+
+class SolicitudRechazada(Exception):
+    """Se lanza cuando un problema válido excede los límites del servicio."""
+    
+    def __init__(self, mensaje, codigo=422):
+        super().__init__(mensaje)
+        self.codigo = codigo
+    
+    def __reduce__(self):
+        # Conservar el código al volver de un proceso del lote
+        return (SolicitudRechazada, (str(self), self.codigo))
+
+def _verificar_numero_objetos(n):
+    if n > app.config['ADMISION_MAX_OBJETOS']:
+        raise SolicitudRechazada(f"El problema tiene {n} objetos; el máximo es "
+                                 f"{app.config['ADMISION_MAX_OBJETOS']}", 413)
+
+def estimar_costos(capacidad, pesos, max_nodos, tiempo_limite, epsilon=EPSILON_POR_DEFECTO, enteros=True,
+                   paralelo=True):
+    """
+    Estima el tiempo y la memoria de cada motor de resolución.
+    
+    Las estimaciones usan los costes medidos por unidad de trabajo. Para la
+    tabla dinámica son exactas en número de celdas; para la frontera de Pareto
+    son el peor caso (la frontera nunca tiene más de C+1 estados con pesos
+    enteros); para ramificación y poda, el presupuesto de nodos o de tiempo;
+    y para el FPTAS, el ancho 2n/epsilon del eje de ganancias.
+    
+    Args:
+        capacidad (int|float): Capacidad, ya escalada si los pesos son enteros
+        pesos (list): Pesos, ya escalados si son enteros
+        max_nodos (int): Presupuesto de nodos de ramificación y poda
+        tiempo_limite (float): Tiempo máximo de ramificación y poda en segundos
+        epsilon (float): Error relativo del FPTAS
+        enteros (bool): Si los pesos son enteros y admiten la tabla dinámica
+        paralelo (bool): Si la tabla dinámica puede repartirse entre procesos;
+            se estima con los procesos auxiliares libres en este momento
+    
+    Returns:
+        dict: Por motor, {"tiempo_ms", "memoria_bytes", "exacto"}
+    """
+    n = sum(1 for peso in pesos if peso <= capacidad)
+    estimaciones = {}
+    
+    if enteros:
+        celdas = n * (capacidad + 1)
+        decisiones = celdas // 8 if celdas > app.config['UMBRAL_CELDAS_BAJO_CONSUMO'] else celdas
+        estimaciones['dinamica'] = {
+            "tiempo_ms": celdas * COSTE_NS_CELDA / 1e6,
+            "memoria_bytes": 16 * (capacidad + 1) + decisiones,
+            "exacto": True
+        }
+        procesos = min(_procesos_dinamica(capacidad), _auxiliares_libres() + 1) if paralelo else 1
+        if procesos > 1:
+            # Cada proceso recalcula hasta un cuarto de su tramo por bloque de filas
+            estimaciones['dinamica']['tiempo_ms'] *= 1.25 / procesos
+            estimaciones['dinamica']['memoria_bytes'] += 20 * (capacidad + 1)
+    
+    # La frontera crece como mucho al doble por objeto hasta su tamaño máximo
+    frontera = min(2 ** min(n, 62), capacidad + 1) if enteros else 2 ** min(n, 62)
+    duplicaciones = min(n, frontera.bit_length())
+    estados = 2 ** duplicaciones + 2 * (n - duplicaciones) * frontera
+    estimaciones['pareto'] = {
+        "tiempo_ms": estados * COSTE_NS_ESTADO / 1e6,
+        "memoria_bytes": 2 * frontera * BYTES_ESTADO,
+        "exacto": True
+    }
+    
+    estimaciones['ramificacion'] = {
+        "tiempo_ms": min(max_nodos * COSTE_NS_NODO / 1e6, tiempo_limite * 1000),
+        "memoria_bytes": n * BYTES_ESTADO,
+        "exacto": False
+    }
+    
+    anchura = int(2 * n / epsilon) + 1
+    estimaciones['fptas'] = {
+        "tiempo_ms": n * anchura * COSTE_NS_CELDA / 1e6,
+        "memoria_bytes": n * anchura // 8 + 16 * anchura,
+        "exacto": False
+    }
+    
+    return estimaciones
+
+def estimar_analisis(capacidad, pesos, k, sensibilidad):
+    """
+    Estima el tiempo y la memoria de las alternativas y la sensibilidad.
+    
+    La tabla de _mejores_selecciones tiene k entradas por celda, cada una
+    más cara que una celda de la dinámica porque se calcula con una mezcla,
+    y guarda un byte de procedencia por entrada. La sensibilidad conserva la
+    mejor ganancia por objeto y capacidad y hace una bisección por objeto.
+    
+    Args:
+        capacidad (int): Capacidad escalada
+        pesos (list): Pesos escalados
+        k (int): Número de selecciones
+        sensibilidad (bool): Si se calcula la sensibilidad
+    
+    Returns:
+        dict: {"tiempo_ms", "memoria_bytes", "exacto"}
+    """
+    celdas = len(pesos) * (capacidad + 1)
+    tiempo_ms = celdas * k * COSTE_NS_ALTERNATIVA / 1e6
+    memoria_bytes = celdas * k + 24 * k * (capacidad + 1)
+    if sensibilidad:
+        bisecciones = max(pesos).bit_length() + 2
+        tiempo_ms += celdas * bisecciones * COSTE_NS_CELDA / 1e6
+        memoria_bytes += 8 * celdas
+    return {"tiempo_ms": tiempo_ms, "memoria_bytes": memoria_bytes, "exacto": True}
+
+def _columna_valida(valores, tipos, positivo):
+    """Comprueba los tipos y el mínimo de una columna sin recorrerla en Python."""
+    if not set(map(type, valores)) <= tipos:
+        return False
+    minimo = min(valores)
+    return minimo > 0 if positivo else minimo >= 0
+
+def _arreglo_tipado(valores):
+    """
+    Guarda una columna numérica ya validada en un arreglo compacto.
+    
+    Los enteros se guardan como int64 y el resto como float64; si algún
+    entero no cabe en int64 se conserva la lista para no perder precisión.
+    """
+    try:
+        if set(map(type, valores)) <= {int, bool}:
+            return array('q', valores)
+        return array('d', valores)
+    except OverflowError:
+        return list(valores)
+
+def _pesos_enteros(pesos):
+    """Indica si todos los pesos tienen valor entero."""
+    return getattr(pesos, 'typecode', None) == 'q' or all(_es_entero(peso) for peso in pesos)
+
+def ingerir_entrada(data):
+    """
+    Valida el request en una sola pasada y lo convierte a forma columnar.
+    
+    Acepta la lista de 'objetos' o un cuerpo columnar con 'nombres', 'pesos'
+    y 'ganancias' (y 'cantidades' opcional) de la misma longitud, que evita
+    un diccionario por objeto. Los pesos, ganancias y cantidades se guardan
+    en arreglos compactos de int64 o float64 sobre los que trabajan todos
+    los motores. Los mensajes de error son los de la validación por objeto.
+    
+    Args:
+        data (dict): Datos del request JSON
+    
+    Returns:
+        tuple: (problema, mensaje_error); problema es None si la entrada no
+        es válida y, si lo es, un diccionario con las columnas y los demás
+        campos del request
+    """
+    # Un cuerpo JSON o MessagePack válido puede ser una lista, un texto o un número
+    if not isinstance(data, dict):
+        return None, "Los datos deben ser un diccionario"
+    
+    # Verificar que los campos requeridos existan
+    if 'capacidad' not in data:
+        return None, "Campo 'capacidad' es requerido"
+    
+    columnar = 'objetos' not in data and any(columna in data for columna in COLUMNAS)
+    if not columnar and 'objetos' not in data:
+        return None, "Campo 'objetos' es requerido"
+    
+    if columnar:
+        for columna in COLUMNAS:
+            if columna not in data:
+                return None, f"Campo '{columna}' es requerido"
+    
+    # Validar capacidad
+    capacidad = data['capacidad']
+    if not isinstance(capacidad, (int, float)) or capacidad <= 0:
+        return None, "La capacidad debe ser un número positivo"
+    
+    if columnar:
+        columnas = COLUMNAS + tuple(c for c in COLUMNAS_OPCIONALES if c in data)
+        for columna in columnas:
+            if not isinstance(data[columna], list) or len(data[columna]) == 0:
+                return None, f"La columna '{columna}' debe ser una lista no vacía"
+        
+        if len({len(data[columna]) for columna in columnas}) > 1:
+            return None, f"Las columnas {', '.join(columnas)} deben tener la misma longitud"
+        
+        nombres, pesos, ganancias = data['nombres'], data['pesos'], data['ganancias']
+        cantidades = data.get('cantidades')
+        
+        # Validar cada columna de una vez; sólo si falla se busca el objeto
+        if not set(map(type, nombres)) <= TIPOS_NOMBRE:
+            i = next(i for i, nombre in enumerate(nombres) if type(nombre) not in TIPOS_NOMBRE)
+            return None, f"El nombre del objeto {i} debe ser un texto o un número"
+        
+        for valores, tipos, positivo, mensaje in (
+                (pesos, {int, float, bool}, True, "El peso del objeto {} debe ser un número positivo"),
+                (ganancias, {int, float, bool}, False, "La ganancia del objeto {} debe ser un número no negativo"),
+                (cantidades, {int}, True, "La cantidad del objeto {} debe ser un entero positivo")):
+            if valores is not None and not _columna_valida(valores, tipos, positivo):
+                i = next(i for i, valor in enumerate(valores) if not _columna_valida([valor], tipos, positivo))
+                return None, mensaje.format(i)
+    else:
+        # Validar objetos
+        objetos = data['objetos']
+        if not isinstance(objetos, list) or len(objetos) == 0:
+            return None, "Los objetos deben ser una lista no vacía"
+        
+        nombres, pesos, ganancias, cantidades = [], [], [], []
+        con_cantidades = False
+        for i, obj in enumerate(objetos):
+            mensaje_error = _validar_objeto(i, obj)
+            if mensaje_error:
+                return None, mensaje_error
+            nombres.append(obj['nombre'])
+            pesos.append(obj['peso'])
+            ganancias.append(obj['ganancia'])
+            cantidades.append(obj.get('cantidad', 1))
+            con_cantidades = con_cantidades or 'cantidad' in obj
+        
+        if not con_cantidades:
+            cantidades = None
+    
+    problema = {campo: valor for campo, valor in data.items()
+                if campo not in ('objetos',) + COLUMNAS + COLUMNAS_OPCIONALES}
+    problema['nombres'] = list(nombres)
+    problema['pesos'] = _arreglo_tipado(pesos)
+    problema['ganancias'] = _arreglo_tipado(ganancias)
+    if cantidades is not None:
+        problema['cantidades'] = _arreglo_tipado(cantidades)
+    
+    # Validar parámetros opcionales
+    if 'resolucion' in data:
+        resolucion = data['resolucion']
+        if not isinstance(resolucion, (int, float)) or resolucion <= 0:
+            return None, "La resolución debe ser un número positivo"
+    
+    if 'solver' in data:
+        if data['solver'] not in SOLVERS:
+            return None, f"El solver debe ser uno de: {', '.join(SOLVERS)}"
+        
+        if (data['solver'] == 'dinamica' and 'resolucion' not in data
+                and not _pesos_enteros(problema['pesos'])):
+            return None, "El solver 'dinamica' requiere pesos enteros o una resolución"
+    
+    for campo in ('max_nodos', 'tiempo_limite_ms'):
+        if campo in data:
+            if not isinstance(data[campo], int) or isinstance(data[campo], bool) or data[campo] <= 0:
+                return None, f"El campo '{campo}' debe ser un entero positivo"
+    
+    if 'modo' in data and data['modo'] not in MODOS:
+        return None, f"El modo debe ser uno de: {', '.join(MODOS)}"
+    
+    if 'epsilon' in data:
+        epsilon = data['epsilon']
+        if not isinstance(epsilon, (int, float)) or isinstance(epsilon, bool) or not 0 < epsilon < 1:
+            return None, "El epsilon debe ser un número entre 0 y 1"
+    
+    if 'deadline_ms' in data:
+        deadline_ms = data['deadline_ms']
+        if not isinstance(deadline_ms, int) or isinstance(deadline_ms, bool) or deadline_ms <= 0:
+            return None, "El campo 'deadline_ms' debe ser un entero positivo"
+    
+    if 'permitir_aproximado' in data and not isinstance(data['permitir_aproximado'], bool):
+        return None, "El campo 'permitir_aproximado' debe ser booleano"
+    
+    if 'reduccion' in data and not isinstance(data['reduccion'], bool):
+        return None, "El campo 'reduccion' debe ser booleano"
+    
+    if 'alternativas' in data:
+        alternativas = data['alternativas']
+        maximo = app.config['ALTERNATIVAS_MAX_K']
+        if (not isinstance(alternativas, int) or isinstance(alternativas, bool)
+                or not 1 <= alternativas <= maximo):
+            return None, f"El campo 'alternativas' debe ser un entero entre 1 y {maximo}"
+    
+    if 'sensibilidad' in data and not isinstance(data['sensibilidad'], bool):
+        return None, "El campo 'sensibilidad' debe ser booleano"
+    
+    if 'alternativas' in data or data.get('sensibilidad'):
+        # Ambos análisis salen de la tabla dinámica del problema 0/1
+        if data.get('solver', 'auto') not in ('auto', 'dinamica') or data.get('modo') == 'aproximado':
+            return None, "Las alternativas y la sensibilidad requieren el solver 'auto' o 'dinamica' en modo exacto"
+        if 'cantidades' in problema:
+            return None, "Las alternativas y la sensibilidad no admiten cantidades"
+        if 'resolucion' not in data and not _pesos_enteros(problema['pesos']):
+            return None, "Las alternativas y la sensibilidad requieren pesos enteros o una resolución"
+    
+    if data.get('sensibilidad') and 'resolucion' in data:
+        return None, "La sensibilidad no admite una resolución"
+    
+    formato = data.get('formato_seleccion', 'nombres')
+    if formato not in FORMATOS_SELECCION:
+        return None, f"El formato de selección debe ser uno de: {', '.join(FORMATOS_SELECCION)}"
+    
+    if formato != 'nombres' and len(set(problema['nombres'])) != len(problema['nombres']):
+        return None, f"El formato de selección '{formato}' requiere nombres únicos"
+    
+    return problema, ""
+
+def validar_entrada(data):
+    """
+    Valida los datos de entrada del request.
+    
+    Args:
+        data (dict): Datos del request JSON
+    
+    Returns:
+        tuple: (es_valido, mensaje_error)
+    """
+    problema, mensaje_error = ingerir_entrada(data)
+    return problema is not None, mensaje_error
+
+def _columnar(data):
+    """Devuelve el problema en forma columnar, ingiriéndolo si llega con objetos."""
+    if 'nombres' in data and 'objetos' not in data and isinstance(data['pesos'], array):
+        return data
+    
+    problema, mensaje_error = ingerir_entrada(data)
+    if problema is None:
+        raise ValueError(mensaje_error)
+    return problema
+
+def _describir_costo(solver, estimacion):
+    return (f"'{solver}' requiere ~{estimacion['memoria_bytes'] / 1024 ** 2:.0f} MB "
+            f"y ~{estimacion['tiempo_ms']:.0f} ms")
+
+def _resolver_reducido(data, nombres, origen, capacidad, pesos, ganancias, progreso, tiempo_maximo_ms):
+    """
+    Resuelve un problema en modo 'auto' reduciéndolo antes a su núcleo.
+    
+    El núcleo se resuelve con resolver_problema como un problema más (con
+    los mismos motores, límites y plazo restante) y su selección se une a
+    los objetos fijados; la respuesta incluye las estadísticas de la
+    reducción. Ver reducir_problema.
+    
+    Returns:
+        dict: Resultado como el de resolver_problema, con 'reduccion'
+    """
+    inicio = time.monotonic()
+    with medir_etapa('reduccion'):
+        reduccion = reducir_problema(capacidad, pesos, ganancias)
+    estadisticas = reduccion['estadisticas']
+    nucleo, fijos = reduccion['nucleo'], reduccion['fijos']
+    logger.info(f"Reducción: {estadisticas['nucleo']} de {estadisticas['objetos']} objetos en el núcleo "
+                f"({estadisticas['fijados_dentro']} fijados dentro, {estadisticas['fijados_fuera']} fuera, "
+                f"{estadisticas['dominados']} dominados)")
+    
+    resultado = {"solver": "reduccion", "optimo_probado": True}
+    indices_nucleo, ganancia_nucleo = [], 0
+    if nucleo:
+        subproblema = {campo: valor for campo, valor in data.items()
+                       if campo not in COLUMNAS + COLUMNAS_OPCIONALES}
+        subproblema.update({
+            "capacidad": reduccion['capacidad'],
+            # Los nombres del núcleo son las posiciones en el problema completo
+            "nombres": nucleo,
+            "pesos": _arreglo_tipado([pesos[i] for i in nucleo]),
+            "ganancias": _arreglo_tipado([ganancias[i] for i in nucleo]),
+            "reduccion": False
+        })
+        if 'deadline_ms' in data and tiempo_maximo_ms is None:
+            subproblema['deadline_ms'] = max(int(data['deadline_ms'] - (time.monotonic() - inicio) * 1000), 1)
+        resultado = resolver_problema(subproblema, progreso, tiempo_maximo_ms)
+        indices_nucleo, ganancia_nucleo = resultado['seleccionados'], resultado['ganancia_total']
+        anotar_medicion('objetos', len(pesos))
+    
+    # La solución voraz compite con la de los fijados más el núcleo
+    ganancia_fijos = sum(ganancias[i] for i in fijos)
+    indices, ganancia_total = sorted(fijos + indices_nucleo), ganancia_fijos + ganancia_nucleo
+    voraz_indices, voraz_ganancia = reduccion['voraz']
+    if voraz_ganancia > ganancia_total:
+        indices, ganancia_total = voraz_indices, voraz_ganancia
+    
+    extra = {campo: valor for campo, valor in resultado.items()
+             if campo not in ('seleccionados', 'cantidades', 'ganancia_total', 'peso_total')}
+    if 'cota_superior' in extra:
+        extra['cota_superior'] = max(voraz_ganancia, ganancia_fijos + extra['cota_superior'])
+    
+    return {
+        **_seleccion_por_objeto(nombres, origen, indices),
+        "ganancia_total": ganancia_total,
+        "peso_total": sum(pesos[i] for i in indices),
+        **extra,
+        "reduccion": estadisticas
+    }
+
+def _resolver_con_analisis(data, nombres, capacidad, pesos, ganancias, capacidad_escalada,
+                           pesos_escalados, unidad, progreso):
+    """
+    Resuelve con la tabla de las k mejores selecciones y, si se pide, la sensibilidad.
+    
+    La mejor selección es la misma que la del motor dinámico; las demás y
+    los rangos de sensibilidad salen de la misma resolución, sin volver a
+    resolver el problema con los datos modificados. Ver _mejores_selecciones
+    y _sensibilidad.
+    
+    Returns:
+        dict: Resultado como el de resolver_problema, con 'alternativas'
+        y 'sensibilidad' si se pidieron
+    """
+    sensibilidad = data.get('sensibilidad', False)
+    alternativas, filas = _mejores_selecciones(capacidad_escalada, pesos_escalados, ganancias,
+                                               data.get('alternativas', 1), sensibilidad, progreso)
+    
+    def seleccion(indices, ganancia_total):
+        return {
+            "seleccionados": [nombres[i] for i in indices],
+            "ganancia_total": ganancia_total,
+            "peso_total": sum(pesos[i] for i in indices)
+        }
+    
+    resultado = {
+        **seleccion(*alternativas[0]),
+        "solver": "dinamica",
+        # Con resolución la solución es óptima sólo para los pesos redondeados
+        "optimo_probado": 'resolucion' not in data
+    }
+    if 'alternativas' in data:
+        resultado['alternativas'] = [seleccion(*alternativa) for alternativa in alternativas]
+    
+    if sensibilidad:
+        with medir_etapa('sensibilidad'):
+            rangos = _sensibilidad(capacidad, pesos, unidad, capacidad_escalada, pesos_escalados,
+                                   ganancias, filas, alternativas[0][0])
+        resultado['sensibilidad'] = [{"nombre": nombre, **rango} for nombre, rango in zip(nombres, rangos)]
+    
+    return resultado
+
+def resolver_problema(data, progreso=None, tiempo_maximo_ms=None):
+    """
+    Resuelve un problema de optimización ya validado.
+    
+    Con pesos enteros (o una resolución) la capacidad y los pesos se escalan
+    antes de resolver. Después se estiman el tiempo y la memoria de cada
+    motor y se aplican los límites de admisión: ningún motor se ejecuta si
+    su estimación excede la memoria máxima o el tiempo disponible (el menor
+    entre el máximo del servicio y el 'deadline_ms' del cliente).
+    
+    En modo 'auto' el problema se reduce antes a su núcleo (ver
+    reducir_problema), salvo con 'reduccion': false o una resolución. Después
+    se prueba primero ramificación y poda; si no prueba el
+    óptimo, la frontera de Pareto con un presupuesto proporcional al tamaño
+    de la tabla dinámica (o al tiempo y memoria disponibles si la tabla no
+    cabe), y por último la tabla. Si ningún motor exacto cabe en los límites
+    y el cliente lo permite con 'permitir_aproximado', se degrada al FPTAS.
+    
+    En modo 'aproximado' se usa siempre el FPTAS con el epsilon pedido y la
+    respuesta incluye la cota superior probada del óptimo.
+    
+    Con 'alternativas' o 'sensibilidad' se usa siempre la tabla de las k
+    mejores selecciones, sin reducción (ver _resolver_con_analisis).
+    
+    Args:
+        data (dict): Problema ingerido con ingerir_entrada, o datos del
+            request con 'objetos' que se ingieren aquí
+        progreso (callable, optional): Notificación por fila de los motores
+            dinámico, Pareto y FPTAS, ver _tabla_dinamica
+        tiempo_maximo_ms (float, optional): Tiempo disponible que sustituye a
+            ADMISION_MAX_TIEMPO_MS y al 'deadline_ms' del cliente; los
+            trabajos asíncronos usan math.inf porque su plazo lo controla
+            la cola
+    
+    Returns:
+        dict: Resultado con seleccionados, ganancia_total, peso_total, solver
+        y optimo_probado
+    
+    Raises:
+        SolicitudRechazada: Si el problema excede los límites configurados
+            (413 por número de objetos, 422 por memoria o tiempo)
+    """
+    data = _columnar(data)
+    capacidad = data['capacidad']
+    nombres = data['nombres']
+    pesos, ganancias, origen = expandir_cantidades(data['pesos'], data['ganancias'], data.get('cantidades'))
+    resolucion = data.get('resolucion')
+    solver = data.get('solver', 'auto')
+    epsilon = data.get('epsilon', EPSILON_POR_DEFECTO)
+    max_nodos = data.get('max_nodos', app.config['RAMIFICACION_MAX_NODOS'])
+    tiempo_limite = data.get('tiempo_limite_ms', app.config['RAMIFICACION_TIEMPO_LIMITE_MS']) / 1000
+    
+    _verificar_numero_objetos(len(nombres))
+    anotar_medicion('objetos', len(pesos))
+    
+    analisis = 'alternativas' in data or data.get('sensibilidad', False)
+    if (solver == 'auto' and resolucion is None and data.get('modo') != 'aproximado'
+            and data.get('reduccion', True) and not analisis):
+        return _resolver_reducido(data, nombres, origen, capacidad, pesos, ganancias,
+                                  progreso, tiempo_maximo_ms)
+    
+    # Tiempo y memoria disponibles para esta petición
+    inicio = time.monotonic()
+    plazo_cliente = tiempo_maximo_ms is None and 'deadline_ms' in data
+    if tiempo_maximo_ms is not None:
+        tiempo_disponible = tiempo_maximo_ms
+    elif plazo_cliente:
+        tiempo_disponible = min(app.config['ADMISION_MAX_TIEMPO_MS'], data['deadline_ms'])
+    else:
+        tiempo_disponible = app.config['ADMISION_MAX_TIEMPO_MS']
+    memoria_disponible = app.config['ADMISION_MAX_MEMORIA_BYTES']
+    
+    def restante_ms():
+        return tiempo_disponible - (time.monotonic() - inicio) * 1000
+    
+    def cabe(estimacion):
+        return estimacion['memoria_bytes'] <= memoria_disponible and estimacion['tiempo_ms'] <= restante_ms()
+    
+    def progreso_con_plazo(filas_completadas, filas_totales):
+        if progreso is not None:
+            progreso(filas_completadas, filas_totales)
+        if plazo_cliente and restante_ms() < 0:
+            raise SolicitudRechazada(f"El plazo de {data['deadline_ms']} ms venció durante la resolución")
+    
+    enteros = resolucion is not None or _pesos_enteros(pesos)
+    if enteros:
+        # Reducir la escala del problema antes de resolver
+        capacidad_escalada, pesos_escalados, unidad = escalar_problema(capacidad, pesos, resolucion)
+        celdas = len(pesos) * (capacidad_escalada + 1)
+        anotar_medicion('capacidad_escalada', capacidad_escalada)
+        logger.info(f"Optimizando portafolio con capacidad {capacidad} y {len(pesos)} objetos "
+                    f"(unidad {unidad}, capacidad escalada {capacidad_escalada}, {celdas} celdas)")
+    else:
+        capacidad_escalada, pesos_escalados = capacidad, pesos
+        logger.info(f"Optimizando portafolio con capacidad {capacidad} y {len(pesos)} objetos "
+                    f"(pesos no enteros)")
+    
+    estimaciones = estimar_costos(capacidad_escalada, pesos_escalados, max_nodos, tiempo_limite,
+                                  epsilon, enteros)
+    
+    def resolver_aproximado(degradado):
+        # El plazo del cliente se sigue comprobando fila a fila durante el FPTAS
+        fptas = estimaciones['fptas']
+        if fptas['memoria_bytes'] > memoria_disponible or fptas['tiempo_ms'] > tiempo_disponible:
+            raise SolicitudRechazada(f"El problema excede los límites del servicio: "
+                                     f"{_describir_costo('fptas', estimaciones['fptas'])}; "
+                                     f"pruebe con un epsilon mayor")
+        indices, ganancia_total, cota_superior = _resolver_fptas(
+            capacidad, pesos, ganancias, epsilon, progreso_con_plazo)
+        resultado = {
+            **_seleccion_por_objeto(nombres, origen, indices),
+            "ganancia_total": ganancia_total,
+            "peso_total": sum(pesos[i] for i in indices),
+            "solver": "fptas",
+            "optimo_probado": ganancia_total >= cota_superior,
+            "modo": "aproximado",
+            "epsilon": epsilon,
+            "cota_superior": cota_superior
+        }
+        if degradado:
+            resultado["degradado"] = True
+        return resultado
+    
+    if data.get('modo') == 'aproximado':
+        logger.info(f"Modo aproximado con epsilon {epsilon}")
+        return resolver_aproximado(degradado=False)
+    
+    if analisis:
+        estimacion = estimar_analisis(capacidad_escalada, pesos_escalados, data.get('alternativas', 1),
+                                      data.get('sensibilidad', False))
+        if not cabe(estimacion):
+            raise SolicitudRechazada(f"El problema excede los límites del servicio: "
+                                     f"{_describir_costo('alternativas', estimacion)}; pida menos alternativas "
+                                     f"o sin sensibilidad")
+        return _resolver_con_analisis(data, nombres, capacidad, pesos, ganancias, capacidad_escalada,
+                                      pesos_escalados, unidad, progreso_con_plazo)
+    
+    # Tiempo reservado para degradar al FPTAS si ningún motor exacto cabe, con
+    # un margen del 10% para el error de las estimaciones
+    reserva_ms = 0
+    if data.get('permitir_aproximado'):
+        reserva_ms = (2 * estimaciones['fptas']['tiempo_ms']
+                      + 0.1 * min(tiempo_disponible, app.config['ADMISION_MAX_TIEMPO_MS']))
+    
+    def estados_admitidos():
+        # Estados de Pareto que caben en el tiempo y la memoria disponibles. Con
+        # reserva sólo se usa la mitad del tiempo: el límite se comprueba entre
+        # filas y la última puede costar tanto como todas las anteriores
+        tiempo_ms = restante_ms() - reserva_ms
+        if reserva_ms:
+            tiempo_ms /= 2
+        return int(max(min(tiempo_ms * 1e6 / COSTE_NS_ESTADO, memoria_disponible / BYTES_ESTADO), 0))
+    
+    cabe_dinamica = enteros and cabe(estimaciones['dinamica'])
+    if cabe_dinamica:
+        # Celdas que calcularía un solo proceso en el tiempo de la tabla (menos
+        # que las de la tabla si se reparte entre varios), que acotan el
+        # presupuesto de los demás motores
+        celdas_equivalentes = int(estimaciones['dinamica']['tiempo_ms'] * 1e6 / COSTE_NS_CELDA)
+    
+    indices = None
+    optimo_probado = True
+    if solver == 'auto':
+        # Ramificación y poda usa como mucho la mitad del tiempo disponible
+        presupuesto = max_nodos
+        if cabe_dinamica:
+            presupuesto = min(max_nodos, celdas_equivalentes // COSTE_RELATIVO_RAMIFICACION)
+        indices, ganancia_total, optimo_probado = _resolver_ramificacion(
+            capacidad_escalada, pesos_escalados, ganancias, presupuesto,
+            min(tiempo_limite, max(restante_ms() - reserva_ms, 0) / 2000))
+        solver = 'ramificacion'
+        
+        if not optimo_probado:
+            max_estados = estados_admitidos()
+            if cabe_dinamica:
+                max_estados = min(max_estados, celdas_equivalentes // COSTE_RELATIVO_PARETO)
+            def progreso_exploracion(filas_completadas, filas_totales):
+                # Abandonar la frontera si invade el tiempo reservado
+                if restante_ms() < reserva_ms:
+                    raise LimiteExcedido()
+                progreso_con_plazo(filas_completadas, filas_totales)
+            
+            try:
+                indices, ganancia_total = _resolver_pareto(
+                    capacidad_escalada, pesos_escalados, ganancias, max_estados, progreso_exploracion)
+                solver, optimo_probado = 'pareto', True
+            except LimiteExcedido:
+                if cabe_dinamica:
+                    solver, optimo_probado = 'dinamica', True
+                elif data.get('permitir_aproximado'):
+                    logger.info("Ningún motor exacto cabe en los límites, degradando a FPTAS")
+                    return resolver_aproximado(degradado=True)
+                else:
+                    motivo = (_describir_costo('dinamica', estimaciones['dinamica']) if enteros
+                              else "los pesos no enteros impiden usar la tabla dinámica")
+                    raise SolicitudRechazada(f"El problema excede los límites del servicio: {motivo} "
+                                             f"y la frontera de Pareto excede el tiempo o la memoria disponibles; "
+                                             f"use modo 'aproximado' o 'permitir_aproximado'")
+    elif solver == 'dinamica':
+        if not cabe_dinamica:
+            raise SolicitudRechazada(f"El problema excede los límites del servicio: "
+                                     f"{_describir_costo('dinamica', estimaciones['dinamica'])}")
+    elif solver == 'pareto':
+        max_estados = estados_admitidos()
+        try:
+            indices, ganancia_total = _resolver_pareto(
+                capacidad_escalada, pesos_escalados, ganancias, max_estados, progreso_con_plazo)
+        except LimiteExcedido:
+            raise SolicitudRechazada(f"El problema excede los límites del servicio: la frontera "
+                                     f"de Pareto supera {max_estados} estados")
+    elif solver == 'ramificacion':
+        indices, ganancia_total, optimo_probado = _resolver_ramificacion(
+            capacidad_escalada, pesos_escalados, ganancias, max_nodos,
+            min(tiempo_limite, max(restante_ms(), 0) / 1000))
+    
+    if solver == 'dinamica':
+        bajo_consumo = celdas > app.config['UMBRAL_CELDAS_BAJO_CONSUMO']
+        if bajo_consumo:
+            logger.info("Tabla por encima del umbral, usando modo de bajo consumo")
+        indices, ganancia_total = _resolver_vectorizado(
+            capacidad_escalada, pesos_escalados, ganancias, bajo_consumo, progreso_con_plazo)
+    
+    return {
+        **_seleccion_por_objeto(nombres, origen, indices),
+        "ganancia_total": ganancia_total,
+        "peso_total": sum(pesos[i] for i in indices),
+        "solver": solver,
+        # Con resolución la solución es óptima sólo para los pesos redondeados
+        "optimo_probado": optimo_probado and resolucion is None
+    }
+
+def clave_canonica(data):
+    """
+    Calcula una clave que identifica un problema independientemente del orden.
+    
+    Los objetos se serializan individualmente y se ordenan, de modo que la
+    misma lista enviada en otro orden (o en formato columnar) produce la
+    misma clave. El resto de campos del request (solver, resolución,
+    presupuestos...) también forman parte de la clave porque pueden cambiar
+    el resultado.
+    
+    Args:
+        data (dict): Datos del request ya validados
+    
+    Returns:
+        str: Hash SHA-256 hexadecimal del problema canónico
+    """
+    data = _columnar(data)
+    columnas = COLUMNAS + tuple(c for c in COLUMNAS_OPCIONALES if c in data)
+    canonico = {campo: valor for campo, valor in data.items()
+                if campo not in columnas and campo not in CAMPOS_PRESENTACION}
+    canonico['objetos'] = sorted(json.dumps(fila) for fila in zip(*(data[c] for c in columnas)))
+    serializado = json.dumps(canonico, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+class CacheResultados:
+    """
+    Caché LRU en memoria de resultados de optimización, con caducidad opcional.
+    
+    El tamaño de cada entrada se estima por la longitud de su serialización JSON.
+    """
+    
+    def __init__(self, max_entradas, ttl=0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiradas = 0
+        self.memoria_bytes = 0
+    
+    def obtener(self, clave):
+        """
+        Busca un resultado y lo marca como usado recientemente.
+        
+        Args:
+            clave (str): Clave canónica del problema
+        
+        Returns:
+            dict: Resultado almacenado o None si no existe o caducó
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] is not None and entrada[1] < time.monotonic():
+                self._eliminar(clave)
+                self.expiradas += 1
+                entrada = None
+            
+            if entrada is None:
+                self.misses += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return entrada[0]
+    
+    def guardar(self, clave, resultado):
+        """
+        Almacena un resultado, desalojando los menos usados si se supera el tamaño.
+        
+        Args:
+            clave (str): Clave canónica del problema
+            resultado (dict): Resultado de la optimización
+        """
+        if self.max_entradas <= 0:
+            return
+        
+        tamano = len(json.dumps(resultado))
+        expira = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if clave in self._entradas:
+                self._eliminar(clave)
+            self._entradas[clave] = (resultado, expira, tamano)
+            self.memoria_bytes += tamano
+            
+            while len(self._entradas) > self.max_entradas:
+                self._eliminar(next(iter(self._entradas)))
+                self.evictions += 1
+    
+    def _eliminar(self, clave):
+        _, _, tamano = self._entradas.pop(clave)
+        self.memoria_bytes -= tamano
+    
+    def limpiar(self):
+        """Elimina todas las entradas y reinicia las estadísticas."""
+        with self._lock:
+            self._entradas.clear()
+            self.hits = self.misses = self.evictions = self.expiradas = 0
+            self.memoria_bytes = 0
+    
+    def estadisticas(self):
+        """
+        Devuelve las estadísticas de uso de la caché.
+        
+        Returns:
+            dict: Aciertos, fallos, desalojos, entradas y memoria usada
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expiradas": self.expiradas,
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "memoria_bytes": self.memoria_bytes
+            }
+
+cache_resultados = CacheResultados(app.config['CACHE_MAX_ENTRADAS'], app.config['CACHE_TTL_SEGUNDOS'])
+
+class AlmacenResultados:
+    """
+    Almacén persistente de resultados de optimización en un fichero SQLite.
+    
+    A diferencia de la caché en memoria, sobrevive a los reinicios y lo
+    comparten todos los procesos (y contenedores) que usan el mismo fichero
+    local. En modo WAL los lectores no se bloquean entre sí ni con el
+    escritor, y las escrituras de distintos procesos se serializan con el
+    bloqueo del propio fichero.
+    
+    Cada entrada guarda el resultado serializado en JSON, su tamaño, las veces
+    que se ha pedido y el instante de su último uso. Cuando la suma de tamaños
+    supera max_bytes se desalojan las entradas usadas hace más tiempo hasta
+    bajar de ALMACEN_FRACCION_TRAS_DESALOJO * max_bytes. La suma se mantiene en
+    la tabla ocupacion, dentro de la misma transacción que cada escritura, para
+    no recorrer el almacén. Los usos se acumulan en memoria y se vuelcan por
+    tandas para no escribir en el fichero en cada acierto.
+    """
+    
+    def __init__(self, ruta, max_bytes):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._usos = {}
+        self._ultimo_volcado = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._transaccion() as conexion:
+            if conexion.execute("PRAGMA user_version").fetchone()[0] != VERSION_ALMACEN:
+                conexion.execute("DROP TABLE IF EXISTS resultados")
+                conexion.execute("DROP TABLE IF EXISTS ocupacion")
+                # El resultado va al final de la fila y el índice cubre último
+                # uso y tamaño: el desalojo no lee los resultados
+                conexion.execute("CREATE TABLE resultados (clave TEXT PRIMARY KEY, tamano INTEGER NOT NULL, "
+                                 "usos INTEGER NOT NULL, ultimo_uso REAL NOT NULL, resultado BLOB NOT NULL)")
+                conexion.execute("CREATE INDEX resultados_ultimo_uso ON resultados (ultimo_uso, tamano)")
+                conexion.execute("CREATE TABLE ocupacion (bytes INTEGER NOT NULL)")
+                conexion.execute("INSERT INTO ocupacion VALUES (0)")
+                conexion.execute(f"PRAGMA user_version = {VERSION_ALMACEN}")
+    
+    def _conexion(self):
+        # Una conexión por hilo; tras un fork el proceso hijo abre la suya
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=PLAZO_BLOQUEO_ALMACEN_SEGUNDOS, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+    
+    @contextmanager
+    def _transaccion(self):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura al empezar, así que dos
+        # procesos no pueden desalojar a la vez a partir de la misma suma
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexion
+        except BaseException:
+            if conexion.in_transaction:
+                conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+    
+    def obtener(self, clave):
+        """
+        Busca un resultado y anota el uso.
+        
+        Args:
+            clave (str): Clave canónica del problema
+        
+        Returns:
+            dict: Resultado almacenado o None si no existe
+        """
+        fila = self._conexion().execute("SELECT resultado FROM resultados WHERE clave = ?", (clave,)).fetchone()
+        with self._lock:
+            if fila is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.registrar_uso(clave)
+        return json.loads(fila[0])
+    
+    def registrar_uso(self, clave):
+        """
+        Anota un uso de una entrada (por ejemplo, un acierto de la caché en memoria).
+        
+        Args:
+            clave (str): Clave canónica del problema
+        """
+        with self._lock:
+            self._usos[clave] = self._usos.get(clave, 0) + 1
+            volcar = (len(self._usos) >= ALMACEN_USOS_PENDIENTES
+                      or time.monotonic() - self._ultimo_volcado >= ALMACEN_SEGUNDOS_VOLCADO)
+        if volcar:
+            self.volcar_usos()
+    
+    def volcar_usos(self):
+        """Escribe en el fichero los usos acumulados en memoria."""
+        with self._lock:
+            usos, self._usos = self._usos, {}
+            self._ultimo_volcado = time.monotonic()
+        if not usos:
+            return
+        
+        ahora = time.time()
+        with self._transaccion() as conexion:
+            conexion.executemany("UPDATE resultados SET usos = usos + ?, ultimo_uso = MAX(ultimo_uso, ?) "
+                                 "WHERE clave = ?", [(n, ahora, clave) for clave, n in usos.items()])
+    
+    def guardar(self, clave, resultado):
+        """
+        Almacena un resultado, desalojando los menos usados si se supera el tamaño.
+        
+        Args:
+            clave (str): Clave canónica del problema
+            resultado (dict): Resultado de la optimización
+        """
+        serializado = json.dumps(resultado, separators=(',', ':')).encode('utf-8')
+        objetivo = int(self.max_bytes * ALMACEN_FRACCION_TRAS_DESALOJO)
+        if len(serializado) > objetivo:
+            return
+        
+        with self._transaccion() as conexion:
+            previo = conexion.execute("SELECT tamano FROM resultados WHERE clave = ?", (clave,)).fetchone()
+            conexion.execute("INSERT INTO resultados VALUES (?, ?, 1, ?, ?) ON CONFLICT (clave) DO UPDATE SET "
+                             "resultado = excluded.resultado, tamano = excluded.tamano, usos = usos + 1, "
+                             "ultimo_uso = excluded.ultimo_uso",
+                             (clave, len(serializado), time.time(), serializado))
+            conexion.execute("UPDATE ocupacion SET bytes = bytes + ?",
+                             (len(serializado) - (previo[0] if previo else 0),))
+            total = conexion.execute("SELECT bytes FROM ocupacion").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            
+            # Desalojar desde el uso más antiguo; la entrada recién guardada es
+            # la más reciente y cabe en el objetivo, así que se conserva
+            desalojadas, liberados = [], 0
+            cursor = conexion.execute("SELECT rowid, tamano FROM resultados ORDER BY ultimo_uso")
+            for rowid, tamano in cursor:
+                if total - liberados <= objetivo:
+                    break
+                desalojadas.append((rowid,))
+                liberados += tamano
+            cursor.close()
+            conexion.executemany("DELETE FROM resultados WHERE rowid = ?", desalojadas)
+            conexion.execute("UPDATE ocupacion SET bytes = bytes - ?", (liberados,))
+        with self._lock:
+            self.evictions += len(desalojadas)
+    
+    def mas_usados(self, n):
+        """
+        Devuelve los resultados más pedidos, de más a menos usos.
+        
+        Args:
+            n (int): Número máximo de resultados
+        
+        Returns:
+            list: Pares (clave, resultado)
+        """
+        self.volcar_usos()
+        filas = self._conexion().execute("SELECT clave, resultado FROM resultados "
+                                         "ORDER BY usos DESC, ultimo_uso DESC LIMIT ?", (n,)).fetchall()
+        return [(clave, json.loads(resultado)) for clave, resultado in filas]
+    
+    def limpiar(self):
+        """Elimina todas las entradas y reinicia las estadísticas."""
+        with self._lock:
+            self._usos.clear()
+            self.hits = self.misses = self.evictions = 0
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM resultados")
+            conexion.execute("UPDATE ocupacion SET bytes = 0")
+    
+    def cerrar(self):
+        """Vuelca los usos pendientes y cierra la conexión del hilo actual."""
+        self.volcar_usos()
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None and self._local.pid == os.getpid():
+            conexion.close()
+        self._local.conexion = None
+    
+    def estadisticas(self):
+        """
+        Devuelve las estadísticas de uso del almacén.
+        
+        Las entradas y el tamaño son los del fichero (comunes a todos los
+        procesos); los aciertos, fallos y desalojos, los de este proceso.
+        
+        Returns:
+            dict: Aciertos, fallos, desalojos, entradas y bytes ocupados
+        """
+        entradas, tamano = self._conexion().execute(
+            "SELECT (SELECT COUNT(*) FROM resultados), bytes FROM ocupacion").fetchone()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entradas": entradas,
+                "bytes": tamano,
+                "max_bytes": self.max_bytes
+            }
+
+almacen_resultados = (AlmacenResultados(app.config['ALMACEN_RUTA'], app.config['ALMACEN_MAX_BYTES'])
+                      if app.config['ALMACEN_RUTA'] else None)
+
+def buscar_resultado(clave):
+    """
+    Busca un resultado en la caché en memoria y, si no está, en el almacén persistente.
+    
+    Un resultado encontrado en el almacén se copia a la caché en memoria. Un
+    fallo del almacén (fichero bloqueado, disco lleno...) se trata como
+    ausencia del resultado para no hacer fallar la petición.
+    
+    Args:
+        clave (str): Clave canónica del problema
+    
+    Returns:
+        tuple: (resultado, origen); origen es 'HIT' (memoria) o 'PERSISTENTE',
+        y el resultado es None si no está en ninguno de los dos
+    """
+    resultado = cache_resultados.obtener(clave)
+    if almacen_resultados is None:
+        return resultado, 'HIT'
+    
+    try:
+        if resultado is not None:
+            almacen_resultados.registrar_uso(clave)
+            return resultado, 'HIT'
+        resultado = almacen_resultados.obtener(clave)
+    except sqlite3.Error as e:
+        logger.warning(f"Almacén persistente no disponible: {str(e)}")
+        return resultado, 'HIT'
+    
+    if resultado is not None:
+        cache_resultados.guardar(clave, resultado)
+    return resultado, 'PERSISTENTE'
+
+def guardar_resultado(clave, resultado):
+    """
+    Guarda un resultado en la caché en memoria y en el almacén persistente.
+    
+    Args:
+        clave (str): Clave canónica del problema
+        resultado (dict): Resultado de la optimización
+    """
+    cache_resultados.guardar(clave, resultado)
+    if almacen_resultados is None:
+        return
+    try:
+        almacen_resultados.guardar(clave, resultado)
+    except sqlite3.Error as e:
+        logger.warning(f"No se pudo guardar en el almacén persistente: {str(e)}")
+
+def precargar_cache(n):
+    """
+    Carga en la caché en memoria los n resultados más pedidos del almacén persistente.
+    
+    Args:
+        n (int): Número máximo de resultados (limitado por CACHE_MAX_ENTRADAS)
+    
+    Returns:
+        int: Número de resultados precargados
+    """
+    n = min(n, cache_resultados.max_entradas)
+    if almacen_resultados is None or n <= 0:
+        return 0
+    
+    mas_usados = almacen_resultados.mas_usados(n)
+    # Del menos al más usado, para que los más pedidos queden como los más
+    # recientes de la caché LRU
+    for clave, resultado in reversed(mas_usados):
+        cache_resultados.guardar(clave, resultado)
+    logger.info(f"{len(mas_usados)} resultados precargados del almacén persistente")
+    return len(mas_usados)
+
+class ResolucionesEnCurso:
+    """
+    Comparte una única resolución entre peticiones idénticas concurrentes.
+    
+    La primera petición con una clave resuelve el problema; las que llegan
+    con la misma clave mientras tanto esperan su resultado (o su excepción)
+    en lugar de repetir el cálculo.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso = {}
+        self.compartidas = 0
+    
+    def ejecutar(self, clave, funcion):
+        """
+        Ejecuta funcion() o espera a la ejecución en curso con la misma clave.
+        
+        La función debe guardar su resultado en la caché antes de terminar,
+        para que una petición que llegue justo después lo encuentre allí.
+        
+        Args:
+            clave (str): Clave canónica del problema
+            funcion (callable): Resolución sin argumentos
+        
+        Returns:
+            tuple: (resultado, compartida); compartida indica que el resultado
+            se obtuvo de la resolución de otra petición
+        """
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            compartida = futuro is not None
+            if compartida:
+                self.compartidas += 1
+            else:
+                futuro = self._en_curso[clave] = Future()
+        
+        if compartida:
+            return futuro.result(), True
+        
+        try:
+            resultado = funcion()
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado, False
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+
+resoluciones_en_curso = ResolucionesEnCurso()
+
+# Límites de los histogramas: latencias en segundos y tamaños en potencias de 10
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_TAMANO = tuple(10 ** k for k in range(11))
+
+class MedicionEtapas:
+    """
+    Tiempos por etapa de una petición y datos del problema resuelto.
+    
+    Las etapas pueden anidarse; el tiempo de cada una excluye el de las
+    etapas internas, de modo que la suma de todas es el tiempo medido.
+    """
+    
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.anotaciones = {}
+        self._internas = []
+    
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el bloque como la etapa indicada."""
+        inicio = time.perf_counter()
+        self._internas.append(0.0)
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            internas = self._internas.pop()
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + duracion - internas
+            if self._internas:
+                self._internas[-1] += duracion
+    
+    def server_timing(self):
+        """Valor de la cabecera Server-Timing, en milisegundos."""
+        total = time.perf_counter() - self.inicio
+        partes = [f"{nombre};dur={duracion * 1000:.2f}" for nombre, duracion in self.etapas.items()]
+        partes.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(partes)
+
+_medicion_actual = threading.local()
+
+def medir_etapa(nombre):
+    """
+    Mide un bloque como etapa de la petición en curso en este hilo.
+    
+    Fuera de una petición (pool de procesos, trabajos asíncronos) no mide nada.
+    """
+    medicion = getattr(_medicion_actual, 'medicion', None)
+    return medicion.etapa(nombre) if medicion is not None else nullcontext()
+
+def anotar_medicion(clave, valor):
+    """Registra un dato del problema (objetos, capacidad, memoria...) en la petición en curso."""
+    medicion = getattr(_medicion_actual, 'medicion', None)
+    if medicion is not None:
+        medicion.anotaciones[clave] = valor
+
+class Histograma:
+    """Histograma acumulado con límites fijos, en el formato de Prometheus."""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0
+        self.total = 0
+    
+    def observar(self, valor):
+        # Cada observación cuenta en su bucket; al exportar se acumula
+        posicion = bisect.bisect_left(self.buckets, valor)
+        if posicion < len(self.buckets):
+            self.conteos[posicion] += 1
+        self.suma += valor
+        self.total += 1
+
+class MetricasServicio:
+    """
+    Registro de métricas del servicio exportable en texto de Prometheus.
+    
+    Guarda histogramas y contadores identificados por nombre y etiquetas.
+    """
+    
+    DESCRIPCIONES = {
+        "portafolio_peticiones_total": ("counter", "Peticiones atendidas por endpoint y código"),
+        "portafolio_peticion_segundos": ("histogram", "Latencia total de las peticiones por endpoint"),
+        "portafolio_etapa_segundos": ("histogram", "Latencia de cada etapa de las peticiones"),
+        "portafolio_objetos": ("histogram", "Objetos de los problemas resueltos (n)"),
+        "portafolio_capacidad_escalada": ("histogram", "Capacidad escalada de los problemas resueltos (C)"),
+        "portafolio_memoria_tabla_bytes": ("histogram", "Memoria de la tabla dinámica de cada problema"),
+        "portafolio_solver_total": ("counter", "Problemas resueltos por motor"),
+        "portafolio_resoluciones_compartidas_total": ("counter", "Resoluciones evitadas al esperar una petición idéntica en curso"),
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+    
+    def observar(self, nombre, valor, buckets=BUCKETS_LATENCIA, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            if clave not in self._histogramas:
+                self._histogramas[clave] = Histograma(buckets)
+            self._histogramas[clave].observar(valor)
+    
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+    
+    def registrar_peticion(self, endpoint, codigo, medicion):
+        """
+        Registra la latencia, las etapas y los datos del problema de una petición.
+        
+        Args:
+            endpoint (str): Nombre del endpoint de Flask
+            codigo (int): Código de estado de la respuesta
+            medicion (MedicionEtapas): Medición de la petición
+        """
+        self.incrementar("portafolio_peticiones_total", endpoint=endpoint, codigo=str(codigo))
+        self.observar("portafolio_peticion_segundos", time.perf_counter() - medicion.inicio, endpoint=endpoint)
+        for etapa, duracion in medicion.etapas.items():
+            self.observar("portafolio_etapa_segundos", duracion, endpoint=endpoint, etapa=etapa)
+        
+        anotaciones = medicion.anotaciones
+        for clave in ('objetos', 'capacidad_escalada', 'memoria_tabla_bytes'):
+            if clave in anotaciones:
+                self.observar(f"portafolio_{clave}", anotaciones[clave], BUCKETS_TAMANO)
+        if 'solver' in anotaciones:
+            self.incrementar("portafolio_solver_total", solver=anotaciones['solver'])
+    
+    def exportar(self):
+        """
+        Devuelve todas las métricas en el formato de texto de Prometheus.
+        
+        Returns:
+            str: Exposición de métricas, incluidas la caché y la memoria del proceso
+        """
+        lineas = []
+        with self._lock:
+            for nombre, (tipo, ayuda) in self.DESCRIPCIONES.items():
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                for (clave, etiquetas), valor in sorted(self._contadores.items()):
+                    if clave == nombre:
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+                for (clave, etiquetas), histograma in sorted(self._histogramas.items()):
+                    if clave != nombre:
+                        continue
+                    acumulado = 0
+                    for limite, conteo in zip(histograma.buckets, histograma.conteos):
+                        acumulado += conteo
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', str(limite)),))} {acumulado}")
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', '+Inf'),))} {histograma.total}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {histograma.suma}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {histograma.total}")
+        
+        cache = cache_resultados.estadisticas()
+        for campo in ('hits', 'misses', 'evictions'):
+            lineas.append(f"# TYPE portafolio_cache_{campo}_total counter")
+            lineas.append(f"portafolio_cache_{campo}_total {cache[campo]}")
+        lineas.append("# TYPE portafolio_cache_entradas gauge")
+        lineas.append(f"portafolio_cache_entradas {cache['entradas']}")
+        
+        if almacen_resultados is not None:
+            almacen = almacen_resultados.estadisticas()
+            for campo in ('hits', 'misses', 'evictions'):
+                lineas.append(f"# TYPE portafolio_almacen_{campo}_total counter")
+                lineas.append(f"portafolio_almacen_{campo}_total {almacen[campo]}")
+            for campo in ('entradas', 'bytes'):
+                lineas.append(f"# TYPE portafolio_almacen_{campo} gauge")
+                lineas.append(f"portafolio_almacen_{campo} {almacen[campo]}")
+        
+        if resource is not None:
+            # ru_maxrss está en KB en Linux
+            lineas.append("# HELP portafolio_memoria_pico_proceso_bytes Memoria residente máxima del proceso")
+            lineas.append("# TYPE portafolio_memoria_pico_proceso_bytes gauge")
+            lineas.append(f"portafolio_memoria_pico_proceso_bytes {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}")
+        
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{clave}="{valor}"' for clave, valor in etiquetas) + "}"
+
+metricas_servicio = MetricasServicio()
+
+# Funciones y líneas de asignación incluidas en un informe de perfilado
+PERFILADO_MAX_FUNCIONES = 25
+PERFILADO_MAX_LINEAS = 10
+
+def _nombre_funcion(clave):
+    """Nombre legible de una función de cProfile: archivo:línea(función)."""
+    archivo, linea, funcion = clave
+    if archivo == '~':
+        return funcion
+    return f"{os.path.basename(archivo)}:{linea}({funcion})"
+
+class Perfilador:
+    """
+    Perfilado opcional de las resoluciones con cProfile y tracemalloc.
+    
+    tracemalloc es global al proceso, así que se perfila una resolución cada
+    vez: las peticiones de administración esperan su turno y las muestras se
+    resuelven sin perfilar si ya hay otro perfilado en curso. Mientras dura
+    un perfilado el resto de hilos del proceso también paga el coste de
+    tracemalloc; con RESOLUCION_EN_PROCESOS el perfilado se hace en el
+    proceso del pool que resuelve (ver resolver_perfilado) y no afecta al
+    servidor web.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_contador = threading.Lock()
+        self._resoluciones = 0
+    
+    def muestrear(self):
+        """Indica si la resolución actual es una de cada PERFILADO_MUESTREO."""
+        cada = app.config['PERFILADO_MUESTREO']
+        if cada <= 0:
+            return False
+        with self._lock_contador:
+            self._resoluciones += 1
+            return self._resoluciones % cada == 0
+    
+    def perfilar(self, funcion, *args, esperar=True):
+        """
+        Ejecuta funcion(*args) bajo cProfile y tracemalloc.
+        
+        Args:
+            funcion (callable): Función a perfilar, en el hilo actual
+            *args: Argumentos de la función
+            esperar (bool): Si es False y hay otro perfilado en curso, la
+                función se ejecuta sin perfilar
+        
+        Returns:
+            tuple: (resultado, informe, perfil); informe y perfil son None si
+            no se perfiló
+        """
+        if not self._lock.acquire(blocking=esperar):
+            return funcion(*args), None, None
+        
+        try:
+            ya_activo = tracemalloc.is_tracing()
+            if ya_activo:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            antes = tracemalloc.take_snapshot()
+            perfil = cProfile.Profile()
+            inicio = time.perf_counter()
+            try:
+                resultado = perfil.runcall(funcion, *args)
+            finally:
+                duracion = time.perf_counter() - inicio
+                _, pico = tracemalloc.get_traced_memory()
+                despues = tracemalloc.take_snapshot()
+                if not ya_activo:
+                    tracemalloc.stop()
+        finally:
+            self._lock.release()
+        
+        return resultado, self._informe(perfil, duracion, pico, antes, despues), perfil
+    
+    def _informe(self, perfil, duracion, pico, antes, despues):
+        """Resume el perfil: funciones más costosas, memoria y tamaño de la tabla dinámica."""
+        estadisticas = pstats.Stats(perfil).stats
+        principales = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)
+        
+        filtro = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        diferencias = despues.filter_traces(filtro).compare_to(antes.filter_traces(filtro), 'lineno')
+        diferencias.sort(key=lambda estadistica: estadistica.size_diff, reverse=True)
+        
+        medicion = getattr(_medicion_actual, 'medicion', None)
+        anotaciones = medicion.anotaciones if medicion is not None else {}
+        
+        return {
+            "duracion_ms": round(duracion * 1000, 3),
+            "funciones": [
+                {
+                    "funcion": _nombre_funcion(clave),
+                    "llamadas": llamadas,
+                    "tiempo_propio_ms": round(propio * 1000, 3),
+                    "tiempo_acumulado_ms": round(acumulado * 1000, 3)
+                }
+                for clave, (_, llamadas, propio, acumulado, _) in principales[:PERFILADO_MAX_FUNCIONES]
+            ],
+            "memoria": {
+                "pico_bytes": pico,
+                # Bloques que siguen asignados al terminar, por línea de origen
+                "bloques_retenidos": sum(max(e.count_diff, 0) for e in diferencias),
+                "lineas": [
+                    {
+                        "linea": f"{os.path.basename(e.traceback[0].filename)}:{e.traceback[0].lineno}",
+                        "bloques": e.count_diff,
+                        "bytes": e.size_diff
+                    }
+                    for e in diferencias[:PERFILADO_MAX_LINEAS]
+                ]
+            },
+            "tabla": {clave: anotaciones[clave]
+                      for clave in ('objetos', 'capacidad_escalada', 'memoria_tabla_bytes')
+                      if clave in anotaciones}
+        }
+    
+    def guardar(self, informe, estadisticas, clave):
+        """
+        Escribe el informe en JSON y el perfil en formato pstats en PERFILADO_DIRECTORIO.
+        
+        Conserva como mucho PERFILADO_MAX_INFORMES informes, borrando los más antiguos.
+        
+        Args:
+            informe (dict): Informe devuelto por perfilar
+            estadisticas (dict): Estadísticas de pstats devueltas por resolver_perfilado
+            clave (str): Clave canónica del problema perfilado
+        
+        Returns:
+            str: Ruta del informe JSON
+        """
+        directorio = app.config['PERFILADO_DIRECTORIO']
+        os.makedirs(directorio, exist_ok=True)
+        base = os.path.join(directorio, f"perfil-{time.strftime('%Y%m%d-%H%M%S')}-{clave[:12]}")
+        
+        with open(f"{base}.json", 'w', encoding='utf-8') as archivo:
+            json.dump(dict(informe, clave=clave), archivo, indent=2)
+        # Mismo formato que pstats.Stats.dump_stats
+        with open(f"{base}.prof", 'wb') as archivo:
+            marshal.dump(estadisticas, archivo)
+        
+        informes = sorted((nombre for nombre in os.listdir(directorio)
+                           if nombre.startswith('perfil-') and nombre.endswith('.json')),
+                          key=lambda nombre: os.path.getmtime(os.path.join(directorio, nombre)))
+        for nombre in informes[:max(len(informes) - app.config['PERFILADO_MAX_INFORMES'], 0)]:
+            for extension in ('.json', '.prof'):
+                ruta = os.path.join(directorio, nombre[:-len('.json')] + extension)
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+        
+        logger.info(f"Informe de perfilado guardado en {base}.json")
+        return f"{base}.json"
+
+perfilador = Perfilador()
+
+def resolver_perfilado(data, esperar=True):
+    """
+    Resuelve un problema bajo el perfilador del proceso que lo ejecuta.
+    
+    Se lanza con ejecutar_resolucion, de modo que con RESOLUCION_EN_PROCESOS
+    cProfile y tracemalloc miden la resolución en el proceso del pool y no
+    el resto de hilos del servidor web.
+    
+    Args:
+        data (dict): Problema validado
+        esperar (bool): Si es False y hay otro perfilado en curso en el
+            proceso, se resuelve sin perfilar
+    
+    Returns:
+        tuple: (resultado, informe, estadisticas); estadisticas es el
+        diccionario de pstats, que a diferencia de cProfile.Profile puede
+        volver desde el pool. informe y estadisticas son None si no se perfiló
+    """
+    medicion = getattr(_medicion_actual, 'medicion', None)
+    if medicion is None:
+        # En el pool no hay petición en curso: las anotaciones de la tabla
+        # dinámica que recoge el informe se guardan en una medición propia
+        _medicion_actual.medicion = MedicionEtapas()
+    try:
+        resultado, informe, perfil = perfilador.perfilar(resolver_problema, data, esperar=esperar)
+    finally:
+        if medicion is None:
+            _medicion_actual.medicion = None
+    
+    if perfil is None:
+        return resultado, None, None
+    return resultado, informe, pstats.Stats(perfil).stats
+
+def perfilado_solicitado():
+    """
+    Comprueba si la petición pide perfilado (?perfilar=1) y está autorizada.
+    
+    El token de administración se envía en la cabecera X-Token-Perfilado y
+    debe coincidir con PERFILADO_TOKEN.
+    
+    Returns:
+        tuple: (perfilar, mensaje_error); mensaje_error no está vacío si se
+        pidió el perfilado sin autorización
+    """
+    if request.args.get('perfilar') not in ('1', 'true'):
+        return False, ""
+    
+    token = app.config['PERFILADO_TOKEN']
+    if not token:
+        return False, "El perfilado no está habilitado"
+    if not hmac.compare_digest(request.headers.get('X-Token-Perfilado', ''), token):
+        return False, "Token de perfilado no válido"
+    return True, ""
+
+def calcular_frontera(data):
+    """
+    Calcula la ganancia óptima para todos los presupuestos con una sola tabla.
+    
+    La última fila de la programación dinámica contiene la mejor ganancia para
+    cada capacidad entre 0 y la capacidad pedida. Como es una función escalonada
+    no decreciente, sólo se devuelven los presupuestos en los que la ganancia
+    aumenta; entre dos de ellos la ganancia es la del anterior.
+    
+    Args:
+        data (dict): Datos del request ya validados, con 'puntos' opcional
+    
+    Returns:
+        dict: Frontera comprimida (presupuestos y ganancias) y las selecciones
+        en los presupuestos pedidos
+    
+    Raises:
+        SolicitudRechazada: Si la tabla excede los límites de admisión
+    """
+    data = _columnar(data)
+    nombres = data['nombres']
+    _verificar_numero_objetos(len(nombres))
+    pesos, ganancias, origen = expandir_cantidades(data['pesos'], data['ganancias'], data.get('cantidades'))
+    capacidad_escalada, pesos_escalados, unidad = escalar_problema(
+        data['capacidad'], pesos, data.get('resolucion'))
+    
+    # La tabla de la frontera se calcula siempre en serie
+    estimacion = estimar_costos(capacidad_escalada, pesos_escalados, 0, 0, paralelo=False)['dinamica']
+    if (estimacion['memoria_bytes'] > app.config['ADMISION_MAX_MEMORIA_BYTES']
+            or estimacion['tiempo_ms'] > app.config['ADMISION_MAX_TIEMPO_MS']):
+        raise SolicitudRechazada(f"El problema excede los límites del servicio: "
+                                 f"{_describir_costo('dinamica', estimacion)}")
+    
+    celdas = len(pesos) * (capacidad_escalada + 1)
+    bajo_consumo = celdas > app.config['UMBRAL_CELDAS_BAJO_CONSUMO']
+    fila, decisiones = _tabla_dinamica(capacidad_escalada, pesos_escalados, ganancias, bajo_consumo)
+    
+    # Posiciones en las que la ganancia cambia respecto a la capacidad anterior
+    quiebres = np.concatenate(([0], np.flatnonzero(np.diff(fila)) + 1))
+    
+    selecciones = []
+    for presupuesto in data.get('puntos', []):
+        w = int(presupuesto // unidad)
+        indices = _reconstruir(decisiones, pesos_escalados, w)
+        ganancia_total = fila[w]
+        selecciones.append({
+            "presupuesto": presupuesto,
+            **_seleccion_por_objeto(nombres, origen, indices),
+            "ganancia_total": ganancia_total.item() if isinstance(ganancia_total, np.generic) else ganancia_total,
+            "peso_total": sum(pesos[i] for i in indices)
+        })
+    
+    logger.info(f"Frontera calculada: {len(quiebres)} quiebres de {capacidad_escalada + 1} capacidades")
+    
+    return {
+        "presupuestos": (quiebres * unidad).tolist(),
+        "ganancias": fila[quiebres].tolist(),
+        "capacidad": data['capacidad'],
+        "selecciones": selecciones
+    }
+
+_pool_procesos = None
+_lock_pool = threading.Lock()
+
+def _obtener_pool():
+    """
+    Devuelve el pool de procesos compartido, creándolo en el primer uso.
+    
+    Returns:
+        ProcessPoolExecutor: Pool con LOTE_PROCESOS procesos (o uno por CPU)
+    """
+    global _pool_procesos
+    with _lock_pool:
+        if _pool_procesos is None:
+            procesos = app.config['LOTE_PROCESOS'] or os.cpu_count() or 1
+            # Los procesos heredan el contador de auxiliares de las tablas paralelas
+            _pool_procesos = ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                                 initargs=(_contador_auxiliares(),))
+            logger.info(f"Pool de procesos iniciado con {procesos} procesos")
+        return _pool_procesos
+
+def _iniciar_proceso(contador):
+    """Inicializa un proceso del pool con el contador compartido de auxiliares."""
+    global _procesos_auxiliares
+    _procesos_auxiliares = contador
+
+def _calentar_proceso():
+    """Resuelve un problema mínimo para dejar el proceso listo (NumPy cargado)."""
+    resolver_problema({"capacidad": 1, "nombres": ["A"], "pesos": [1], "ganancias": [1]})
+    return os.getpid()
+
+def iniciar_pool():
+    """
+    Arranca y calienta todos los procesos del pool.
+    
+    Debe llamarse antes de servir peticiones: así los procesos se crean
+    mientras el servidor todavía no tiene hilos y la primera resolución no
+    paga el arranque.
+    
+    Returns:
+        int: Número de procesos calientes
+    """
+    pool = _obtener_pool()
+    procesos = pool._max_workers
+    pids = {futuro.result() for futuro in [pool.submit(_calentar_proceso) for _ in range(procesos)]}
+    logger.info(f"{len(pids)} procesos calientes de {procesos}")
+    return procesos
+
+def detener_pool(timeout=None):
+    """
+    Espera a las resoluciones en curso y detiene el pool de procesos.
+    
+    Args:
+        timeout (float, optional): Segundos máximos de espera; las tareas que
+            aún no empezaron se cancelan y los procesos que siguen vivos al
+            vencer el plazo se terminan
+    """
+    global _pool_procesos
+    with _lock_pool:
+        pool, _pool_procesos = _pool_procesos, None
+    if pool is None:
+        return
+    
+    if timeout is None:
+        pool.shutdown(wait=True)
+    else:
+        procesos = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        limite = time.monotonic() + timeout
+        for proceso in procesos:
+            proceso.join(max(limite - time.monotonic(), 0))
+        vivos = [proceso for proceso in procesos if proceso.is_alive()]
+        for proceso in vivos:
+            proceso.terminate()
+        for proceso in vivos:
+            proceso.join(1)
+        if vivos:
+            logger.warning(f"{len(vivos)} procesos del pool terminados al vencer el plazo de drenaje")
+    logger.info("Pool de procesos detenido")
+
+def ejecutar_resolucion(funcion, *args):
+    """
+    Ejecuta un cálculo pesado, en el pool de procesos si RESOLUCION_EN_PROCESOS
+    está activado.
+    
+    El hilo de la petición sólo espera el resultado, sin retener el GIL, de
+    modo que /health y los demás endpoints siguen respondiendo mientras dura
+    la resolución.
+    
+    Args:
+        funcion (callable): Función de nivel de módulo (debe poder serializarse)
+        *args: Argumentos de la función
+    
+    Returns:
+        El resultado de funcion(*args)
+    """
+    if not app.config['RESOLUCION_EN_PROCESOS']:
+        return funcion(*args)
+    
+    pool, futuro = _enviar_al_pool(funcion, *args)
+    try:
+        return futuro.result()
+    except BrokenProcessPool:
+        _descartar_pool(pool)
+        raise
+
+def _descartar_pool(pool):
+    """
+    Descarta un pool roto para que el próximo uso cree uno nuevo.
+    
+    Un pool se rompe cuando muere uno de sus procesos (por ejemplo, por falta
+    de memoria) y a partir de entonces rechaza todas las tareas.
+    """
+    global _pool_procesos
+    with _lock_pool:
+        if _pool_procesos is not pool:
+            return
+        _pool_procesos = None
+    logger.error("El pool de procesos se rompió y se recreará")
+
+def _enviar_al_pool(funcion, *args):
+    """
+    Envía una tarea al pool compartido, recreándolo si ya estaba roto.
+    
+    Returns:
+        tuple: (pool, futuro)
+    """
+    pool = _obtener_pool()
+    try:
+        return pool, pool.submit(funcion, *args)
+    except BrokenProcessPool:
+        _descartar_pool(pool)
+        pool = _obtener_pool()
+        return pool, pool.submit(funcion, *args)
+
+def resolver_lote(problemas):
+    """
+    Valida y resuelve una lista de problemas repartiéndolos en el pool de procesos.
+    
+    Args:
+        problemas (list): Lista de problemas con capacidad y objetos
+    
+    Returns:
+        list: Un resultado por problema, en el mismo orden; los problemas
+        inválidos o fallidos se reportan con un campo 'error'
+    """
+    resultados = [None] * len(problemas)
+    pendientes = []
+    for i, data in enumerate(problemas):
+        if not isinstance(data, dict):
+            resultados[i] = {"error": f"El problema {i} debe ser un diccionario"}
+            continue
+        
+        problemas[i], mensaje_error = ingerir_entrada(data)
+        if problemas[i] is None:
+            resultados[i] = {"error": mensaje_error}
+        else:
+            pendientes.append(i)
+    
+    # Un único problema no compensa el coste de enviarlo a otro proceso
+    futuros = {}
+    if len(pendientes) > 1:
+        for i in pendientes:
+            try:
+                futuros[i] = _enviar_al_pool(resolver_problema, problemas[i])
+            except Exception as e:
+                logger.error(f"No se pudo enviar el problema {i} del lote al pool: {str(e)}")
+                resultados[i] = {
+                    "error": "Error interno del servidor",
+                    "details": str(e)
+                }
+    
+    for i in pendientes:
+        if resultados[i] is not None:
+            continue
+        try:
+            if i in futuros:
+                pool, futuro = futuros[i]
+                try:
+                    resultados[i] = futuro.result()
+                except BrokenProcessPool:
+                    # Los problemas de un pool roto fallan uno a uno; el
+                    # siguiente lote usará un pool nuevo
+                    _descartar_pool(pool)
+                    raise
+            else:
+                resultados[i] = resolver_problema(problemas[i])
+        except SolicitudRechazada as e:
+            resultados[i] = {"error": str(e), "codigo": e.codigo}
+        except Exception as e:
+            logger.error(f"Error en el problema {i} del lote: {str(e)}")
+            resultados[i] = {
+                "error": "Error interno del servidor",
+                "details": str(e)
+            }
+    
+    return resultados
+
+class SesionOptimizacion:
+    """
+    Estado de programación dinámica de un portafolio que se edita por partes.
+    
+    Se guardan todas las filas de la tabla: filas[k] es la mejor ganancia por
+    capacidad usando los k primeros objetos. Agregar un objeto sólo calcula su
+    fila; eliminar o modificar el objeto k invalida las filas posteriores. Los
+    objetos modificados se mueven al final de la lista, de modo que volver a
+    editar el mismo proyecto sólo recalcula una fila.
+    """
+    
+    def __init__(self, capacidad, objetos):
+        self.id = uuid.uuid4().hex
+        self.capacidad = capacidad
+        self.objetos = [dict(obj) for obj in objetos]
+        self.ultimo_acceso = time.monotonic()
+        self.lock = threading.Lock()
+        self.unidad, self.capacidad_escalada = self._escala(self.objetos)
+        tipo = _tipo_ganancias([obj['ganancia'] for obj in self.objetos])
+        self.filas = self._recalcular(self.objetos, self.unidad,
+                                      [np.zeros(self.capacidad_escalada + 1, dtype=tipo)], 0)
+        self.filas_recalculadas = len(self.objetos)
+    
+    @property
+    def celdas(self):
+        """Número de celdas retenidas por la sesión."""
+        return len(self.filas) * len(self.filas[0])
+    
+    def _escala(self, objetos):
+        """Calcula la unidad común de los pesos y la capacidad escalada."""
+        pesos = [_peso_entero(obj['peso']) for obj in objetos]
+        unidad = math.gcd(*pesos) if pesos else 1
+        return unidad, int(self.capacidad // unidad)
+    
+    def _recalcular(self, objetos, unidad, filas, desde):
+        """
+        Calcula las filas de objetos reutilizando las desde + 1 primeras de filas.
+        
+        Returns:
+            list: Filas nuevas; la lista recibida no se modifica
+        """
+        filas = filas[:desde + 1]
+        capacidad_escalada = len(filas[0]) - 1
+        for obj in objetos[desde:]:
+            anterior = filas[-1]
+            fila = anterior.copy()
+            peso = _peso_entero(obj['peso']) // unidad
+            if peso <= capacidad_escalada:
+                np.maximum(fila[peso:], anterior[:len(anterior) - peso] + obj['ganancia'], out=fila[peso:])
+            filas.append(fila)
+        return filas
+    
+    def aplicar_cambios(self, agregar=(), eliminar=(), modificar=(), max_celdas=None):
+        """
+        Aplica altas, bajas y modificaciones y recalcula sólo las filas afectadas.
+        
+        La tabla nueva se calcula aparte y sustituye a la anterior sólo al
+        final, así que un cambio rechazado o un error al calcularla (por
+        ejemplo, falta de memoria) deja la sesión como estaba.
+        
+        Args:
+            agregar (list): Objetos nuevos
+            eliminar (list): Nombres de los objetos a eliminar
+            modificar (list): Objetos con nombre y los campos peso/ganancia a cambiar
+            max_celdas (int): Celdas máximas de la tabla resultante (None = sin límite)
+        
+        Raises:
+            KeyError: Si un objeto a eliminar o modificar no existe
+            SolicitudRechazada: Si la tabla resultante supera max_celdas (413)
+        """
+        restantes = {obj['nombre'] for obj in self.objetos}
+        for nombre in list(eliminar) + [cambio['nombre'] for cambio in modificar]:
+            if nombre not in restantes:
+                raise KeyError(nombre)
+        restantes.difference_update(eliminar)
+        for cambio in modificar:
+            if cambio['nombre'] not in restantes:
+                raise KeyError(cambio['nombre'])
+        
+        objetos = list(self.objetos)
+        desde = len(objetos)
+        
+        def posicion(nombre):
+            return next(i for i, obj in enumerate(objetos) if obj['nombre'] == nombre)
+        
+        for nombre in eliminar:
+            i = posicion(nombre)
+            del objetos[i]
+            desde = min(desde, i)
+        
+        for cambio in modificar:
+            i = posicion(cambio['nombre'])
+            obj = dict(objetos.pop(i))
+            obj.update({campo: cambio[campo] for campo in ('peso', 'ganancia') if campo in cambio})
+            objetos.append(obj)
+            desde = min(desde, i)
+        
+        objetos.extend(dict(obj) for obj in agregar)
+        
+        # Un peso que no es múltiplo de la unidad obliga a reducirla, y con
+        # ella crece la capacidad escalada: el límite se comprueba antes de
+        # reservar la tabla
+        unidad, capacidad_escalada = self.unidad, self.capacidad_escalada
+        if any(_peso_entero(obj['peso']) % unidad for obj in objetos):
+            unidad, capacidad_escalada = self._escala(objetos)
+        if max_celdas is not None and (len(objetos) + 1) * (capacidad_escalada + 1) > max_celdas:
+            raise SolicitudRechazada("El problema excede el tamaño máximo de una sesión", 413)
+        
+        # Con otra unidad o una ganancia decimal en una tabla entera se
+        # reconstruye la tabla completa
+        tipo = _tipo_ganancias([obj['ganancia'] for obj in objetos])
+        if unidad != self.unidad or tipo != self.filas[0].dtype:
+            desde = 0
+            filas = self._recalcular(objetos, unidad, [np.zeros(capacidad_escalada + 1, dtype=tipo)], 0)
+        else:
+            filas = self._recalcular(objetos, unidad, self.filas, desde)
+        
+        self.objetos, self.unidad, self.capacidad_escalada, self.filas = objetos, unidad, capacidad_escalada, filas
+        self.filas_recalculadas = len(objetos) - desde
+    
+    def resultado(self):
+        """
+        Reconstruye la selección óptima a partir de las filas guardadas.
+        
+        Returns:
+            dict: Resultado con el mismo formato que /optimizar
+        """
+        indices = []
+        w = self.capacidad_escalada
+        for i in range(len(self.objetos) - 1, -1, -1):
+            if self.filas[i + 1][w] != self.filas[i][w]:
+                indices.append(i)
+                w -= _peso_entero(self.objetos[i]['peso']) // self.unidad
+        indices.reverse()
+        
+        ganancia_total = self.filas[-1][self.capacidad_escalada]
+        return {
+            "seleccionados": [self.objetos[i]['nombre'] for i in indices],
+            "ganancia_total": ganancia_total.item() if isinstance(ganancia_total, np.generic) else ganancia_total,
+            "peso_total": sum(self.objetos[i]['peso'] for i in indices),
+            "solver": "dinamica",
+            "optimo_probado": True
+        }
+
+class GestorSesiones:
+    """
+    Almacén de sesiones con límite de memoria y caducidad por inactividad.
+    
+    Cuando la suma de celdas supera el máximo se descartan las sesiones
+    usadas hace más tiempo.
+    """
+    
+    def __init__(self, max_celdas, ttl):
+        self.max_celdas = max_celdas
+        self.ttl = ttl
+        self._sesiones = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def agregar(self, sesion):
+        """Registra una sesión y libera espacio si es necesario."""
+        with self._lock:
+            self._sesiones[sesion.id] = sesion
+            self._purgar()
+    
+    def obtener(self, sesion_id):
+        """Devuelve una sesión y actualiza su último acceso, o None si no existe."""
+        with self._lock:
+            self._purgar()
+            sesion = self._sesiones.get(sesion_id)
+            if sesion is not None:
+                sesion.ultimo_acceso = time.monotonic()
+                self._sesiones.move_to_end(sesion_id)
+            return sesion
+    
+    def eliminar(self, sesion_id):
+        """Elimina una sesión. Devuelve False si no existía."""
+        with self._lock:
+            return self._sesiones.pop(sesion_id, None) is not None
+    
+    def ajustar(self):
+        """Vuelve a aplicar el límite de memoria tras modificar una sesión."""
+        with self._lock:
+            self._purgar()
+    
+    def _purgar(self):
+        limite = time.monotonic() - self.ttl
+        for sesion_id in [s.id for s in self._sesiones.values() if s.ultimo_acceso < limite]:
+            logger.info(f"Sesión {sesion_id} descartada por inactividad")
+            del self._sesiones[sesion_id]
+        
+        total = sum(sesion.celdas for sesion in self._sesiones.values())
+        while total > self.max_celdas and len(self._sesiones) > 1:
+            sesion_id, sesion = self._sesiones.popitem(last=False)
+            total -= sesion.celdas
+            logger.info(f"Sesión {sesion_id} descartada por límite de memoria")
+
+gestor_sesiones = GestorSesiones(app.config['SESIONES_MAX_CELDAS'], app.config['SESIONES_TTL_SEGUNDOS'])
+
+def validar_cambios(data):
+    """
+    Valida los cambios de un PATCH sobre los objetos de una sesión.
+    
+    Args:
+        data (dict): Datos del request JSON con agregar, eliminar y/o modificar
+    
+    Returns:
+        tuple: (es_valido, mensaje_error)
+    """
+    if not any(campo in data for campo in ('agregar', 'eliminar', 'modificar')):
+        return False, "Se requiere al menos uno de los campos 'agregar', 'eliminar' o 'modificar'"
+    
+    for campo in ('agregar', 'eliminar', 'modificar'):
+        if campo in data and not isinstance(data[campo], list):
+            return False, f"El campo '{campo}' debe ser una lista"
+    
+    for i, obj in enumerate(data.get('agregar', [])):
+        mensaje_error = _validar_objeto(i, obj)
+        if mensaje_error:
+            return False, mensaje_error
+        if not _es_entero(obj['peso']):
+            return False, f"El peso del objeto {i} debe ser entero"
+        if 'cantidad' in obj:
+            return False, "Las sesiones no admiten el campo 'cantidad'"
+    
+    for i, cambio in enumerate(data.get('modificar', [])):
+        if not isinstance(cambio, dict) or 'nombre' not in cambio:
+            return False, f"La modificación {i} debe tener un campo 'nombre'"
+        
+        if 'peso' in cambio and (not isinstance(cambio['peso'], (int, float)) or cambio['peso'] <= 0
+                                 or not _es_entero(cambio['peso'])):
+            return False, f"El peso de la modificación {i} debe ser un entero positivo"
+        
+        if 'ganancia' in cambio and (not isinstance(cambio['ganancia'], (int, float)) or cambio['ganancia'] < 0):
+            return False, f"La ganancia de la modificación {i} debe ser un número no negativo"
+    
+    return True, ""
+
+class TrabajoInterrumpido(Exception):
+    """Se lanza dentro de un motor de resolución para detener un trabajo."""
+    
+    def __init__(self, estado):
+        super().__init__(estado)
+        self.estado = estado
+
+class ColaLlena(Exception):
+    """Se lanza cuando la cola no admite más trabajos."""
+
+class Trabajo:
+    """Problema encolado con su estado, progreso y resultado."""
+    
+    FINALIZADOS = ('completado', 'fallido', 'cancelado', 'expirado')
+    
+    def __init__(self, data, deadline_ms):
+        self.id = uuid.uuid4().hex
+        self.data = data
+        self.estado = 'pendiente'
+        self.filas_completadas = 0
+        self.filas_totales = len(data['nombres'])
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.finalizado = None
+        self.limite = time.monotonic() + deadline_ms / 1000
+        self.cancelacion = threading.Event()
+    
+    def progreso(self, filas_completadas, filas_totales):
+        """Registra el avance y detiene el cálculo si se canceló o expiró."""
+        self.filas_completadas = filas_completadas
+        self.filas_totales = filas_totales
+        if self.cancelacion.is_set():
+            raise TrabajoInterrumpido('cancelado')
+        if time.monotonic() > self.limite:
+            raise TrabajoInterrumpido('expirado')
+    
+    def finalizar(self, estado, resultado=None, error=None):
+        self.estado = estado
+        self.resultado = resultado
+        self.error = error
+        self.finalizado = time.time()
+    
+    def a_dict(self):
+        """Representación JSON del trabajo."""
+        datos = {
+            "id": self.id,
+            "estado": self.estado,
+            "progreso": {
+                "filas_completadas": self.filas_completadas,
+                "filas_totales": self.filas_totales
+            },
+            "creado": self.creado,
+            "finalizado": self.finalizado
+        }
+        if self.resultado is not None:
+            datos["resultado"] = self.resultado
+        if self.error is not None:
+            datos["error"] = self.error
+        return datos
+
+class ColaTrabajos(abc.ABC):
+    """
+    Interfaz de las colas de trabajos de optimización.
+    
+    La implementación activa se guarda en app.extensions['cola_trabajos'] y
+    puede sustituirse por otra (por ejemplo, respaldada por un servicio externo)
+    que implemente estos mismos métodos. Una implementación incompleta falla
+    al crearse, no en la primera petición.
+    """
+    
+    @abc.abstractmethod
+    def encolar(self, data, deadline_ms):
+        """Encola un problema validado y devuelve el Trabajo creado."""
+    
+    @abc.abstractmethod
+    def obtener(self, trabajo_id):
+        """Devuelve el Trabajo con ese identificador o None."""
+    
+    @abc.abstractmethod
+    def cancelar(self, trabajo_id):
+        """Solicita la cancelación y devuelve el Trabajo o None si no existe."""
+    
+    @abc.abstractmethod
+    def cerrar(self, timeout):
+        """
+        Deja de aceptar trabajos y espera a los que están en curso.
+        
+        Los trabajos que no terminan en timeout segundos se cancelan.
+        """
+
+def _resolver_trabajo(data, memoria, segundos):
+    """
+    Resuelve un trabajo en un proceso del pool.
+    
+    El progreso y la cancelación viajan por tres enteros en memoria
+    compartida: filas completadas, filas totales y la marca de cancelación.
+    
+    Args:
+        data (dict): Problema validado
+        memoria (SharedMemory): Estado compartido con el hilo del trabajo
+        segundos (float): Tiempo restante hasta el plazo del trabajo
+    
+    Returns:
+        dict: Resultado de resolver_problema
+    
+    Raises:
+        TrabajoInterrumpido: Si se marcó la cancelación o venció el plazo
+    """
+    estado = np.ndarray(3, dtype=np.int64, buffer=memoria.buf)
+    limite = time.monotonic() + segundos
+    
+    def progreso(filas_completadas, filas_totales):
+        estado[0], estado[1] = filas_completadas, filas_totales
+        if estado[2]:
+            raise TrabajoInterrumpido('cancelado')
+        if time.monotonic() > limite:
+            raise TrabajoInterrumpido('expirado')
+    
+    try:
+        return resolver_problema(data, progreso, tiempo_maximo_ms=math.inf)
+    finally:
+        # La vista debe liberarse antes de cerrar la memoria compartida
+        estado = None
+        memoria.close()
+
+class ColaTrabajosLocal(ColaTrabajos):
+    """
+    Cola en memoria que resuelve los trabajos en un pool de hilos acotado.
+    
+    Los trabajos en curso informan de las filas completadas y se interrumpen
+    entre filas si se cancelan o vence su plazo. Los finalizados se conservan
+    durante un tiempo de retención para poder consultarlos.
+    
+    Con RESOLUCION_EN_PROCESOS cada hilo sólo espera: el trabajo se resuelve
+    en el pool de procesos (ver _resolver_trabajo) y el hilo copia el progreso
+    y transmite la cancelación cada INTERVALO_PROGRESO_SEGUNDOS.
+    """
+    
+    def __init__(self, hilos, max_pendientes, retencion):
+        self.max_pendientes = max_pendientes
+        self.retencion = retencion
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='trabajo')
+        self._trabajos = {}
+        self._futuros = {}
+        self._lock = threading.Lock()
+        self._cerrada = False
+    
+    def encolar(self, data, deadline_ms):
+        with self._lock:
+            if self._cerrada:
+                raise ColaLlena("El servicio se está deteniendo")
+            
+            self._purgar()
+            activos = sum(1 for t in self._trabajos.values() if t.estado not in Trabajo.FINALIZADOS)
+            if activos >= self.max_pendientes:
+                raise ColaLlena(f"La cola ya tiene {activos} trabajos pendientes")
+            
+            trabajo = Trabajo(data, deadline_ms)
+            self._trabajos[trabajo.id] = trabajo
+            self._futuros[trabajo.id] = self._pool.submit(self._ejecutar, trabajo)
+        return trabajo
+    
+    def obtener(self, trabajo_id):
+        with self._lock:
+            self._purgar()
+            return self._trabajos.get(trabajo_id)
+    
+    def cancelar(self, trabajo_id):
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            if trabajo is None or trabajo.estado in Trabajo.FINALIZADOS:
+                return trabajo
+            
+            trabajo.cancelacion.set()
+            if self._futuros[trabajo_id].cancel():
+                del self._futuros[trabajo_id]
+                trabajo.finalizar('cancelado')
+        return trabajo
+    
+    def cerrar(self, timeout):
+        with self._lock:
+            self._cerrada = True
+            futuros = list(self._futuros.values())
+        
+        _, pendientes = wait(futuros, timeout=timeout)
+        if pendientes:
+            logger.warning(f"Cancelando {len(pendientes)} trabajos que no terminaron a tiempo")
+            with self._lock:
+                trabajo_ids = list(self._futuros)
+            for trabajo_id in trabajo_ids:
+                self.cancelar(trabajo_id)
+        self._pool.shutdown(wait=True)
+    
+    def _ejecutar(self, trabajo):
+        try:
+            trabajo.progreso(0, trabajo.filas_totales)
+            trabajo.estado = 'en_curso'
+            if app.config['RESOLUCION_EN_PROCESOS']:
+                resultado = self._resolver_en_procesos(trabajo)
+            else:
+                resultado = resolver_problema(trabajo.data, trabajo.progreso, tiempo_maximo_ms=math.inf)
+            trabajo.finalizar('completado', resultado)
+            logger.info(f"Trabajo {trabajo.id} completado")
+        except TrabajoInterrumpido as e:
+            trabajo.finalizar(e.estado)
+            logger.info(f"Trabajo {trabajo.id} {e.estado}")
+        except Exception as e:
+            logger.error(f"Error en el trabajo {trabajo.id}: {str(e)}")
+            trabajo.finalizar('fallido', error=str(e))
+        finally:
+            with self._lock:
+                self._futuros.pop(trabajo.id, None)
+    
+    def _resolver_en_procesos(self, trabajo):
+        memoria = SharedMemory(create=True, size=3 * 8)
+        estado = np.ndarray(3, dtype=np.int64, buffer=memoria.buf)
+        try:
+            pool, futuro = _enviar_al_pool(_resolver_trabajo, trabajo.data, memoria,
+                                           trabajo.limite - time.monotonic())
+            while not wait([futuro], timeout=INTERVALO_PROGRESO_SEGUNDOS)[0]:
+                trabajo.filas_completadas, trabajo.filas_totales = int(estado[0]), int(estado[1])
+                if trabajo.cancelacion.is_set():
+                    estado[2] = 1
+            trabajo.filas_completadas, trabajo.filas_totales = int(estado[0]), int(estado[1])
+            try:
+                return futuro.result()
+            except BrokenProcessPool:
+                _descartar_pool(pool)
+                raise
+        finally:
+            estado = None
+            memoria.close()
+            memoria.unlink()
+    
+    def _purgar(self):
+        limite = time.time() - self.retencion
+        for trabajo_id in [t.id for t in self._trabajos.values()
+                           if t.finalizado is not None and t.finalizado < limite]:
+            del self._trabajos[trabajo_id]
+
+app.extensions['cola_trabajos'] = ColaTrabajosLocal(app.config['TRABAJOS_HILOS'],
+                                                    app.config['TRABAJOS_MAX_PENDIENTES'],
+                                                    app.config['TRABAJOS_RETENCION_SEGUNDOS'])
+
+def leer_cuerpo():
+    """
+    Decodifica el cuerpo del request según su Content-Type.
+    
+    MessagePack con application/msgpack (o application/x-msgpack) y JSON en
+    cualquier otro caso, con orjson si está instalado. Un cuerpo que puede
+    contener enteros de más de 64 bits se decodifica con json, que los
+    conserva exactos.
+    
+    Returns:
+        tuple: (datos, mensaje_error); datos es None si el cuerpo está vacío
+        o no se puede decodificar
+    """
+    cuerpo = request.get_data()
+    if not cuerpo:
+        return None, "Datos JSON requeridos"
+    
+    if request.mimetype in TIPOS_MSGPACK:
+        if msgpack is None:
+            return None, "El servidor no tiene soporte para MessagePack"
+        try:
+            return msgpack.unpackb(cuerpo), ""
+        except ValueError:
+            return None, "El cuerpo MessagePack no es válido"
+    
+    try:
+        if orjson is not None and not DIGITOS_ENTERO_GRANDE.search(cuerpo):
+            return orjson.loads(cuerpo), ""
+        return json.loads(cuerpo), ""
+    except ValueError:
+        return None, "El cuerpo JSON no es válido"
+
+def _bytes_a_base64(valor):
+    """Codifica en base64 los bytes de la respuesta JSON (la máscara de selección)."""
+    if isinstance(valor, bytes):
+        return base64.b64encode(valor).decode('ascii')
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def responder(resultado):
+    """
+    Serializa un resultado en el formato que pide la cabecera Accept.
+    
+    Se responde en MessagePack si el cliente lo prefiere y está disponible;
+    en otro caso en JSON, con orjson si está instalado (salvo enteros de más
+    de 64 bits, que sólo admite el módulo json).
+    
+    Args:
+        resultado (dict): Resultado a enviar
+    
+    Returns:
+        Response: Respuesta con el cuerpo serializado
+    """
+    if msgpack is not None:
+        preferido = request.accept_mimetypes.best_match(('application/json',) + TIPOS_MSGPACK)
+        if preferido in TIPOS_MSGPACK:
+            response = app.response_class(msgpack.packb(resultado), mimetype=TIPOS_MSGPACK[0])
+            response.vary.add('Accept')
+            return response
+    
+    cuerpo = None
+    if orjson is not None:
+        try:
+            cuerpo = orjson.dumps(resultado, default=_bytes_a_base64)
+        except TypeError:
+            pass
+    if cuerpo is None:
+        cuerpo = json.dumps(resultado, default=_bytes_a_base64, separators=(',', ':'))
+    response = app.response_class(cuerpo, mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+def formatear_seleccion(resultado, nombres, formato):
+    """
+    Sustituye los nombres seleccionados por sus índices o por una máscara de bits.
+    
+    Los índices se calculan sobre el orden de los objetos del request actual,
+    así que también son correctos para un resultado de la caché obtenido con
+    los objetos en otro orden. La máscara tiene un bit por objeto (el bit i%8
+    del byte i//8). Con cantidades, la lista 'cantidades' sigue el orden
+    creciente de los índices.
+    
+    Args:
+        resultado (dict): Resultado de resolver_problema
+        nombres (list): Nombres únicos de los objetos del request
+        formato (str): Uno de FORMATOS_SELECCION
+    
+    Returns:
+        dict: Resultado con 'indices' o 'mascara' en lugar de 'seleccionados'
+        (el resultado original no se modifica)
+    """
+    if formato == 'nombres':
+        return resultado
+    
+    posiciones = dict(zip(nombres, range(len(nombres))))
+    seleccion = np.fromiter(map(posiciones.__getitem__, resultado['seleccionados']),
+                            dtype=np.int64, count=len(resultado['seleccionados']))
+    orden = np.argsort(seleccion, kind='stable')
+    indices = seleccion[orden]
+    
+    formateado = {campo: valor for campo, valor in resultado.items() if campo != 'seleccionados'}
+    if 'cantidades' in resultado:
+        formateado['cantidades'] = [resultado['cantidades'][k] for k in orden.tolist()]
+    
+    if formato == 'indices':
+        formateado['indices'] = indices.tolist()
+    else:
+        mascara = np.zeros(len(nombres), dtype=bool)
+        mascara[indices] = True
+        formateado['mascara'] = np.packbits(mascara, bitorder='little').tobytes()
+    return formateado
+
+@app.before_request
+def iniciar_medicion():
+    """Inicia la medición por etapas de la petición."""
+    _medicion_actual.medicion = MedicionEtapas()
+
+@app.after_request
+def registrar_medicion(response):
+    """Añade la cabecera Server-Timing y registra las métricas de la petición."""
+    medicion = getattr(_medicion_actual, 'medicion', None)
+    if medicion is not None:
+        response.headers['Server-Timing'] = medicion.server_timing()
+        response.headers['Timing-Allow-Origin'] = '*'
+        metricas_servicio.registrar_peticion(request.endpoint or 'desconocido', response.status_code, medicion)
+    return response
+
+@app.teardown_request
+def terminar_medicion(error=None):
+    _medicion_actual.medicion = None
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Endpoint para verificar el estado del servicio."""
+    return jsonify({
+        "status": "healthy",
+        "service": "Portfolio Optimization Service",
+        "version": "1.0.0"
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    """Endpoint con las métricas del servicio en formato de texto de Prometheus."""
+    return metricas_servicio.exportar(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/optimizar', methods=['POST'])
+def optimizar():
+    """
+    Endpoint principal para optimizar la selección de proyectos de inversión.
+    
+    Returns:
+        JSON: Resultado de la optimización o error
+    """
+    try:
+        perfilar, mensaje_error = perfilado_solicitado()
+        if mensaje_error:
+            return jsonify({
+                "error": mensaje_error
+            }), 403
+        
+        # Obtener datos del request (JSON o MessagePack)
+        with medir_etapa('parse'):
+            data, mensaje_error = leer_cuerpo()
+        
+        if not data:
+            return jsonify({
+                "error": mensaje_error or "Datos JSON requeridos"
+            }), 400
+        
+        # Validar entrada
+        with medir_etapa('validacion'):
+            data, mensaje_error = ingerir_entrada(data)
+        if data is None:
+            return jsonify({
+                "error": mensaje_error
+            }), 400
+        
+        formato = data.get('formato_seleccion', 'nombres')
+        
+        # Una petición perfilada siempre resuelve, sin caché ni resoluciones
+        # compartidas, y devuelve el informe junto al resultado
+        if perfilar:
+            clave = clave_canonica(data)
+            with medir_etapa('resolucion'):
+                resultado, informe, _ = ejecutar_resolucion(resolver_perfilado, data)
+            guardar_resultado(clave, resultado)
+            anotar_medicion('solver', resultado['solver'])
+            logger.info(f"Optimización perfilada en {informe['duracion_ms']:.1f} ms")
+            
+            with medir_etapa('serializacion'):
+                response = responder(dict(formatear_seleccion(resultado, data['nombres'], formato),
+                                          perfil=informe))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        
+        # Consultar la caché y el almacén persistente antes de resolver
+        with medir_etapa('cache'):
+            clave = clave_canonica(data)
+            resultado, origen = buscar_resultado(clave)
+        if resultado is not None:
+            logger.info("Resultado obtenido de la caché" if origen == 'HIT'
+                        else "Resultado obtenido del almacén persistente")
+            with medir_etapa('serializacion'):
+                response = responder(formatear_seleccion(resultado, data['nombres'], formato))
+            response.headers['X-Cache'] = origen
+            return response
+        
+        # Ejecutar algoritmo de optimización, o esperar a una petición
+        # idéntica que ya lo está ejecutando
+        def resolver_y_guardar():
+            if perfilador.muestrear():
+                # Muestra de producción: se perfila donde se resuelve (en el
+                # pool si está activado) y el informe se guarda en disco
+                resultado, informe, estadisticas = ejecutar_resolucion(resolver_perfilado, data, False)
+                if informe is not None:
+                    perfilador.guardar(informe, estadisticas, clave)
+            else:
+                resultado = ejecutar_resolucion(resolver_problema, data)
+            guardar_resultado(clave, resultado)
+            return resultado
+        
+        with medir_etapa('resolucion'):
+            resultado, compartida = resoluciones_en_curso.ejecutar(clave, resolver_y_guardar)
+        
+        if compartida:
+            metricas_servicio.incrementar("portafolio_resoluciones_compartidas_total")
+            logger.info("Resultado compartido con una petición idéntica en curso")
+        else:
+            anotar_medicion('solver', resultado['solver'])
+            logger.info(f"Optimización completada con '{resultado['solver']}': "
+                        f"{len(resultado['seleccionados'])} proyectos seleccionados")
+        
+        with medir_etapa('serializacion'):
+            response = responder(formatear_seleccion(resultado, data['nombres'], formato))
+        response.headers['X-Cache'] = 'COMPARTIDO' if compartida else 'MISS'
+        return response
+        
+    except SolicitudRechazada as e:
+        logger.warning(f"Optimización rechazada: {str(e)}")
+        return jsonify({
+            "error": str(e)
+        }), e.codigo
+    except Exception as e:
+        logger.error(f"Error en optimización: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/optimizar/lote', methods=['POST'])
+def optimizar_lote():
+    """
+    Endpoint para optimizar varios portafolios en una sola petición.
+    
+    Acepta una lista de problemas o un objeto con el campo 'problemas'.
+    
+    Returns:
+        JSON: Resultados en el orden de entrada o error
+    """
+    try:
+        data = request.get_json()
+        
+        problemas = data.get('problemas') if isinstance(data, dict) else data
+        if not isinstance(problemas, list) or len(problemas) == 0:
+            return jsonify({
+                "error": "Se requiere una lista no vacía de problemas"
+            }), 400
+        
+        if len(problemas) > app.config['LOTE_MAX_PROBLEMAS']:
+            return jsonify({
+                "error": f"El lote no puede tener más de {app.config['LOTE_MAX_PROBLEMAS']} problemas"
+            }), 400
+        
+        logger.info(f"Optimizando lote de {len(problemas)} problemas")
+        
+        return jsonify({
+            "resultados": resolver_lote(problemas)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error en optimización por lote: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/optimizar/frontera', methods=['POST'])
+def optimizar_frontera():
+    """
+    Endpoint para obtener la ganancia óptima en función del presupuesto.
+    
+    Returns:
+        JSON: Frontera comprimida a los puntos de quiebre o error
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "error": "Datos JSON requeridos"
+            }), 400
+        
+        data, mensaje_error = ingerir_entrada(data)
+        if data is None:
+            return jsonify({
+                "error": mensaje_error
+            }), 400
+        
+        if 'resolucion' not in data and not _pesos_enteros(data['pesos']):
+            return jsonify({
+                "error": "La frontera requiere pesos enteros o una resolución"
+            }), 400
+        
+        puntos = data.get('puntos', [])
+        if not isinstance(puntos, list) or len(puntos) > MAX_PUNTOS_FRONTERA:
+            return jsonify({
+                "error": f"Los puntos deben ser una lista de como máximo {MAX_PUNTOS_FRONTERA} presupuestos"
+            }), 400
+        
+        if not all(isinstance(p, (int, float)) and 0 <= p <= data['capacidad'] for p in puntos):
+            return jsonify({
+                "error": "Los puntos de la frontera deben estar entre 0 y la capacidad"
+            }), 400
+        
+        return jsonify(ejecutar_resolucion(calcular_frontera, data))
+        
+    except SolicitudRechazada as e:
+        logger.warning(f"Frontera rechazada: {str(e)}")
+        return jsonify({
+            "error": str(e)
+        }), e.codigo
+    except Exception as e:
+        logger.error(f"Error calculando la frontera: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/sesiones', methods=['POST'])
+def crear_sesion():
+    """
+    Endpoint para crear una sesión de reoptimización incremental.
+    
+    Returns:
+        JSON: Identificador de la sesión y resultado inicial, o error
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "error": "Datos JSON requeridos"
+            }), 400
+        
+        data, mensaje_error = ingerir_entrada(data)
+        if data is None:
+            return jsonify({
+                "error": mensaje_error
+            }), 400
+        
+        if not _pesos_enteros(data['pesos']):
+            return jsonify({
+                "error": "Las sesiones requieren pesos enteros"
+            }), 400
+        
+        if 'cantidades' in data:
+            return jsonify({
+                "error": "Las sesiones no admiten el campo 'cantidad'"
+            }), 400
+        
+        nombres = data['nombres']
+        if len(set(map(str, nombres))) != len(nombres):
+            return jsonify({
+                "error": "Los nombres de los objetos de una sesión deben ser únicos"
+            }), 400
+        
+        capacidad_escalada = int(data['capacidad'] // math.gcd(*[_peso_entero(peso) for peso in data['pesos']]))
+        if (len(nombres) + 1) * (capacidad_escalada + 1) > app.config['SESIONES_MAX_CELDAS']:
+            return jsonify({
+                "error": "El problema excede el tamaño máximo de una sesión"
+            }), 413
+        
+        objetos = [{"nombre": nombre, "peso": peso, "ganancia": ganancia}
+                   for nombre, peso, ganancia in zip(nombres, data['pesos'], data['ganancias'])]
+        sesion = SesionOptimizacion(data['capacidad'], objetos)
+        gestor_sesiones.agregar(sesion)
+        
+        logger.info(f"Sesión {sesion.id} creada con {len(nombres)} objetos y {sesion.celdas} celdas")
+        
+        return jsonify({
+            "id": sesion.id,
+            "resultado": sesion.resultado(),
+            "filas_recalculadas": sesion.filas_recalculadas
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error creando sesión: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/sesiones/<sesion_id>', methods=['GET', 'DELETE'])
+def sesion(sesion_id):
+    """
+    Endpoint para consultar o cerrar una sesión.
+    
+    Returns:
+        JSON: Objetos y resultado actual de la sesión, o error
+    """
+    if request.method == 'DELETE':
+        if not gestor_sesiones.eliminar(sesion_id):
+            return jsonify({
+                "error": "Sesión no encontrada"
+            }), 404
+        return jsonify({"id": sesion_id, "eliminada": True})
+    
+    sesion_actual = gestor_sesiones.obtener(sesion_id)
+    if sesion_actual is None:
+        return jsonify({
+            "error": "Sesión no encontrada"
+        }), 404
+    
+    with sesion_actual.lock:
+        return jsonify({
+            "id": sesion_actual.id,
+            "capacidad": sesion_actual.capacidad,
+            "objetos": sesion_actual.objetos,
+            "resultado": sesion_actual.resultado()
+        })
+
+@app.route('/sesiones/<sesion_id>/objetos', methods=['PATCH'])
+def modificar_sesion(sesion_id):
+    """
+    Endpoint para agregar, eliminar o modificar objetos de una sesión.
+    
+    Returns:
+        JSON: Resultado actualizado y número de filas recalculadas, o error
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "error": "Datos JSON requeridos"
+            }), 400
+        
+        es_valido, mensaje_error = validar_cambios(data)
+        if not es_valido:
+            return jsonify({
+                "error": mensaje_error
+            }), 400
+        
+        sesion_actual = gestor_sesiones.obtener(sesion_id)
+        if sesion_actual is None:
+            return jsonify({
+                "error": "Sesión no encontrada"
+            }), 404
+        
+        with sesion_actual.lock:
+            existentes = {str(obj['nombre']) for obj in sesion_actual.objetos}
+            eliminados = set(map(str, data.get('eliminar', [])))
+            nuevos = [str(obj['nombre']) for obj in data.get('agregar', [])]
+            if len(set(nuevos)) != len(nuevos) or (existentes - eliminados) & set(nuevos):
+                return jsonify({
+                    "error": "Los nombres de los objetos de una sesión deben ser únicos"
+                }), 400
+            
+            try:
+                sesion_actual.aplicar_cambios(data.get('agregar', []),
+                                              data.get('eliminar', []),
+                                              data.get('modificar', []),
+                                              app.config['SESIONES_MAX_CELDAS'])
+            except KeyError as e:
+                return jsonify({
+                    "error": f"El objeto {e.args[0]} no existe en la sesión"
+                }), 400
+            except SolicitudRechazada as e:
+                return jsonify({
+                    "error": str(e)
+                }), e.codigo
+            
+            resultado = sesion_actual.resultado()
+            filas_recalculadas = sesion_actual.filas_recalculadas
+        
+        gestor_sesiones.ajustar()
+        
+        logger.info(f"Sesión {sesion_id} actualizada: {filas_recalculadas} filas recalculadas")
+        
+        return jsonify({
+            "id": sesion_id,
+            "resultado": resultado,
+            "filas_recalculadas": filas_recalculadas
+        })
+        
+    except Exception as e:
+        logger.error(f"Error modificando sesión: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/trabajos', methods=['POST'])
+def crear_trabajo():
+    """
+    Endpoint para encolar una optimización de larga duración.
+    
+    Returns:
+        JSON: Identificador y estado del trabajo, o error
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "error": "Datos JSON requeridos"
+            }), 400
+        
+        data, mensaje_error = ingerir_entrada(data)
+        if data is None:
+            return jsonify({
+                "error": mensaje_error
+            }), 400
+        
+        deadline_ms = data.get('deadline_ms', app.config['TRABAJOS_DEADLINE_MS'])
+        
+        try:
+            trabajo = app.extensions['cola_trabajos'].encolar(data, deadline_ms)
+        except ColaLlena as e:
+            return jsonify({
+                "error": str(e)
+            }), 503
+        
+        logger.info(f"Trabajo {trabajo.id} encolado con {len(data['nombres'])} objetos")
+        
+        response = jsonify(trabajo.a_dict())
+        response.headers['Location'] = f"/trabajos/{trabajo.id}"
+        return response, 202
+        
+    except Exception as e:
+        logger.error(f"Error encolando trabajo: {str(e)}")
+        return jsonify({
+            "error": "Error interno del servidor",
+            "details": str(e)
+        }), 500
+
+@app.route('/trabajos/<trabajo_id>', methods=['GET', 'DELETE'])
+def trabajo(trabajo_id):
+    """
+    Endpoint para consultar o cancelar un trabajo.
+    
+    Returns:
+        JSON: Estado, progreso y resultado del trabajo, o error
+    """
+    cola = app.extensions['cola_trabajos']
+    trabajo_actual = cola.cancelar(trabajo_id) if request.method == 'DELETE' else cola.obtener(trabajo_id)
+    
+    if trabajo_actual is None:
+        return jsonify({
+            "error": "Trabajo no encontrado"
+        }), 404
+    
+    return jsonify(trabajo_actual.a_dict())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Endpoint con las estadísticas de la caché y del almacén persistente."""
+    estadisticas = cache_resultados.estadisticas()
+    estadisticas['almacen'] = almacen_resultados.estadisticas() if almacen_resultados is not None else None
+    return jsonify(estadisticas)
 
 @app.errorhandler(404)
 def not_found(error):
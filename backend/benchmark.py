@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Suite de rendimiento de los motores de optimización de portafolio.
+
+Genera portafolios sintéticos con semilla fija, mide el tiempo y la memoria
+pico de cada motor y compara el resultado con una línea base en JSON. La
+ejecución falla si algún caso es más lento (o usa más memoria) que la línea
+base por encima del umbral configurado.
+
+Uso:
+    python benchmark.py                  # compara con la línea base (la crea si no existe)
+    python benchmark.py --guardar        # sobrescribe la línea base
+    python benchmark.py --umbral 30      # regresión permitida, en porcentaje
+    python benchmark.py --casos correlacionado
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app import (app, knapsack_dynamic_programming, _resolver_vectorizado, _resolver_paralelo, _resolver_pareto,
+                 _resolver_ramificacion, _resolver_fptas, escalar_problema, resolver_problema)
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Regresión permitida respecto a la línea base, en porcentaje
+UMBRAL_POR_DEFECTO = 25
+
+# Por debajo de este tiempo las diferencias son ruido de medición
+MINIMO_SEGUNDOS = 0.005
+
+TIPOS = ('no_correlacionado', 'debilmente_correlacionado', 'fuertemente_correlacionado',
+         'suma_subconjuntos')
+
+def generar_portafolio(tipo, n, rango, semilla, fraccion=0.5):
+    """
+    Genera un portafolio sintético reproducible.
+
+    Sigue las familias clásicas de instancias de la mochila: pesos uniformes
+    en [1, rango] y ganancias independientes del peso (no correlacionado),
+    cercanas al peso (débilmente), iguales al peso más una constante
+    (fuertemente) o iguales al peso (suma de subconjuntos).
+
+    Args:
+        tipo (str): Una de TIPOS
+        n (int): Número de proyectos
+        rango (int): Peso máximo de un proyecto
+        semilla (int): Semilla del generador
+        fraccion (float): Capacidad como fracción de la suma de los pesos
+
+    Returns:
+        dict: Problema con capacidad y objetos, como el cuerpo de /optimizar
+    """
+    rng = random.Random(semilla)
+    objetos = []
+    for i in range(n):
+        peso = rng.randint(1, rango)
+        if tipo == 'no_correlacionado':
+            ganancia = rng.randint(1, rango)
+        elif tipo == 'debilmente_correlacionado':
+            ganancia = max(1, peso + rng.randint(-rango // 10, rango // 10))
+        elif tipo == 'fuertemente_correlacionado':
+            ganancia = peso + rango // 10
+        elif tipo == 'suma_subconjuntos':
+            ganancia = peso
+        else:
+            raise ValueError(f"Tipo de portafolio desconocido: {tipo}")
+        objetos.append({"nombre": f"P{i}", "peso": peso, "ganancia": ganancia})
+
+    capacidad = max(1, int(sum(obj['peso'] for obj in objetos) * fraccion))
+    return {"capacidad": capacidad, "objetos": objetos}
+
+def _motores(problema):
+    """Devuelve los motores a medir para un problema, como funciones sin argumentos."""
+    capacidad = problema['capacidad']
+    pesos = [obj['peso'] for obj in problema['objetos']]
+    ganancias = [obj['ganancia'] for obj in problema['objetos']]
+    capacidad_escalada, pesos_escalados, _ = escalar_problema(capacidad, pesos)
+    procesos = app.config['DINAMICA_PROCESOS'] or os.cpu_count() or 1
+
+    return {
+        "original": lambda: knapsack_dynamic_programming(capacidad, problema['objetos'])[1],
+        "dinamica": lambda: _resolver_vectorizado(capacidad_escalada, pesos_escalados, ganancias)[1],
+        "dinamica_bajo_consumo": lambda: _resolver_vectorizado(capacidad_escalada, pesos_escalados,
+                                                               ganancias, bajo_consumo=True)[1],
+        # Con los procesos configurados aunque la capacidad no llegue al umbral
+        "dinamica_paralela": lambda: _resolver_paralelo(capacidad_escalada, pesos_escalados, ganancias,
+                                                        False, procesos)[1],
+        "pareto": lambda: _resolver_pareto(capacidad_escalada, pesos_escalados, ganancias)[1],
+        # Presupuesto de nodos y no de tiempo, para que la ganancia sea reproducible
+        "ramificacion": lambda: _resolver_ramificacion(capacidad_escalada, pesos_escalados, ganancias,
+                                                       app.config['RAMIFICACION_MAX_NODOS'])[1],
+        "fptas": lambda: _resolver_fptas(capacidad, pesos, ganancias, 0.01)[1],
+        "auto": lambda: resolver_problema(problema)['ganancia_total'],
+    }
+
+# (tipo, n, rango, motores); el algoritmo original sólo en tablas pequeñas
+CASOS = [
+    ('no_correlacionado', 40, 500, ('original', 'dinamica', 'pareto', 'ramificacion', 'fptas', 'auto')),
+    ('fuertemente_correlacionado', 40, 500, ('original', 'dinamica', 'pareto', 'ramificacion', 'fptas', 'auto')),
+    ('suma_subconjuntos', 40, 500, ('original', 'dinamica', 'pareto', 'auto')),
+    ('no_correlacionado', 200, 5000, ('dinamica', 'dinamica_bajo_consumo', 'ramificacion', 'fptas', 'auto')),
+    ('debilmente_correlacionado', 200, 5000, ('dinamica', 'dinamica_bajo_consumo', 'fptas', 'auto')),
+    ('fuertemente_correlacionado', 200, 5000, ('dinamica', 'dinamica_bajo_consumo', 'auto')),
+    ('suma_subconjuntos', 200, 5000, ('dinamica', 'auto')),
+    ('no_correlacionado', 1000, 100000, ('ramificacion', 'fptas', 'auto')),
+    ('fuertemente_correlacionado', 50, 100000, ('dinamica', 'dinamica_bajo_consumo', 'fptas', 'auto')),
+    ('no_correlacionado', 40, 100000, ('dinamica', 'dinamica_paralela')),
+]
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo mínimo de varias ejecuciones y la memoria pico de una.
+
+    Como timeit, las ejecuciones cronometradas van precedidas de una de
+    calentamiento y se hacen sin el recolector de basura. La memoria se mide
+    en una ejecución aparte con tracemalloc (que también registra los
+    arreglos de NumPy), porque su traza ralentiza el código.
+
+    Returns:
+        dict: segundos, memoria_pico_bytes y ganancia obtenida
+    """
+    ganancia = funcion()
+    tiempos = []
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"segundos": min(tiempos), "memoria_pico_bytes": pico, "ganancia": ganancia}
+
+def ejecutar_suite(filtro=None, repeticiones=5, semilla=2024, claves=None):
+    """
+    Ejecuta todos los casos de la suite.
+
+    Args:
+        filtro (str, optional): Sólo los casos cuyo nombre contiene el texto
+        repeticiones (int): Ejecuciones cronometradas por motor
+        semilla (int): Semilla base de los generadores
+        claves (set, optional): Sólo estas mediciones 'caso/motor'
+
+    Returns:
+        dict: Resultados por 'tipo-n-rango/motor'
+    """
+    resultados = {}
+    for k, (tipo, n, rango, motores) in enumerate(CASOS):
+        caso = f"{tipo}-n{n}-r{rango}"
+        if filtro and filtro not in caso:
+            continue
+
+        problema = generar_portafolio(tipo, n, rango, semilla + k)
+        funciones = _motores(problema)
+        for motor in motores:
+            if claves is not None and f"{caso}/{motor}" not in claves:
+                continue
+            medicion = medir(funciones[motor], repeticiones)
+            resultados[f"{caso}/{motor}"] = medicion
+            print(f"  {caso:<42} {motor:<22} {medicion['segundos'] * 1000:>10.2f} ms "
+                  f"{medicion['memoria_pico_bytes'] / 1024 ** 2:>9.2f} MB")
+
+    return resultados
+
+def comparar(resultados, linea_base, umbral):
+    """
+    Compara los resultados con la línea base.
+
+    Args:
+        resultados (dict): Resultados de ejecutar_suite
+        linea_base (dict): Resultados guardados
+        umbral (float): Regresión permitida en porcentaje
+
+    Returns:
+        list: Parejas (clave, descripción) de cada regresión encontrada
+    """
+    regresiones = []
+    factor = 1 + umbral / 100
+    for clave, actual in resultados.items():
+        base = linea_base.get(clave)
+        if base is None:
+            continue
+
+        if actual['ganancia'] != base['ganancia']:
+            regresiones.append((clave, f"ganancia {actual['ganancia']} distinta de {base['ganancia']}"))
+
+        if (actual['segundos'] > base['segundos'] * factor
+                and actual['segundos'] - base['segundos'] > MINIMO_SEGUNDOS):
+            regresiones.append((clave, f"{actual['segundos'] * 1000:.2f} ms frente a "
+                                       f"{base['segundos'] * 1000:.2f} ms"))
+
+        if actual['memoria_pico_bytes'] > base['memoria_pico_bytes'] * factor + 1024 ** 2:
+            regresiones.append((clave, f"{actual['memoria_pico_bytes'] / 1024 ** 2:.2f} MB frente a "
+                                       f"{base['memoria_pico_bytes'] / 1024 ** 2:.2f} MB"))
+
+    return regresiones
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de los motores de optimización")
+    parser.add_argument('--guardar', action='store_true', help="Sobrescribir la línea base")
+    parser.add_argument('--umbral', type=float, default=float(os.environ.get('BENCHMARK_UMBRAL', UMBRAL_POR_DEFECTO)),
+                        help="Regresión permitida en porcentaje")
+    parser.add_argument('--linea-base', default=LINEA_BASE, help="Ruta del JSON de línea base")
+    parser.add_argument('--casos', help="Ejecutar sólo los casos que contienen este texto")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args(argumentos)
+
+    print("⏱️  Ejecutando suite de rendimiento...")
+    print("=" * 50)
+    resultados = ejecutar_suite(args.casos, args.repeticiones)
+
+    if args.guardar or not os.path.exists(args.linea_base):
+        with open(args.linea_base, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                "entorno": {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "plataforma": platform.platform()
+                },
+                "resultados": resultados
+            }, archivo, indent=2, sort_keys=True)
+        print(f"\n💾 Línea base guardada en {args.linea_base}")
+        return True
+
+    with open(args.linea_base, encoding='utf-8') as archivo:
+        linea_base = json.load(archivo)['resultados']
+
+    regresiones = comparar(resultados, linea_base, args.umbral)
+    if regresiones:
+        # Repetir una vez las mediciones sospechosas para descartar ruido
+        print("\n🔁 Repitiendo las mediciones con posible regresión...")
+        repeticion = ejecutar_suite(args.casos, args.repeticiones, claves={clave for clave, _ in regresiones})
+        for clave, medicion in repeticion.items():
+            for campo in ('segundos', 'memoria_pico_bytes'):
+                resultados[clave][campo] = min(resultados[clave][campo], medicion[campo])
+        regresiones = comparar(resultados, linea_base, args.umbral)
+
+    if regresiones:
+        print(f"\n❌ Regresiones por encima del {args.umbral:g}%:")
+        for clave, descripcion in regresiones:
+            print(f"  - {clave}: {descripcion}")
+        return False
+
+    print(f"\n✅ Sin regresiones por encima del {args.umbral:g}% respecto a la línea base")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Generador de carga HTTP para /optimizar.
+
+Arranca el servidor de producción (servidor.py) en un puerto local, o usa uno
+ya levantado con --url, y le envía una mezcla de peticiones: los ejemplos de
+/optimizar de postman_collection.json y portafolios sintéticos grandes. Mide
+el rendimiento, los percentiles de latencia y la tasa de error y los guarda
+en un informe JSON que puede compararse entre versiones.
+
+Cada petición sintética lleva un nombre de objeto distinto (con una marca
+propia de la ejecución), así que no llega a la caché del servicio ni aunque
+se repita la ejecución contra el mismo servidor, y mide una resolución real; los ejemplos de la colección
+sí se repiten. El informe separa las latencias por la cabecera X-Cache de la
+respuesta (HIT, MISS, COMPARTIDO, PERSISTENTE). Con --sinteticas-repetidas
+las variantes sintéticas se repiten tal cual, y con --sin-cache el servidor
+arrancado no guarda resultados.
+
+Hay dos modos:
+
+- cerrado: N clientes concurrentes; cada uno envía la siguiente petición
+  al recibir la respuesta de la anterior (mide el rendimiento máximo).
+- abierto: las peticiones llegan a una tasa fija (llegadas de Poisson) sin
+  esperar a las respuestas; la latencia se mide desde el instante programado,
+  así que incluye la espera cuando el servicio no da abasto.
+
+Uso:
+    python carga.py                                  # cerrado, 8 clientes, 30 s
+    python carga.py --modo abierto --tasa 50 --duracion 60
+    python carga.py --url http://localhost:5000 --salida informe.json
+    python carga.py --comparar informe_anterior.json
+    python carga.py --sin-cache --fraccion-sintetica 0  # sólo resoluciones
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+
+from app import validar_entrada
+from benchmark import generar_portafolio
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+COLECCION = os.path.join(os.path.dirname(DIRECTORIO), 'postman_collection.json')
+
+# Percentiles de latencia del informe
+PERCENTILES = (50, 95, 99)
+
+# Marca del nombre de objeto que se sustituye por la etiqueta de cada petición
+MARCA_ETIQUETA = '@@etiqueta@@'
+
+def cargar_coleccion(ruta=COLECCION):
+    """
+    Extrae las peticiones POST /optimizar de la colección de Postman.
+
+    El estado esperado de cada ejemplo se obtiene con la validación del
+    servicio: 400 para los ejemplos de error y 200 para los demás.
+
+    Args:
+        ruta (str): Ruta de la colección
+
+    Returns:
+        list: Cargas {"nombre", "cuerpo", "estado_esperado"}, con el cuerpo
+        ya codificado
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        coleccion = json.load(archivo)
+
+    cargas = []
+    pendientes = list(coleccion['item'])
+    while pendientes:
+        item = pendientes.pop(0)
+        if 'item' in item:
+            pendientes.extend(item['item'])
+            continue
+
+        peticion = item['request']
+        url = peticion['url'] if isinstance(peticion['url'], str) else peticion['url'].get('raw', '')
+        if peticion['method'] != 'POST' or not urlsplit(url).path.endswith('/optimizar'):
+            continue
+
+        cuerpo = peticion['body']['raw']
+        es_valido, _ = validar_entrada(json.loads(cuerpo))
+        cargas.append({
+            "nombre": item['name'],
+            "cuerpo": cuerpo.encode('utf-8'),
+            "estado_esperado": 200 if es_valido else 400
+        })
+    return cargas
+
+def cargas_sinteticas(tamanos, variantes, semilla, unicas=True):
+    """
+    Genera portafolios sintéticos grandes débilmente correlacionados.
+
+    Cada tamaño tiene varias variantes con distinta semilla. Con unicas, cada
+    envío añade al nombre del primer objeto una etiqueta distinta (ver
+    cuerpo_peticion): el problema es el mismo pero la clave de caché no, así
+    que ninguna petición sintética llega a la caché del servicio. Sin unicas,
+    las repeticiones de una variante sí llegan.
+
+    Returns:
+        list: Cargas como las de cargar_coleccion, una por tamaño y variante
+    """
+    cargas = []
+    for n in tamanos:
+        for variante in range(variantes):
+            problema = generar_portafolio('debilmente_correlacionado', n, 1000, semilla + variante)
+            carga = {
+                "nombre": f"sintetico-{n}",
+                "cuerpo": json.dumps(problema).encode('utf-8'),
+                "estado_esperado": 200
+            }
+            if unicas:
+                # El cuerpo se serializa una sola vez; cada envío sólo inserta
+                # su etiqueta tras el nombre del primer objeto
+                problema['objetos'][0]['nombre'] += MARCA_ETIQUETA
+                carga['plantilla'] = tuple(json.dumps(problema).encode('utf-8').split(MARCA_ETIQUETA.encode()))
+            cargas.append(carga)
+    return cargas
+
+def cuerpo_peticion(carga, etiqueta):
+    """
+    Devuelve el cuerpo que se envía para una carga.
+
+    Args:
+        carga (dict): Carga de cargar_coleccion o cargas_sinteticas
+        etiqueta (str): Etiqueta única de la petición; las cargas con
+            plantilla la añaden al nombre de su primer objeto
+
+    Returns:
+        bytes: Cuerpo JSON codificado
+    """
+    if 'plantilla' not in carga:
+        return carga['cuerpo']
+    antes, despues = carga['plantilla']
+    return antes + b'-' + etiqueta.encode() + despues
+
+def construir_mezcla(coleccion, sinteticas, fraccion_sintetica):
+    """
+    Asigna a cada carga su probabilidad de ser elegida.
+
+    Returns:
+        tuple: (cargas, pesos) para random.choices
+    """
+    if not sinteticas:
+        fraccion_sintetica = 0
+    elif not coleccion:
+        fraccion_sintetica = 1
+    pesos = ([(1 - fraccion_sintetica) / len(coleccion)] * len(coleccion)
+             + [fraccion_sintetica / len(sinteticas)] * len(sinteticas))
+    return coleccion + sinteticas, pesos
+
+def enviar(url, cuerpo, timeout):
+    """
+    Envía un cuerpo a /optimizar en una conexión nueva.
+
+    Returns:
+        tuple: (estado, cache); estado es el código de estado o 'conexion' si
+        la petición falló, y cache la cabecera X-Cache ('-' si no viene)
+    """
+    destino = urlsplit(url)
+    conexion = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=timeout)
+    try:
+        conexion.request('POST', destino.path.rstrip('/') + '/optimizar', body=cuerpo,
+                         headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        return respuesta.status, respuesta.getheader('X-Cache', '-')
+    except (OSError, http.client.HTTPException):
+        return 'conexion', '-'
+    finally:
+        conexion.close()
+
+def percentil(ordenados, p):
+    """Percentil p (método del rango más cercano) de una lista ya ordenada."""
+    if not ordenados:
+        return None
+    posicion = max(int(-(-p * len(ordenados) // 100)) - 1, 0)
+    return ordenados[posicion]
+
+def resumir(registros, segundos):
+    """
+    Resume un conjunto de peticiones medidas.
+
+    Args:
+        registros (list): Tuplas (nombre, estado_esperado, estado, latencia_s, cache)
+        segundos (float): Duración de la medición
+
+    Returns:
+        dict: Peticiones, errores (estado distinto del esperado), tasa de
+        error, rendimiento en peticiones por segundo, latencias en ms y
+        recuentos por estado y por X-Cache
+    """
+    latencias = sorted(registro[3] * 1000 for registro in registros)
+    errores = sum(1 for registro in registros if registro[2] != registro[1])
+    return {
+        "peticiones": len(registros),
+        "errores": errores,
+        "tasa_error": errores / len(registros) if registros else 0,
+        "rendimiento_rps": len(registros) / segundos if segundos > 0 else 0,
+        "latencia_ms": {
+            "media": sum(latencias) / len(latencias) if latencias else None,
+            **{f"p{p}": percentil(latencias, p) for p in PERCENTILES},
+            "max": latencias[-1] if latencias else None
+        },
+        "estados": dict(sorted(Counter(str(registro[2]) for registro in registros).items())),
+        "cache": dict(sorted(Counter(registro[4] for registro in registros).items()))
+    }
+
+def ejecutar_carga(url, cargas, pesos, modo='cerrado', concurrencia=8, tasa=None, duracion=30,
+                   peticiones=None, semilla=2024, timeout=60):
+    """
+    Envía la mezcla de cargas al servicio y mide cada petición.
+
+    Args:
+        url (str): URL base del servicio
+        cargas (list): Cargas de cargar_coleccion o cargas_sinteticas
+        pesos (list): Probabilidad de cada carga, ver construir_mezcla
+        modo (str): 'cerrado' o 'abierto'
+        concurrencia (int): Clientes (cerrado) o peticiones simultáneas
+            máximas (abierto)
+        tasa (float): Peticiones por segundo del modo abierto
+        duracion (float): Segundos de envío
+        peticiones (int, optional): Detenerse tras este número de peticiones
+        semilla (int): Semilla de la elección de cargas y de las llegadas
+        timeout (float): Segundos máximos por petición
+
+    Returns:
+        tuple: (registros, segundos) para resumir
+    """
+    registros = []
+    lock = threading.Lock()
+    # La marca de la ejecución evita repetir etiquetas entre ejecuciones
+    marca = os.urandom(4).hex()
+    secuencia = itertools.count(1)
+    enviadas = 0
+    inicio = time.perf_counter()
+    limite = inicio + duracion
+
+    def turno():
+        nonlocal enviadas
+        with lock:
+            if time.perf_counter() >= limite or (peticiones is not None and enviadas >= peticiones):
+                return False
+            enviadas += 1
+            return True
+
+    def medir(carga, cuerpo, programada):
+        estado, cache = enviar(url, cuerpo, timeout)
+        latencia = time.perf_counter() - programada
+        with lock:
+            registros.append((carga['nombre'], carga['estado_esperado'], estado, latencia, cache))
+
+    def elegir(rng):
+        carga = rng.choices(cargas, pesos)[0]
+        return carga, cuerpo_peticion(carga, f"{marca}-{next(secuencia)}")
+
+    if modo == 'cerrado':
+        def cliente(k):
+            rng = random.Random(semilla + k)
+            while turno():
+                medir(*elegir(rng), time.perf_counter())
+
+        hilos = [threading.Thread(target=cliente, args=(k,)) for k in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    elif modo == 'abierto':
+        rng = random.Random(semilla)
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            programada = inicio
+            while turno():
+                espera = programada - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                # La latencia cuenta desde el instante programado, no desde
+                # que un hilo libre envía la petición
+                pool.submit(medir, *elegir(rng), programada)
+                programada += rng.expovariate(tasa)
+    else:
+        raise ValueError(f"Modo de carga desconocido: {modo}")
+
+    return registros, time.perf_counter() - inicio
+
+def generar_informe(registros, segundos, configuracion):
+    """
+    Construye el informe JSON de una ejecución.
+
+    Returns:
+        dict: Configuración, entorno, resumen total, por carga y por X-Cache
+    """
+    por_carga, por_cache = {}, {}
+    for registro in registros:
+        por_carga.setdefault(registro[0], []).append(registro)
+        por_cache.setdefault(registro[4], []).append(registro)
+
+    return {
+        "configuracion": configuracion,
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "total": resumir(registros, segundos),
+        "por_carga": {nombre: resumir(grupo, segundos) for nombre, grupo in sorted(por_carga.items())},
+        # Aciertos de caché y resoluciones tienen latencias muy distintas
+        "por_cache": {cache: resumir(grupo, segundos) for cache, grupo in sorted(por_cache.items())}
+    }
+
+def comparar_informes(actual, base):
+    """
+    Describe la variación de rendimiento, latencias y errores respecto a otro informe.
+
+    Returns:
+        list: Líneas '<carga> <métrica>: base -> actual (+x%)'
+    """
+    lineas = []
+    resumenes = [('total', actual['total'], base.get('total'))]
+    for seccion in ('por_carga', 'por_cache'):
+        resumenes += [(nombre, resumen, base.get(seccion, {}).get(nombre))
+                      for nombre, resumen in actual[seccion].items()]
+    for nombre, resumen, anterior in resumenes:
+        if anterior is None:
+            continue
+        metricas = [('rendimiento_rps', resumen['rendimiento_rps'], anterior['rendimiento_rps']),
+                    ('tasa_error', resumen['tasa_error'], anterior['tasa_error'])]
+        metricas += [(f"p{p}_ms", resumen['latencia_ms'][f"p{p}"], anterior['latencia_ms'][f"p{p}"])
+                     for p in PERCENTILES]
+        for metrica, valor, valor_base in metricas:
+            if valor is None or valor_base is None:
+                continue
+            variacion = f" ({(valor - valor_base) / valor_base * 100:+.1f}%)" if valor_base else ""
+            lineas.append(f"{nombre} {metrica}: {valor_base:.4g} -> {valor:.4g}{variacion}")
+    return lineas
+
+@contextmanager
+def servidor_local(procesos=None, sin_cache=False):
+    """
+    Arranca servidor.py en un puerto libre de localhost y lo detiene al salir.
+
+    Args:
+        procesos (int, optional): LOTE_PROCESOS del servidor
+        sin_cache (bool): Deshabilitar la caché en memoria y el almacén
+            persistente, para que cada petición se resuelva
+
+    Yields:
+        str: URL base del servidor
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        puerto = sock.getsockname()[1]
+
+    entorno = dict(os.environ)
+    if procesos:
+        entorno['LOTE_PROCESOS'] = str(procesos)
+    if sin_cache:
+        entorno.update(CACHE_MAX_ENTRADAS='0', ALMACEN_RUTA='')
+    proceso = subprocess.Popen([sys.executable, 'servidor.py', '--host', '127.0.0.1', '--puerto', str(puerto)],
+                               cwd=DIRECTORIO, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    try:
+        # Esperar a que el pool esté caliente y el servidor acepte conexiones
+        limite = time.monotonic() + 120
+        while True:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"El servidor terminó al arrancar con código {proceso.returncode}")
+            try:
+                conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=1)
+                conexion.request('GET', '/health')
+                if conexion.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            finally:
+                conexion.close()
+            if time.monotonic() > limite:
+                raise RuntimeError("El servidor no respondió a /health a tiempo")
+            time.sleep(0.1)
+        yield url
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Generador de carga HTTP para /optimizar")
+    parser.add_argument('--url', help="Servicio ya levantado; por defecto se arranca servidor.py en localhost")
+    parser.add_argument('--procesos', type=int, help="LOTE_PROCESOS del servidor arrancado")
+    parser.add_argument('--modo', choices=('cerrado', 'abierto'), default='cerrado')
+    parser.add_argument('--concurrencia', type=int, default=8,
+                        help="Clientes (cerrado) o peticiones simultáneas máximas (abierto)")
+    parser.add_argument('--tasa', type=float, default=20, help="Peticiones por segundo del modo abierto")
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos de envío")
+    parser.add_argument('--peticiones', type=int, help="Detenerse tras este número de peticiones")
+    parser.add_argument('--tamanos', default='1000,10000', help="Tamaños de los portafolios sintéticos")
+    parser.add_argument('--variantes', type=int, default=4, help="Portafolios distintos por tamaño")
+    parser.add_argument('--fraccion-sintetica', type=float, default=0.2,
+                        help="Fracción de peticiones con portafolios sintéticos")
+    parser.add_argument('--sinteticas-repetidas', action='store_true',
+                        help="Repetir las variantes sintéticas tal cual (llegan a la caché del servicio)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Arrancar el servidor local sin caché ni almacén persistente")
+    parser.add_argument('--semilla', type=int, default=2024)
+    parser.add_argument('--timeout', type=float, default=60, help="Segundos máximos por petición")
+    parser.add_argument('--salida', help="Ruta del informe JSON (por defecto se imprime)")
+    parser.add_argument('--comparar', help="Informe anterior con el que comparar")
+    args = parser.parse_args(argumentos)
+
+    tamanos = [int(tamano) for tamano in args.tamanos.split(',') if tamano]
+    if args.sin_cache and args.url:
+        parser.error("--sin-cache sólo se aplica al servidor arrancado por el generador")
+    sinteticas = cargas_sinteticas(tamanos, args.variantes, args.semilla, not args.sinteticas_repetidas)
+    cargas, pesos = construir_mezcla(cargar_coleccion(), sinteticas, args.fraccion_sintetica)
+    configuracion = {campo: getattr(args, campo) for campo in
+                     ('modo', 'concurrencia', 'duracion', 'peticiones', 'tamanos', 'variantes',
+                      'fraccion_sintetica', 'sinteticas_repetidas', 'sin_cache', 'semilla')}
+    if args.modo == 'abierto':
+        configuracion['tasa'] = args.tasa
+    configuracion['objetivo'] = args.url or 'servidor.py local'
+
+    print(f"🚀 Carga {args.modo} durante {args.duracion:g} s con {len(cargas)} cargas distintas...",
+          file=sys.stderr)
+    with servidor_local(args.procesos, args.sin_cache) if args.url is None else nullcontext(args.url) as url:
+        registros, segundos = ejecutar_carga(url, cargas, pesos, args.modo, args.concurrencia, args.tasa,
+                                             args.duracion, args.peticiones, args.semilla, args.timeout)
+
+    informe = generar_informe(registros, segundos, configuracion)
+    texto = json.dumps(informe, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto + '\n')
+        print(f"💾 Informe guardado en {args.salida}", file=sys.stderr)
+    else:
+        print(texto)
+
+    total = informe['total']
+    print(f"📈 {total['rendimiento_rps']:.1f} peticiones/s, p50 {total['latencia_ms']['p50']:.1f} ms, "
+          f"p99 {total['latencia_ms']['p99']:.1f} ms, {total['tasa_error'] * 100:.2f}% errores",
+          file=sys.stderr)
+    for cache, resumen in informe['por_cache'].items():
+        print(f"   X-Cache {cache}: {resumen['peticiones']} peticiones, p50 {resumen['latencia_ms']['p50']:.1f} ms, "
+              f"p99 {resumen['latencia_ms']['p99']:.1f} ms", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        print(f"\n🔍 Comparación con {args.comparar}:", file=sys.stderr)
+        for linea in comparar_informes(informe, base):
+            print(f"  {linea}", file=sys.stderr)
+
+    return total['errores'] == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Servidor de producción del microservicio de optimización de portafolio.
+
+A diferencia de `python app.py` (servidor de desarrollo con depuración), sirve
+la aplicación con un servidor WSGI multihilo y resuelve /optimizar,
+/optimizar/frontera y los trabajos asíncronos en el pool de procesos, que se
+arranca y calienta antes de aceptar peticiones. Así una resolución pesada no
+retiene el GIL del proceso que atiende /health y los demás endpoints.
+
+Se usa un único proceso servidor porque las sesiones, los trabajos y la caché
+viven en su memoria; el paralelismo de cálculo lo aporta el pool.
+
+Con ALMACEN_RUTA configurada, antes de aceptar peticiones precarga en la caché
+en memoria los resultados más pedidos del almacén persistente
+(ALMACEN_PRECARGA o --precargar).
+
+Al recibir SIGTERM o SIGINT deja de aceptar conexiones, espera a las peticiones
+y trabajos en curso y detiene el pool, todo dentro de un único plazo
+(SERVIDOR_DRENAJE_SEGUNDOS); los procesos del pool que siguen vivos al vencer
+se terminan.
+
+Uso:
+    python servidor.py                   # 0.0.0.0:5000
+    python servidor.py --puerto 8000
+    python servidor.py --precargar 500  # 500 resultados más pedidos
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+from app import app, almacen_resultados, detener_pool, iniciar_pool, logger, precargar_cache
+
+class ContadorPeticiones:
+    """Middleware WSGI que lleva la cuenta de las peticiones en curso."""
+
+    def __init__(self, aplicacion):
+        self.aplicacion = aplicacion
+        self.en_curso = 0
+        self._condicion = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._condicion:
+            self.en_curso += 1
+        try:
+            respuesta = self.aplicacion(environ, start_response)
+        except BaseException:
+            self._terminar()
+            raise
+        # La petición termina cuando el servidor cierra la respuesta ya enviada
+        return ClosingIterator(respuesta, self._terminar)
+
+    def _terminar(self):
+        with self._condicion:
+            self.en_curso -= 1
+            self._condicion.notify_all()
+
+    def esperar(self, timeout):
+        """
+        Espera a que terminen las peticiones en curso.
+
+        Returns:
+            bool: True si terminaron todas antes de timeout segundos
+        """
+        with self._condicion:
+            return self._condicion.wait_for(lambda: self.en_curso == 0, timeout)
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Servidor de producción del microservicio")
+    parser.add_argument('--host', default=os.environ.get('SERVIDOR_HOST', '0.0.0.0'))
+    parser.add_argument('--puerto', type=int, default=int(os.environ.get('SERVIDOR_PUERTO', 5000)))
+    parser.add_argument('--precargar', type=int, default=app.config['ALMACEN_PRECARGA'],
+                        help="Resultados más pedidos del almacén persistente que se cargan en la caché al arrancar")
+    args = parser.parse_args(argumentos)
+
+    app.config['RESOLUCION_EN_PROCESOS'] = True
+    iniciar_pool()
+    precargar_cache(args.precargar)
+
+    contador = ContadorPeticiones(app.wsgi_app)
+    app.wsgi_app = contador
+    servidor = make_server(args.host, args.puerto, app, threaded=True)
+
+    def detener(signum, frame):
+        logger.info(f"Señal {signal.Signals(signum).name} recibida, deteniendo el servidor")
+        # shutdown() espera al bucle de serve_forever, así que va en otro hilo
+        threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+
+    logger.info(f"Servidor de producción escuchando en http://{args.host}:{args.puerto}")
+    servidor.serve_forever()
+
+    # Drenaje: peticiones en curso, trabajos asíncronos y pool de procesos,
+    # todos dentro de un único plazo; cada paso recibe el tiempo que queda
+    plazo = app.config['SERVIDOR_DRENAJE_SEGUNDOS']
+    limite = time.monotonic() + plazo
+
+    def restante():
+        return max(limite - time.monotonic(), 0)
+
+    if not contador.esperar(restante()):
+        logger.warning(f"Quedan {contador.en_curso} peticiones en curso tras {plazo:g} s")
+    app.extensions['cola_trabajos'].cerrar(restante())
+    detener_pool(restante())
+    if almacen_resultados is not None:
+        almacen_resultados.volcar_usos()
+    servidor.server_close()
+    logger.info("Servidor detenido")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,25 @@
 import pytest
+import base64
 import json
-from app import app, knapsack_dynamic_programming, validar_entrada
+import app as modulo_app
+import multiprocessing
+import os
+import pstats
+import random
+import signal
+import threading
+import time
+from app import (app, knapsack_dynamic_programming, knapsack_vectorizado, validar_entrada,
+                 escalar_problema, resolver_problema, _resolver_pareto, _resolver_ramificacion,
+                 LimiteExcedido, CacheResultados, clave_canonica, cache_resultados,
+                 SesionOptimizacion, GestorSesiones, _resolver_fptas, estimar_costos,
+                 expandir_cantidades, ingerir_entrada, MedicionEtapas, ColaTrabajosLocal, ColaLlena,
+                 ResolucionesEnCurso, reducir_problema, AlmacenResultados, precargar_cache)
+from benchmark import generar_portafolio, comparar
+from servidor import ContadorPeticiones
+from carga import (cargar_coleccion, cargas_sinteticas, construir_mezcla, ejecutar_carga,
+                   generar_informe, resumir, comparar_informes)
+from werkzeug.serving import make_server
 
 @pytest.fixture
 def client():
@@ -117,6 +136,1644 @@ class TestKnapsackAlgorithm:
         assert ganancia_total == 0
         assert peso_total == 0
 
+class TestKnapsackVectorizado:
+    """Pruebas para el algoritmo vectorizado con NumPy."""
+    
+    def test_equivalente_a_programacion_dinamica(self):
+        """Prueba que el resultado coincide con el algoritmo original."""
+        generador = random.Random(42)
+        for _ in range(200):
+            capacidad = generador.randint(0, 80)
+            objetos = [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(1, 40),
+                 "ganancia": generador.randint(0, 100)}
+                for i in range(generador.randint(0, 10))
+            ]
+            
+            assert knapsack_vectorizado(capacidad, objetos) == knapsack_dynamic_programming(capacidad, objetos)
+    
+    def test_bajo_consumo_equivalente(self):
+        """Prueba que las decisiones empaquetadas en bits dan el mismo resultado."""
+        generador = random.Random(7)
+        for _ in range(200):
+            capacidad = generador.randint(0, 80)
+            objetos = [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(1, 40),
+                 "ganancia": generador.randint(0, 100)}
+                for i in range(generador.randint(0, 10))
+            ]
+            
+            assert knapsack_vectorizado(capacidad, objetos, bajo_consumo=True) == knapsack_vectorizado(capacidad, objetos)
+    
+    def test_ganancias_decimales(self):
+        """Prueba ganancias con decimales."""
+        capacidad = 10
+        objetos = [
+            {"nombre": "A", "peso": 4, "ganancia": 2.5},
+            {"nombre": "B", "peso": 6, "ganancia": 3.25},
+            {"nombre": "C", "peso": 5, "ganancia": 4.0}
+        ]
+        
+        assert knapsack_vectorizado(capacidad, objetos) == knapsack_dynamic_programming(capacidad, objetos)
+    
+    def test_tipos_nativos(self):
+        """Prueba que el resultado usa tipos nativos serializables a JSON."""
+        objetos = [{"nombre": "A", "peso": 2, "ganancia": 3}]
+        
+        _, ganancia_total, peso_total = knapsack_vectorizado(5, objetos)
+        
+        assert type(ganancia_total) is int
+        assert type(peso_total) is int
+    
+    def test_peso_no_entero(self):
+        """Prueba que un peso con decimales se rechaza."""
+        objetos = [{"nombre": "A", "peso": 2.5, "ganancia": 3}]
+        
+        with pytest.raises(ValueError):
+            knapsack_vectorizado(5, objetos)
+
+class TestEscalado:
+    """Pruebas para la reducción de escala de capacidad y pesos."""
+    
+    def test_divisor_comun(self):
+        """Prueba la división por el máximo común divisor de los pesos."""
+        capacidad, pesos, unidad = escalar_problema(10000, [2000, 4000, 5000, 3000])
+        
+        assert unidad == 1000
+        assert capacidad == 10
+        assert pesos == [2, 4, 5, 3]
+    
+    def test_capacidad_no_multiplo(self):
+        """Prueba que la capacidad se trunca a la unidad común."""
+        capacidad, pesos, unidad = escalar_problema(10500, [2000, 4000])
+        
+        assert unidad == 2000
+        assert capacidad == 5
+        assert pesos == [1, 2]
+    
+    def test_sin_divisor_comun(self):
+        """Prueba pesos sin divisor común."""
+        capacidad, pesos, unidad = escalar_problema(100, [3, 7])
+        
+        assert unidad == 1
+        assert capacidad == 100
+        assert pesos == [3, 7]
+    
+    def test_resolucion_redondea_hacia_arriba(self):
+        """Prueba que la resolución redondea los pesos hacia arriba."""
+        capacidad, pesos, unidad = escalar_problema(1050, [120, 250.5, 300], resolucion=100)
+        
+        assert unidad == 100
+        assert capacidad == 10
+        assert pesos == [2, 3, 3]
+    
+    def test_resultado_equivalente(self):
+        """Prueba que escalar no cambia la selección."""
+        objetos = [
+            {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+            {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+            {"nombre": "Acción_Z", "peso": 3000, "ganancia": 2800},
+            {"nombre": "Bono_P", "peso": 4000, "ganancia": 3000},
+            {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+        ]
+        capacidad, pesos, _ = escalar_problema(8000, [obj['peso'] for obj in objetos])
+        escalados = [dict(obj, peso=peso) for obj, peso in zip(objetos, pesos)]
+        
+        seleccionados, ganancia_total, _ = knapsack_vectorizado(capacidad, escalados)
+        esperado, ganancia_esperada, _ = knapsack_dynamic_programming(8000, objetos)
+        
+        assert seleccionados == esperado
+        assert ganancia_total == ganancia_esperada
+
+class TestFronteraPareto:
+    """Pruebas para el motor de frontera de Pareto."""
+    
+    def test_misma_ganancia_que_programacion_dinamica(self):
+        """Prueba que la ganancia coincide con la programación dinámica."""
+        generador = random.Random(11)
+        for _ in range(200):
+            capacidad = generador.randint(0, 80)
+            objetos = [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(1, 40),
+                 "ganancia": generador.randint(0, 100)}
+                for i in range(generador.randint(0, 10))
+            ]
+            pesos = [obj['peso'] for obj in objetos]
+            ganancias = [obj['ganancia'] for obj in objetos]
+            
+            indices, ganancia_total = _resolver_pareto(capacidad, pesos, ganancias)
+            _, ganancia_esperada, _ = knapsack_dynamic_programming(capacidad, objetos)
+            
+            assert ganancia_total == ganancia_esperada
+            assert sum(ganancias[i] for i in indices) == ganancia_total
+            assert sum(pesos[i] for i in indices) <= capacidad
+    
+    def test_pesos_decimales(self):
+        """Prueba pesos con decimales."""
+        indices, ganancia_total = _resolver_pareto(10.5, [4.25, 6.25, 5.5], [3, 4, 5])
+        
+        assert indices == [0, 2]
+        assert ganancia_total == 8
+    
+    def test_limite_de_estados(self):
+        """Prueba que se respeta el presupuesto de estados."""
+        pesos = [2 ** i for i in range(12)]
+        
+        with pytest.raises(LimiteExcedido):
+            _resolver_pareto(10000, pesos, pesos, max_estados=100)
+    
+    def test_capacidad_enorme(self):
+        """Prueba que la elección automática evita la tabla con capacidades enormes."""
+        generador = random.Random(5)
+        data = {
+            "capacidad": 10 ** 9,
+            "objetos": [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(10 ** 7, 10 ** 8),
+                 "ganancia": generador.randint(10 ** 5, 10 ** 6)}
+                for i in range(40)
+            ]
+        }
+        
+        resultado = resolver_problema(data)
+        
+        assert resultado['solver'] in ('reduccion', 'ramificacion', 'pareto')
+        assert resultado['optimo_probado'] is True
+        assert resultado['peso_total'] <= 10 ** 9
+
+class TestRamificacionYPoda:
+    """Pruebas para el motor de ramificación y poda."""
+    
+    def test_misma_ganancia_que_programacion_dinamica(self):
+        """Prueba que la ganancia coincide con la programación dinámica."""
+        generador = random.Random(13)
+        for _ in range(200):
+            capacidad = generador.randint(0, 80)
+            objetos = [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(1, 40),
+                 "ganancia": generador.randint(0, 100)}
+                for i in range(generador.randint(0, 10))
+            ]
+            pesos = [obj['peso'] for obj in objetos]
+            ganancias = [obj['ganancia'] for obj in objetos]
+            
+            indices, ganancia_total, optimo_probado = _resolver_ramificacion(capacidad, pesos, ganancias)
+            _, ganancia_esperada, _ = knapsack_dynamic_programming(capacidad, objetos)
+            
+            assert optimo_probado
+            assert ganancia_total == ganancia_esperada
+            assert sum(ganancias[i] for i in indices) == ganancia_total
+            assert sum(pesos[i] for i in indices) <= capacidad
+    
+    def test_presupuesto_agotado(self):
+        """Prueba que al agotar los nodos se devuelve la mejor solución conocida."""
+        generador = random.Random(17)
+        pesos = [generador.randint(1000, 5000) for _ in range(60)]
+        ganancias = [peso + 100 for peso in pesos]
+        
+        indices, ganancia_total, optimo_probado = _resolver_ramificacion(50000, pesos, ganancias, max_nodos=10)
+        
+        assert not optimo_probado
+        assert sum(pesos[i] for i in indices) <= 50000
+        assert sum(ganancias[i] for i in indices) == ganancia_total
+
+class TestCacheResultados:
+    """Pruebas para la caché de resultados."""
+    
+    def test_clave_independiente_del_orden(self):
+        """Prueba que el orden de los objetos no cambia la clave."""
+        objetos = [
+            {"nombre": "A", "peso": 2000, "ganancia": 1500},
+            {"nombre": "B", "peso": 4000, "ganancia": 3500}
+        ]
+        
+        clave = clave_canonica({"capacidad": 10000, "objetos": objetos})
+        
+        assert clave == clave_canonica({"capacidad": 10000, "objetos": objetos[::-1]})
+        assert clave != clave_canonica({"capacidad": 9000, "objetos": objetos})
+        assert clave != clave_canonica({"capacidad": 10000, "objetos": objetos, "solver": "pareto"})
+    
+    def test_desalojo_lru(self):
+        """Prueba que se desaloja la entrada usada hace más tiempo."""
+        cache = CacheResultados(max_entradas=2)
+        cache.guardar("a", {"valor": 1})
+        cache.guardar("b", {"valor": 2})
+        cache.obtener("a")
+        cache.guardar("c", {"valor": 3})
+        
+        assert cache.obtener("b") is None
+        assert cache.obtener("a") == {"valor": 1}
+        assert cache.obtener("c") == {"valor": 3}
+        
+        estadisticas = cache.estadisticas()
+        assert estadisticas['evictions'] == 1
+        assert estadisticas['hits'] == 3
+        assert estadisticas['misses'] == 1
+        assert estadisticas['entradas'] == 2
+        assert estadisticas['memoria_bytes'] > 0
+    
+    def test_caducidad(self):
+        """Prueba que las entradas caducan tras el TTL."""
+        cache = CacheResultados(max_entradas=10, ttl=0.01)
+        cache.guardar("a", {"valor": 1})
+        time.sleep(0.02)
+        
+        assert cache.obtener("a") is None
+        assert cache.estadisticas()['expiradas'] == 1
+        assert cache.estadisticas()['memoria_bytes'] == 0
+
+class TestSesiones:
+    """Pruebas para las sesiones de reoptimización incremental."""
+    
+    OBJETOS = [
+        {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+        {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+        {"nombre": "Acción_Z", "peso": 3000, "ganancia": 2800},
+        {"nombre": "Bono_P", "peso": 4000, "ganancia": 3000},
+        {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+    ]
+    
+    def test_cambios_equivalentes_a_resolver_de_nuevo(self):
+        """Prueba que cada cambio da el mismo resultado que resolver desde cero."""
+        sesion = SesionOptimizacion(8000, self.OBJETOS)
+        
+        sesion.aplicar_cambios(modificar=[{"nombre": "Acción_Y", "ganancia": 100}])
+        assert sesion.filas_recalculadas == 4
+        sesion.aplicar_cambios(modificar=[{"nombre": "Acción_Y", "peso": 2000}])
+        assert sesion.filas_recalculadas == 1
+        sesion.aplicar_cambios(agregar=[{"nombre": "Bono_R", "peso": 700, "ganancia": 900}],
+                               eliminar=["Bono_P"])
+        
+        seleccionados, ganancia_total, peso_total = knapsack_dynamic_programming(8000, sesion.objetos)
+        resultado = sesion.resultado()
+        assert resultado['seleccionados'] == seleccionados
+        assert resultado['ganancia_total'] == ganancia_total
+        assert resultado['peso_total'] == peso_total
+    
+    def test_objeto_inexistente_no_modifica(self):
+        """Prueba que un cambio con un nombre desconocido no altera la sesión."""
+        sesion = SesionOptimizacion(8000, self.OBJETOS)
+        
+        with pytest.raises(KeyError):
+            sesion.aplicar_cambios(eliminar=["Bono_P"], modificar=[{"nombre": "Otro", "peso": 1}])
+        
+        assert len(sesion.objetos) == 5
+        assert len(sesion.filas) == 6
+    
+    def test_desalojo_por_memoria(self):
+        """Prueba que se descartan las sesiones más antiguas al superar el límite."""
+        gestor = GestorSesiones(max_celdas=30, ttl=60)
+        primera = SesionOptimizacion(70, [{"nombre": "A", "peso": 7, "ganancia": 1}])
+        segunda = SesionOptimizacion(70, [{"nombre": "A", "peso": 7, "ganancia": 1}])
+        gestor.agregar(primera)
+        gestor.agregar(segunda)
+        
+        assert gestor.obtener(primera.id) is None
+        assert gestor.obtener(segunda.id) is segunda
+    
+    def test_caducidad(self):
+        """Prueba que las sesiones inactivas se descartan."""
+        gestor = GestorSesiones(max_celdas=1000, ttl=0.01)
+        sesion = SesionOptimizacion(10, [{"nombre": "A", "peso": 7, "ganancia": 1}])
+        gestor.agregar(sesion)
+        time.sleep(0.02)
+        
+        assert gestor.obtener(sesion.id) is None
+    
+    def test_endpoints(self, client):
+        """Prueba el ciclo de vida de una sesión a través de la API."""
+        response = client.post('/sesiones',
+                             data=json.dumps({"capacidad": 8000, "objetos": self.OBJETOS}),
+                             content_type='application/json')
+        assert response.status_code == 201
+        
+        sesion_id = json.loads(response.data)['id']
+        response = client.patch(f'/sesiones/{sesion_id}/objetos',
+                              data=json.dumps({"eliminar": ["Acción_Z"]}),
+                              content_type='application/json')
+        assert response.status_code == 200
+        
+        result = json.loads(response.data)
+        assert result['filas_recalculadas'] == 2
+        assert "Acción_Z" not in result['resultado']['seleccionados']
+        
+        response = client.patch(f'/sesiones/{sesion_id}/objetos',
+                              data=json.dumps({"eliminar": ["Acción_Z"]}),
+                              content_type='application/json')
+        assert response.status_code == 400
+        
+        response = client.get(f'/sesiones/{sesion_id}')
+        assert response.status_code == 200
+        assert len(json.loads(response.data)['objetos']) == 4
+        
+        assert client.delete(f'/sesiones/{sesion_id}').status_code == 200
+        assert client.get(f'/sesiones/{sesion_id}').status_code == 404
+    
+    def test_unidad_menor_rechazada(self, client, monkeypatch):
+        """Prueba que un cambio que reduce la unidad de los pesos se limita sin alterar la sesión."""
+        objetos = [
+            {"nombre": "A", "peso": 10 ** 8, "ganancia": 5},
+            {"nombre": "B", "peso": 2 * 10 ** 8, "ganancia": 7}
+        ]
+        response = client.post('/sesiones',
+                             data=json.dumps({"capacidad": 10 ** 9, "objetos": objetos}),
+                             content_type='application/json')
+        assert response.status_code == 201
+        sesion_id = json.loads(response.data)['id']
+        inicial = json.loads(client.get(f'/sesiones/{sesion_id}').data)
+        
+        # La unidad pasaría de 10^8 a 1: 4 filas de 10^9 + 1 celdas
+        response = client.patch(f'/sesiones/{sesion_id}/objetos',
+                              data=json.dumps({"agregar": [{"nombre": "C", "peso": 3, "ganancia": 1}]}),
+                              content_type='application/json')
+        assert response.status_code == 413
+        
+        # Un fallo al calcular la tabla nueva tampoco deja la sesión a medias
+        def sin_memoria(*args):
+            raise MemoryError()
+        monkeypatch.setattr(SesionOptimizacion, '_recalcular', sin_memoria)
+        response = client.patch(f'/sesiones/{sesion_id}/objetos',
+                              data=json.dumps({"modificar": [{"nombre": "A", "ganancia": 9}]}),
+                              content_type='application/json')
+        assert response.status_code == 500
+        
+        response = client.get(f'/sesiones/{sesion_id}')
+        assert response.status_code == 200
+        assert json.loads(response.data) == inicial
+    
+    def test_nombres_duplicados(self, client):
+        """Prueba que una sesión rechaza nombres repetidos."""
+        objetos = [
+            {"nombre": "A", "peso": 1, "ganancia": 1},
+            {"nombre": "A", "peso": 2, "ganancia": 2}
+        ]
+        
+        response = client.post('/sesiones',
+                             data=json.dumps({"capacidad": 10, "objetos": objetos}),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert "únicos" in json.loads(response.data)['error']
+
+class TestAproximado:
+    """Pruebas para el modo aproximado (FPTAS)."""
+    
+    def test_garantia_de_aproximacion(self):
+        """Prueba que la ganancia está dentro de (1 - epsilon) del óptimo."""
+        generador = random.Random(19)
+        for _ in range(200):
+            capacidad = generador.randint(1, 80)
+            objetos = [
+                {"nombre": f"P{i}",
+                 "peso": generador.randint(1, 40),
+                 "ganancia": generador.randint(0, 100)}
+                for i in range(generador.randint(0, 10))
+            ]
+            pesos = [obj['peso'] for obj in objetos]
+            ganancias = [obj['ganancia'] for obj in objetos]
+            epsilon = generador.choice([0.5, 0.1, 0.01])
+            
+            indices, ganancia_total, cota_superior = _resolver_fptas(capacidad, pesos, ganancias, epsilon)
+            _, optimo, _ = knapsack_dynamic_programming(capacidad, objetos)
+            
+            assert sum(pesos[i] for i in indices) <= capacidad
+            assert sum(ganancias[i] for i in indices) == ganancia_total
+            assert ganancia_total >= (1 - epsilon) * optimo
+            assert cota_superior >= optimo
+
+class TestTrabajos:
+    """Pruebas para la cola de trabajos asíncronos."""
+    
+    PROBLEMA_GRANDE = {
+        "capacidad": 3000001,
+        "solver": "dinamica",
+        "objetos": [
+            {"nombre": f"P{i}", "peso": 1000 + 7 * i, "ganancia": 500 + 3 * i}
+            for i in range(300)
+        ]
+    }
+    
+    def esperar(self, client, trabajo_id, estados=('completado', 'fallido', 'cancelado', 'expirado')):
+        """Consulta el trabajo hasta que llega a uno de los estados indicados."""
+        for _ in range(500):
+            datos = json.loads(client.get(f'/trabajos/{trabajo_id}').data)
+            if datos['estado'] in estados:
+                return datos
+            time.sleep(0.02)
+        raise AssertionError(f"El trabajo {trabajo_id} no terminó: {datos}")
+    
+    def test_trabajo_completado(self, client):
+        """Prueba que un trabajo encolado termina con el mismo resultado que /optimizar."""
+        data = {
+            "capacidad": 8000,
+            "objetos": [
+                {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+                {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+                {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+            ]
+        }
+        
+        response = client.post('/trabajos',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        assert response.status_code == 202
+        
+        trabajo_id = json.loads(response.data)['id']
+        assert response.headers['Location'] == f"/trabajos/{trabajo_id}"
+        
+        datos = self.esperar(client, trabajo_id)
+        assert datos['estado'] == 'completado'
+        assert datos['resultado']['ganancia_total'] == 4200
+    
+    def test_trabajo_cancelado(self, client):
+        """Prueba la cancelación de un trabajo en curso."""
+        response = client.post('/trabajos',
+                             data=json.dumps(self.PROBLEMA_GRANDE),
+                             content_type='application/json')
+        trabajo_id = json.loads(response.data)['id']
+        self.esperar(client, trabajo_id, ('en_curso', 'completado'))
+        
+        response = client.delete(f'/trabajos/{trabajo_id}')
+        assert response.status_code == 200
+        
+        datos = self.esperar(client, trabajo_id)
+        assert datos['estado'] == 'cancelado'
+        assert datos['progreso']['filas_completadas'] < datos['progreso']['filas_totales']
+    
+    def test_trabajo_expirado(self, client):
+        """Prueba que un trabajo se detiene al vencer su plazo."""
+        data = dict(self.PROBLEMA_GRANDE, deadline_ms=50)
+        
+        response = client.post('/trabajos',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        datos = self.esperar(client, json.loads(response.data)['id'])
+        assert datos['estado'] == 'expirado'
+        assert 'resultado' not in datos
+    
+    def test_trabajos_en_procesos(self, client, monkeypatch):
+        """Prueba que con RESOLUCION_EN_PROCESOS los trabajos se resuelven, informan y cancelan en el pool."""
+        monkeypatch.setitem(app.config, 'RESOLUCION_EN_PROCESOS', True)
+        monkeypatch.setitem(app.config, 'LOTE_PROCESOS', 1)
+        monkeypatch.setitem(app.config, 'DINAMICA_PROCESOS', 1)
+        modulo_app.detener_pool()
+        try:
+            pequeno = {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 4, "ganancia": 5}]}
+            response = client.post('/trabajos', data=json.dumps(pequeno), content_type='application/json')
+            datos = self.esperar(client, json.loads(response.data)['id'])
+            assert datos['estado'] == 'completado'
+            assert datos['resultado']['ganancia_total'] == 5
+            
+            response = client.post('/trabajos',
+                                 data=json.dumps(self.PROBLEMA_GRANDE),
+                                 content_type='application/json')
+            trabajo_id = json.loads(response.data)['id']
+            for _ in range(500):
+                datos = json.loads(client.get(f'/trabajos/{trabajo_id}').data)
+                if datos['progreso']['filas_completadas'] > 0 or datos['estado'] == 'completado':
+                    break
+                time.sleep(0.02)
+            
+            client.delete(f'/trabajos/{trabajo_id}')
+            datos = self.esperar(client, trabajo_id)
+            assert datos['estado'] == 'cancelado'
+            assert 0 < datos['progreso']['filas_completadas'] < datos['progreso']['filas_totales']
+        finally:
+            modulo_app.detener_pool()
+    
+    def test_cola_incompleta(self):
+        """Prueba que una cola que no implementa toda la interfaz falla al crearse."""
+        class ColaIncompleta(modulo_app.ColaTrabajos):
+            def encolar(self, data, deadline_ms):
+                return None
+        
+        with pytest.raises(TypeError):
+            ColaIncompleta()
+    
+    def test_trabajo_inexistente(self, client):
+        """Prueba la consulta de un trabajo desconocido."""
+        assert client.get('/trabajos/no-existe').status_code == 404
+        assert client.delete('/trabajos/no-existe').status_code == 404
+
+class TestAdmision:
+    """Pruebas para la estimación de costes y el control de admisión."""
+    
+    @pytest.fixture
+    def limites(self):
+        """Restaura los límites de admisión tras cada prueba."""
+        originales = {k: app.config[k] for k in ('ADMISION_MAX_OBJETOS', 'ADMISION_MAX_MEMORIA_BYTES',
+                                                 'ADMISION_MAX_TIEMPO_MS')}
+        yield app.config
+        app.config.update(originales)
+    
+    def problema_dificil(self):
+        """Problema fuertemente correlacionado con una tabla de ~2.700 millones de celdas."""
+        rng = random.Random(7)
+        pesos = [rng.randint(100000, 1000000) for _ in range(100)]
+        return {
+            "capacidad": sum(pesos) // 2,
+            "objetos": [{"nombre": f"P{i}", "peso": p, "ganancia": p + 100000}
+                        for i, p in enumerate(pesos)]
+        }
+    
+    def test_estimacion_dinamica(self):
+        """Prueba que la estimación de la tabla cuenta sólo los objetos que caben."""
+        estimaciones = estimar_costos(999, [10, 20, 2000], 1000, 1.0)
+        
+        assert estimaciones['dinamica']['tiempo_ms'] == pytest.approx(2 * 1000 * 3 / 1e6)
+        assert estimaciones['dinamica']['exacto']
+        assert not estimaciones['fptas']['exacto']
+        assert estimaciones['ramificacion']['tiempo_ms'] <= 1000
+    
+    def test_estimacion_sin_tabla(self):
+        """Prueba que con pesos no enteros no se estima la tabla dinámica."""
+        estimaciones = estimar_costos(10.5, [1.5, 2.5], 1000, 1.0, enteros=False)
+        assert 'dinamica' not in estimaciones
+        assert 'pareto' in estimaciones
+    
+    def test_demasiados_objetos(self, client, limites):
+        """Prueba el rechazo con 413 de un problema con demasiados objetos."""
+        limites['ADMISION_MAX_OBJETOS'] = 2
+        data = {
+            "capacidad": 100,
+            "objetos": [{"nombre": f"P{i}", "peso": 10, "ganancia": 5} for i in range(3)]
+        }
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 413
+        assert 'máximo es 2' in json.loads(response.data)['error']
+    
+    def test_memoria_excedida(self, client, limites):
+        """Prueba el rechazo con 422 de una tabla que no cabe en memoria."""
+        limites['ADMISION_MAX_MEMORIA_BYTES'] = 1024 ** 2
+        data = dict(self.problema_dificil(), solver='dinamica')
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 422
+        assert "'dinamica' requiere" in json.loads(response.data)['error']
+    
+    def test_plazo_insuficiente(self, client):
+        """Prueba que un plazo corto rechaza el problema en lugar de agotarlo."""
+        data = dict(self.problema_dificil(), deadline_ms=100)
+        
+        inicio = time.monotonic()
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 422
+        assert time.monotonic() - inicio < 1
+    
+    def test_degradado_a_aproximado(self, client):
+        """Prueba la degradación al FPTAS cuando el cliente la permite."""
+        data = dict(self.problema_dificil(), deadline_ms=500, permitir_aproximado=True)
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 200
+        
+        resultado = json.loads(response.data)
+        assert resultado['solver'] == 'fptas'
+        assert resultado['degradado'] is True
+        assert resultado['ganancia_total'] >= (1 - resultado['epsilon']) * resultado['cota_superior']
+    
+    def test_lote_rechazado(self, client, limites):
+        """Prueba que un problema rechazado no afecta al resto del lote."""
+        limites['ADMISION_MAX_OBJETOS'] = 1
+        problemas = [
+            {"capacidad": -10, "objetos": [{"nombre": "A", "peso": 5, "ganancia": 3}]},
+            {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 5, "ganancia": 3},
+                                          {"nombre": "B", "peso": 5, "ganancia": 4}]}
+        ]
+        
+        response = client.post('/optimizar/lote', data=json.dumps(problemas),
+                             content_type='application/json')
+        assert response.status_code == 200
+        
+        resultados = json.loads(response.data)['resultados']
+        assert 'codigo' not in resultados[0]
+        assert resultados[1]['codigo'] == 413
+    
+    def test_campos_invalidos(self):
+        """Prueba la validación de deadline_ms y permitir_aproximado."""
+        base = {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 5, "ganancia": 3}]}
+        
+        assert not validar_entrada(dict(base, deadline_ms=0))[0]
+        assert not validar_entrada(dict(base, deadline_ms=True))[0]
+        assert not validar_entrada(dict(base, permitir_aproximado="si"))[0]
+        assert validar_entrada(dict(base, deadline_ms=500, permitir_aproximado=False))[0]
+
+class TestCantidades:
+    """Pruebas para los proyectos con cantidad acotada."""
+    
+    def test_expansion_binaria(self):
+        """Prueba que una cantidad k se divide en O(log k) partes que suman k."""
+        pesos, ganancias, origen = expandir_cantidades([10, 3], [7, 2], [13, 1])
+        
+        assert [unidades for _, unidades in origen] == [1, 2, 4, 6, 1]
+        assert pesos == [10, 20, 40, 60, 3]
+        assert ganancias == [7, 14, 28, 42, 2]
+        assert [i for i, _ in origen] == [0, 0, 0, 0, 1]
+    
+    def test_sin_cantidades(self):
+        """Prueba que sin cantidades las columnas se usan sin copiarlas."""
+        pesos, ganancias = [10, 3], [7, 2]
+        assert expandir_cantidades(pesos, ganancias) == (pesos, ganancias, None)
+    
+    def test_equivalente_a_copias(self):
+        """Prueba que el resultado coincide con enviar copias del mismo objeto."""
+        random.seed(13)
+        for _ in range(30):
+            objetos = [
+                {"nombre": f"P{i}", "peso": random.randint(1, 20),
+                 "ganancia": random.randint(0, 30), "cantidad": random.randint(1, 6)}
+                for i in range(random.randint(1, 5))
+            ]
+            capacidad = random.randint(1, 80)
+            copias = [{"nombre": obj['nombre'], "peso": obj['peso'], "ganancia": obj['ganancia']}
+                      for obj in objetos for _ in range(obj['cantidad'])]
+            
+            resultado = resolver_problema({"capacidad": capacidad, "objetos": objetos})
+            _, optimo, _ = knapsack_vectorizado(capacidad, copias)
+            assert resultado['ganancia_total'] == optimo
+            
+            por_nombre = {obj['nombre']: obj for obj in objetos}
+            elegidos = list(zip(resultado['seleccionados'], resultado['cantidades']))
+            assert all(0 < c <= por_nombre[nombre]['cantidad'] for nombre, c in elegidos)
+            assert sum(por_nombre[nombre]['peso'] * c for nombre, c in elegidos) == resultado['peso_total']
+            assert resultado['peso_total'] <= capacidad
+
+class TestIngesta:
+    """Pruebas para la ingesta columnar de problemas."""
+    
+    OBJETOS = [
+        {"nombre": "A", "peso": 2000, "ganancia": 1500},
+        {"nombre": "B", "peso": 4000, "ganancia": 3500.5},
+        {"nombre": "C", "peso": 5000, "ganancia": 4000}
+    ]
+    
+    def test_columnas_tipadas(self):
+        """Prueba que la ingesta produce arreglos de int64 o float64."""
+        problema, mensaje_error = ingerir_entrada({"capacidad": 10000, "objetos": self.OBJETOS,
+                                                   "solver": "pareto"})
+        
+        assert mensaje_error == ""
+        assert problema['nombres'] == ['A', 'B', 'C']
+        assert problema['pesos'].typecode == 'q'
+        assert problema['ganancias'].typecode == 'd'
+        assert problema['solver'] == 'pareto'
+        assert 'objetos' not in problema and 'cantidades' not in problema
+    
+    def test_formato_columnar_equivalente(self):
+        """Prueba que el cuerpo columnar produce el mismo problema que los objetos."""
+        columnar = {
+            "capacidad": 10000,
+            "nombres": [obj['nombre'] for obj in self.OBJETOS],
+            "pesos": [obj['peso'] for obj in self.OBJETOS],
+            "ganancias": [obj['ganancia'] for obj in self.OBJETOS]
+        }
+        por_objetos = {"capacidad": 10000, "objetos": self.OBJETOS}
+        
+        assert ingerir_entrada(columnar) == ingerir_entrada(por_objetos)
+        assert clave_canonica(columnar) == clave_canonica(por_objetos)
+        assert resolver_problema(columnar) == resolver_problema(por_objetos)
+    
+    def test_errores_columnares(self):
+        """Prueba que los errores del formato columnar usan los mensajes por objeto."""
+        base = {"capacidad": 100, "nombres": ["A", "B"], "pesos": [10, 20], "ganancias": [5, 6]}
+        
+        assert ingerir_entrada(dict(base, pesos=[10, -1]))[1] == "El peso del objeto 1 debe ser un número positivo"
+        assert ingerir_entrada(dict(base, ganancias=["x", 6]))[1] == "La ganancia del objeto 0 debe ser un número no negativo"
+        assert ingerir_entrada(dict(base, cantidades=[1, 0]))[1] == "La cantidad del objeto 1 debe ser un entero positivo"
+        assert (ingerir_entrada(dict(base, nombres=["A", ["B"]]))[1]
+                == ingerir_entrada({"capacidad": 100, "objetos": [{"nombre": "A", "peso": 10, "ganancia": 5},
+                                                                  {"nombre": ["B"], "peso": 20, "ganancia": 6}]})[1]
+                == "El nombre del objeto 1 debe ser un texto o un número")
+        assert "misma longitud" in ingerir_entrada(dict(base, pesos=[10]))[1]
+        assert ingerir_entrada({"capacidad": 100, "pesos": [10]})[1] == "Campo 'nombres' es requerido"
+        assert ingerir_entrada({"capacidad": 100})[1] == "Campo 'objetos' es requerido"
+    
+    def test_enteros_grandes(self):
+        """Prueba que los enteros que no caben en int64 no pierden precisión."""
+        problema, _ = ingerir_entrada({"capacidad": 10, "nombres": ["A"], "pesos": [5],
+                                       "ganancias": [2 ** 70 + 1]})
+        assert problema['ganancias'] == [2 ** 70 + 1]
+
+class TestMetricas:
+    """Pruebas para la medición por etapas y el endpoint de métricas."""
+    
+    def test_etapas_anidadas_exclusivas(self):
+        """Prueba que el tiempo de una etapa excluye el de sus etapas internas."""
+        medicion = MedicionEtapas()
+        with medicion.etapa('resolucion'):
+            time.sleep(0.02)
+            with medicion.etapa('reconstruccion'):
+                time.sleep(0.03)
+        
+        assert 0.02 <= medicion.etapas['resolucion'] < medicion.etapas['reconstruccion']
+        assert medicion.etapas['reconstruccion'] >= 0.03
+        assert 'resolucion;dur=' in medicion.server_timing()
+    
+    def test_server_timing(self, client):
+        """Prueba que /optimizar devuelve la cabecera Server-Timing con sus etapas."""
+        data = {
+            "capacidad": 1001,
+            "solver": "dinamica",
+            "objetos": [
+                {"nombre": "A", "peso": 200, "ganancia": 150},
+                {"nombre": "B", "peso": 401, "ganancia": 350}
+            ]
+        }
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        etapas = [parte.split(';')[0] for parte in response.headers['Server-Timing'].split(', ')]
+        
+        for etapa in ('parse', 'validacion', 'serializacion', 'total'):
+            assert etapa in etapas
+    
+    def test_metrics_prometheus(self, client):
+        """Prueba que /metrics expone los histogramas en texto de Prometheus."""
+        data = {
+            "capacidad": 1001,
+            "solver": "dinamica",
+            "objetos": [{"nombre": "A", "peso": 200, "ganancia": 150}]
+        }
+        client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith('text/plain')
+        
+        texto = response.data.decode('utf-8')
+        assert '# TYPE portafolio_etapa_segundos histogram' in texto
+        assert 'portafolio_etapa_segundos_count{endpoint="optimizar",etapa="validacion"}' in texto
+        assert 'portafolio_objetos_bucket{le="+Inf"}' in texto
+        assert 'portafolio_solver_total{solver="dinamica"}' in texto
+
+class TestBenchmark:
+    """Pruebas para los generadores y la comparación de la suite de rendimiento."""
+    
+    def test_generador_reproducible(self):
+        """Prueba que la misma semilla genera el mismo portafolio."""
+        assert generar_portafolio('no_correlacionado', 30, 100, 5) == generar_portafolio('no_correlacionado', 30, 100, 5)
+        assert generar_portafolio('no_correlacionado', 30, 100, 5) != generar_portafolio('no_correlacionado', 30, 100, 6)
+    
+    def test_generador_fuertemente_correlacionado(self):
+        """Prueba que la ganancia es el peso más una décima del rango."""
+        problema = generar_portafolio('fuertemente_correlacionado', 50, 1000, 1)
+        
+        assert all(obj['ganancia'] == obj['peso'] + 100 for obj in problema['objetos'])
+        assert problema['capacidad'] == sum(obj['peso'] for obj in problema['objetos']) // 2
+    
+    def test_comparar_detecta_regresiones(self):
+        """Prueba que se detectan regresiones de tiempo, memoria y ganancia pero no el ruido."""
+        base = {
+            "lento/dinamica": {"segundos": 0.1, "memoria_pico_bytes": 1000, "ganancia": 10},
+            "memoria/dinamica": {"segundos": 0.1, "memoria_pico_bytes": 10 * 1024 ** 2, "ganancia": 10},
+            "ganancia/dinamica": {"segundos": 0.1, "memoria_pico_bytes": 1000, "ganancia": 10},
+            "ruido/dinamica": {"segundos": 0.001, "memoria_pico_bytes": 1000, "ganancia": 10}
+        }
+        actual = {
+            "lento/dinamica": {"segundos": 0.2, "memoria_pico_bytes": 1000, "ganancia": 10},
+            "memoria/dinamica": {"segundos": 0.1, "memoria_pico_bytes": 20 * 1024 ** 2, "ganancia": 10},
+            "ganancia/dinamica": {"segundos": 0.1, "memoria_pico_bytes": 1000, "ganancia": 9},
+            "ruido/dinamica": {"segundos": 0.003, "memoria_pico_bytes": 2000, "ganancia": 10},
+            "nuevo/dinamica": {"segundos": 1.0, "memoria_pico_bytes": 1000, "ganancia": 10}
+        }
+        
+        claves = [clave for clave, _ in comparar(actual, base, 25)]
+        assert sorted(claves) == ["ganancia/dinamica", "lento/dinamica", "memoria/dinamica"]
+        assert comparar(actual, base, 200) == [("ganancia/dinamica", "ganancia 9 distinta de 10")]
+
+class TestServidor:
+    """Pruebas para el modo de producción: resolución en procesos y drenaje."""
+    
+    def test_resolucion_en_procesos(self, client):
+        """Prueba que resolver en el pool de procesos da el mismo resultado."""
+        data = {
+            "capacidad": 10000,
+            "solver": "dinamica",
+            "objetos": [
+                {"nombre": "A", "peso": 2000, "ganancia": 1500},
+                {"nombre": "B", "peso": 4000, "ganancia": 3500},
+                {"nombre": "C", "peso": 5000, "ganancia": 4000},
+                {"nombre": "D", "peso": 3000, "ganancia": 2500}
+            ]
+        }
+        cache_resultados.limpiar()
+        directo = json.loads(client.post('/optimizar', data=json.dumps(data), content_type='application/json').data)
+        
+        cache_resultados.limpiar()
+        app.config['RESOLUCION_EN_PROCESOS'] = True
+        try:
+            response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+            frontera = client.post('/optimizar/frontera', data=json.dumps(data), content_type='application/json')
+        finally:
+            app.config['RESOLUCION_EN_PROCESOS'] = False
+        
+        assert response.status_code == 200
+        assert json.loads(response.data) == directo
+        assert frontera.status_code == 200
+        assert json.loads(frontera.data)['ganancias'][-1] == directo['ganancia_total']
+    
+    def test_contador_espera_peticiones(self):
+        """Prueba que el drenaje espera a que se cierre la respuesta en curso."""
+        def aplicacion_lenta(environ, start_response):
+            time.sleep(0.1)
+            start_response('200 OK', [])
+            return [b'ok']
+        
+        contador = ContadorPeticiones(aplicacion_lenta)
+        respuestas = []
+        hilo = threading.Thread(target=lambda: respuestas.append(contador({}, lambda *a: None)))
+        hilo.start()
+        
+        assert not contador.esperar(0.01)
+        hilo.join()
+        assert contador.en_curso == 1
+        
+        respuestas[0].close()
+        assert contador.esperar(1)
+        assert contador.en_curso == 0
+    
+    def test_cerrar_cola(self):
+        """Prueba que al cerrar la cola terminan los trabajos en curso y no se aceptan más."""
+        cola = ColaTrabajosLocal(1, 10, 60)
+        data, _ = ingerir_entrada({"capacidad": 10, "objetos": [{"nombre": "A", "peso": 5, "ganancia": 7}]})
+        trabajo = cola.encolar(data, 10_000)
+        
+        cola.cerrar(5)
+        
+        assert trabajo.estado == 'completado'
+        assert trabajo.resultado['ganancia_total'] == 7
+        with pytest.raises(ColaLlena):
+            cola.encolar(data, 10_000)
+    
+    def test_detener_pool_con_plazo(self, monkeypatch):
+        """Prueba que detener el pool con plazo termina los procesos que no acaban a tiempo."""
+        monkeypatch.setitem(app.config, 'LOTE_PROCESOS', 1)
+        modulo_app.detener_pool()
+        pool = modulo_app._obtener_pool()
+        pool.submit(time.sleep, 30)
+        time.sleep(0.2)
+        procesos = list(pool._processes.values())
+        
+        inicio = time.monotonic()
+        modulo_app.detener_pool(0.5)
+        
+        assert time.monotonic() - inicio < 5
+        assert not any(proceso.is_alive() for proceso in procesos)
+
+class TestFormatos:
+    """Pruebas para MessagePack y los formatos compactos de selección."""
+    
+    DATA = {
+        "capacidad": 10000,
+        "objetos": [
+            {"nombre": "A", "peso": 2000, "ganancia": 1500},
+            {"nombre": "B", "peso": 4000, "ganancia": 3500},
+            {"nombre": "C", "peso": 5000, "ganancia": 4000},
+            {"nombre": "D", "peso": 3000, "ganancia": 2500}
+        ]
+    }
+    
+    def test_msgpack(self, client):
+        """Prueba un request y una respuesta en MessagePack."""
+        msgpack = pytest.importorskip('msgpack')
+        esperado = json.loads(client.post('/optimizar', data=json.dumps(self.DATA),
+                                          content_type='application/json').data)
+        
+        response = client.post('/optimizar', data=msgpack.packb(self.DATA),
+                               content_type='application/msgpack', headers={'Accept': 'application/msgpack'})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/msgpack'
+        assert msgpack.unpackb(response.data) == esperado
+    
+    def test_json_por_defecto(self, client):
+        """Prueba que sin Accept explícito se sigue respondiendo en JSON."""
+        response = client.post('/optimizar', data=json.dumps(self.DATA), content_type='application/json',
+                               headers={'Accept': '*/*'})
+        assert response.mimetype == 'application/json'
+        assert set(json.loads(response.data)['seleccionados']) == {"A", "C", "D"}
+    
+    def test_formato_indices(self, client):
+        """Prueba los índices, también para un resultado de la caché con otro orden."""
+        cache_resultados.limpiar()
+        data = dict(self.DATA, formato_seleccion='indices')
+        resultado = json.loads(client.post('/optimizar', data=json.dumps(data),
+                                           content_type='application/json').data)
+        assert 'seleccionados' not in resultado
+        assert resultado['indices'] == [0, 2, 3]
+        
+        invertido = dict(data, objetos=data['objetos'][::-1])
+        response = client.post('/optimizar', data=json.dumps(invertido), content_type='application/json')
+        assert response.headers['X-Cache'] == 'HIT'
+        assert json.loads(response.data)['indices'] == [0, 1, 3]
+    
+    def test_formato_mascara(self, client):
+        """Prueba la máscara de bits y el orden de las cantidades."""
+        data = {
+            "capacidad": 7,
+            "formato_seleccion": "mascara",
+            "objetos": [{"nombre": f"P{i}", "peso": 100, "ganancia": 1} for i in range(9)]
+                       + [{"nombre": "Q", "peso": 2, "ganancia": 5, "cantidad": 3},
+                          {"nombre": "R", "peso": 1, "ganancia": 1}]
+        }
+        
+        resultado = json.loads(client.post('/optimizar', data=json.dumps(data),
+                                           content_type='application/json').data)
+        mascara = base64.b64decode(resultado['mascara'])
+        
+        assert mascara == bytes([0, 0b110])
+        assert resultado['cantidades'] == [3, 1]
+    
+    def test_formato_requiere_nombres_unicos(self, client):
+        """Prueba que los índices y la máscara requieren nombres únicos."""
+        data = {
+            "capacidad": 10,
+            "formato_seleccion": "indices",
+            "objetos": [{"nombre": "A", "peso": 5, "ganancia": 3}, {"nombre": "A", "peso": 4, "ganancia": 2}]
+        }
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 400
+        assert 'nombres únicos' in json.loads(response.data)['error']
+    
+    def test_enteros_grandes(self, client):
+        """Prueba que las ganancias de más de 64 bits se serializan en JSON."""
+        data = {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 5, "ganancia": 2 ** 70 + 1}]}
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 200
+        assert json.loads(response.data)['ganancia_total'] == 2 ** 70 + 1
+    
+    def test_cuerpo_invalido(self, client):
+        """Prueba que un cuerpo que no es JSON devuelve 400."""
+        response = client.post('/optimizar', data='{"capacidad": ', content_type='application/json')
+        assert response.status_code == 400
+        assert json.loads(response.data)['error'] == "El cuerpo JSON no es válido"
+    
+    def test_cuerpo_no_diccionario(self, client):
+        """Prueba que un cuerpo válido que no es un diccionario devuelve 400."""
+        for cuerpo in ('"capacidad objetos"', '["capacidad"]', '7'):
+            response = client.post('/optimizar', data=cuerpo, content_type='application/json')
+            assert response.status_code == 400
+            assert json.loads(response.data)['error'] == "Los datos deben ser un diccionario"
+        
+        response = client.post('/optimizar/frontera', data='"capacidad objetos"', content_type='application/json')
+        assert response.status_code == 400
+        
+        msgpack = pytest.importorskip('msgpack')
+        response = client.post('/optimizar', data=msgpack.packb("capacidad objetos"),
+                               content_type='application/msgpack')
+        assert response.status_code == 400
+
+class TestResolucionesCompartidas:
+    """Pruebas para la resolución compartida de peticiones idénticas concurrentes."""
+    
+    def test_seguidor_espera_al_primero(self):
+        """Prueba que una llamada concurrente con la misma clave recibe el resultado de la primera."""
+        en_curso = ResolucionesEnCurso()
+        liberar = threading.Event()
+        llamadas = []
+        
+        def resolver():
+            llamadas.append(1)
+            liberar.wait(5)
+            return {"ganancia_total": 42}
+        
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(en_curso.ejecutar('clave', resolver)))
+                 for _ in range(3)]
+        hilos[0].start()
+        while not llamadas:
+            time.sleep(0.001)
+        for hilo in hilos[1:]:
+            hilo.start()
+        while en_curso.compartidas < 2:
+            time.sleep(0.001)
+        liberar.set()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert len(llamadas) == 1
+        assert sorted(compartida for _, compartida in resultados) == [False, True, True]
+        assert all(resultado == {"ganancia_total": 42} for resultado, _ in resultados)
+        
+        # Terminada la resolución, la misma clave vuelve a calcularse
+        en_curso.ejecutar('clave', resolver)
+        assert len(llamadas) == 2
+    
+    def test_excepcion_compartida(self):
+        """Prueba que el error de la resolución llega a todas las peticiones que esperan."""
+        en_curso = ResolucionesEnCurso()
+        liberar = threading.Event()
+        errores = []
+        
+        def fallar():
+            liberar.wait(5)
+            raise ValueError("sin solución")
+        
+        def ejecutar():
+            try:
+                en_curso.ejecutar('clave', fallar)
+            except ValueError as e:
+                errores.append(str(e))
+        
+        hilos = [threading.Thread(target=ejecutar) for _ in range(2)]
+        hilos[0].start()
+        while 'clave' not in en_curso._en_curso:
+            time.sleep(0.001)
+        hilos[1].start()
+        while en_curso.compartidas < 1:
+            time.sleep(0.001)
+        liberar.set()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert errores == ["sin solución", "sin solución"]
+    
+    def test_optimizar_concurrente(self, monkeypatch):
+        """Prueba que peticiones idénticas simultáneas a /optimizar resuelven una sola vez."""
+        original = modulo_app.resolver_problema
+        llamadas = []
+        
+        def resolver_lento(data):
+            llamadas.append(1)
+            # Esperar a que las demás peticiones se unan a esta resolución
+            limite = time.monotonic() + 5
+            while modulo_app.resoluciones_en_curso.compartidas < compartidas_previas + 3 and time.monotonic() < limite:
+                time.sleep(0.005)
+            return original(data)
+        
+        monkeypatch.setattr(modulo_app, 'resolver_problema', resolver_lento)
+        compartidas_previas = modulo_app.resoluciones_en_curso.compartidas
+        cache_resultados.limpiar()
+        data = json.dumps({
+            "capacidad": 1000,
+            "reduccion": False,
+            "objetos": [{"nombre": "A", "peso": 600, "ganancia": 10}, {"nombre": "B", "peso": 500, "ganancia": 7}]
+        })
+        
+        respuestas = []
+        def pedir():
+            with app.test_client() as cliente:
+                respuestas.append(cliente.post('/optimizar', data=data, content_type='application/json'))
+        
+        hilos = [threading.Thread(target=pedir) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert len(llamadas) == 1
+        assert sorted(r.headers['X-Cache'] for r in respuestas) == ['COMPARTIDO'] * 3 + ['MISS']
+        assert all(json.loads(r.data)['ganancia_total'] == 10 for r in respuestas)
+        
+        metricas = app.test_client().get('/metrics').data.decode('utf-8')
+        assert 'portafolio_resoluciones_compartidas_total' in metricas
+
+class TestPerfilado:
+    """Pruebas para el perfilado bajo demanda y por muestreo de /optimizar."""
+    
+    DATA = {
+        "capacidad": 5000,
+        "solver": "dinamica",
+        "objetos": [{"nombre": f"P{i}", "peso": 100 + 37 * i, "ganancia": 50 + 11 * i} for i in range(40)]
+    }
+    
+    @pytest.fixture
+    def configuracion(self, tmp_path):
+        """Habilita el perfilado con un directorio temporal y restaura la configuración."""
+        claves = ('PERFILADO_TOKEN', 'PERFILADO_MUESTREO', 'PERFILADO_DIRECTORIO', 'PERFILADO_MAX_INFORMES')
+        originales = {clave: app.config[clave] for clave in claves}
+        app.config.update(PERFILADO_TOKEN='secreto', PERFILADO_DIRECTORIO=str(tmp_path))
+        yield tmp_path
+        app.config.update(originales)
+    
+    def test_perfilado_autorizado(self, client, configuracion):
+        """Prueba que el informe acompaña al resultado y describe la tabla."""
+        response = client.post('/optimizar?perfilar=1', data=json.dumps(self.DATA),
+                               content_type='application/json', headers={'X-Token-Perfilado': 'secreto'})
+        assert response.status_code == 200
+        
+        resultado = json.loads(response.data)
+        perfil = resultado['perfil']
+        assert resultado['ganancia_total'] > 0
+        assert any('_tabla_dinamica' in funcion['funcion'] for funcion in perfil['funciones'])
+        assert perfil['memoria']['pico_bytes'] >= perfil['tabla']['memoria_tabla_bytes'] > 0
+        assert perfil['tabla']['objetos'] == 40
+    
+    def test_perfilado_no_autorizado(self, client, configuracion):
+        """Prueba que el perfilado requiere el token de administración."""
+        response = client.post('/optimizar?perfilar=1', data=json.dumps(self.DATA),
+                               content_type='application/json', headers={'X-Token-Perfilado': 'otro'})
+        assert response.status_code == 403
+        
+        app.config['PERFILADO_TOKEN'] = ''
+        response = client.post('/optimizar?perfilar=1', data=json.dumps(self.DATA),
+                               content_type='application/json', headers={'X-Token-Perfilado': ''})
+        assert response.status_code == 403
+    
+    def test_muestreo_guarda_informes(self, client, configuracion):
+        """Prueba que se perfila una de cada N resoluciones y se conservan los últimos informes."""
+        app.config.update(PERFILADO_MUESTREO=1, PERFILADO_MAX_INFORMES=2)
+        cache_resultados.limpiar()
+        for capacidad in (5000, 5001, 5002):
+            response = client.post('/optimizar', data=json.dumps(dict(self.DATA, capacidad=capacidad)),
+                                   content_type='application/json')
+            assert response.status_code == 200
+            assert 'perfil' not in json.loads(response.data)
+        
+        informes = sorted(configuracion.glob('perfil-*.json'))
+        assert len(informes) == 2
+        assert len(list(configuracion.glob('perfil-*.prof'))) == 2
+        
+        informe = json.loads(informes[-1].read_text(encoding='utf-8'))
+        assert informe['tabla']['objetos'] == 40
+        assert len(informe['clave']) == 64
+    
+    def test_perfilado_en_pool(self, client, configuracion, monkeypatch):
+        """Prueba que con RESOLUCION_EN_PROCESOS ambos perfilados se hacen en el pool."""
+        monkeypatch.setitem(app.config, 'RESOLUCION_EN_PROCESOS', True)
+        response = client.post('/optimizar?perfilar=1', data=json.dumps(self.DATA),
+                               content_type='application/json', headers={'X-Token-Perfilado': 'secreto'})
+        assert response.status_code == 200
+        perfil = json.loads(response.data)['perfil']
+        assert any('_tabla_dinamica' in funcion['funcion'] for funcion in perfil['funciones'])
+        assert perfil['tabla']['objetos'] == 40
+        
+        app.config.update(PERFILADO_MUESTREO=1)
+        cache_resultados.limpiar()
+        response = client.post('/optimizar', data=json.dumps(dict(self.DATA, capacidad=4999)),
+                               content_type='application/json')
+        assert response.status_code == 200
+        
+        perfiles = list(configuracion.glob('perfil-*.prof'))
+        assert len(perfiles) == 1
+        assert any('_tabla_dinamica' in funcion for _, _, funcion in pstats.Stats(str(perfiles[0])).stats)
+
+class TestReduccion:
+    """Pruebas para la reducción del problema antes de resolver en modo 'auto'."""
+    
+    @staticmethod
+    def _optimo(capacidad, pesos, ganancias):
+        """Óptimo por fuerza bruta sobre todos los subconjuntos."""
+        mejor = 0
+        for mascara in range(1 << len(pesos)):
+            peso = sum(p for i, p in enumerate(pesos) if mascara >> i & 1)
+            if peso <= capacidad:
+                mejor = max(mejor, sum(g for i, g in enumerate(ganancias) if mascara >> i & 1))
+        return mejor
+    
+    def test_equivalencia_fuerza_bruta(self):
+        """Prueba que la reducción conserva el óptimo en problemas aleatorios."""
+        rng = random.Random(21)
+        for _ in range(150):
+            n = rng.randint(1, 10)
+            pesos = [rng.randint(1, 50) for _ in range(n)]
+            if rng.random() < 0.5:
+                ganancias = [rng.randint(0, 50) for _ in range(n)]
+            else:
+                ganancias = [max(0, p + rng.randint(-3, 3)) for p in pesos]
+            capacidad = rng.randint(1, sum(pesos))
+            objetos = [{"nombre": f"P{i}", "peso": p, "ganancia": g}
+                       for i, (p, g) in enumerate(zip(pesos, ganancias))]
+            
+            resultado = resolver_problema({"capacidad": capacidad, "objetos": objetos})
+            assert resultado['ganancia_total'] == self._optimo(capacidad, pesos, ganancias)
+            assert resultado['peso_total'] <= capacidad
+            assert resultado['optimo_probado']
+    
+    def test_equivalencia_decimales(self):
+        """Prueba la reducción con pesos y ganancias decimales."""
+        rng = random.Random(7)
+        for _ in range(60):
+            n = rng.randint(1, 9)
+            pesos = [round(rng.uniform(0.5, 20), 2) for _ in range(n)]
+            ganancias = [round(rng.uniform(0, 20), 2) for _ in range(n)]
+            capacidad = round(rng.uniform(1, sum(pesos)), 2)
+            
+            reduccion = reducir_problema(capacidad, pesos, ganancias)
+            nucleo = reduccion['nucleo']
+            ganancia = sum(ganancias[i] for i in reduccion['fijos']) + self._optimo(
+                reduccion['capacidad'], [pesos[i] for i in nucleo], [ganancias[i] for i in nucleo])
+            ganancia = max(ganancia, reduccion['voraz'][1])
+            assert ganancia == pytest.approx(self._optimo(capacidad, pesos, ganancias))
+    
+    def test_estadisticas(self):
+        """Prueba que se descartan los objetos pesados, sin ganancia y dominados."""
+        pesos = [200, 10, 10, 20, 30, 30]
+        ganancias = [500, 0, 30, 20, 35, 31]
+        reduccion = reducir_problema(50, pesos, ganancias)
+        estadisticas = reduccion['estadisticas']
+        
+        assert estadisticas['objetos'] == 6
+        assert estadisticas['pesados'] == 1
+        assert estadisticas['sin_ganancia'] == 1
+        assert estadisticas['nucleo'] == len(reduccion['nucleo'])
+        assert sum(estadisticas[campo] for campo in ('pesados', 'sin_ganancia', 'fijados_dentro',
+                                                     'fijados_fuera', 'dominados', 'nucleo')) == 6
+        assert 0 not in reduccion['nucleo'] + reduccion['fijos']
+        assert 1 not in reduccion['nucleo'] + reduccion['fijos']
+    
+    def test_optimizar_reducido(self, client):
+        """Prueba que /optimizar informa de la reducción y que puede desactivarse."""
+        cache_resultados.limpiar()
+        problema = generar_portafolio('no_correlacionado', 300, 1000, 3)
+        response = client.post('/optimizar', data=json.dumps(problema), content_type='application/json')
+        resultado = json.loads(response.data)
+        assert response.status_code == 200
+        assert resultado['reduccion']['objetos'] == 300
+        assert resultado['reduccion']['nucleo'] < 300
+        assert 'reduccion' in response.headers['Server-Timing']
+        
+        problema['reduccion'] = False
+        response = client.post('/optimizar', data=json.dumps(problema), content_type='application/json')
+        directo = json.loads(response.data)
+        assert 'reduccion' not in directo
+        assert directo['ganancia_total'] == resultado['ganancia_total']
+        
+        problema['reduccion'] = 'si'
+        response = client.post('/optimizar', data=json.dumps(problema), content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_reduccion_completa(self):
+        """Prueba que un problema decidido por completo no llega a ningún motor."""
+        resultado = resolver_problema({
+            "capacidad": 100,
+            "objetos": [
+                {"nombre": "A", "peso": 40, "ganancia": 400},
+                {"nombre": "B", "peso": 50, "ganancia": 450},
+                {"nombre": "C", "peso": 60, "ganancia": 60}
+            ]
+        })
+        assert resultado['solver'] == 'reduccion'
+        assert set(resultado['seleccionados']) == {"A", "B"}
+        assert resultado['ganancia_total'] == 850
+    
+    def test_reduccion_con_cantidades(self):
+        """Prueba que las cantidades se conservan a través de la reducción."""
+        resultado = resolver_problema({
+            "capacidad": 100,
+            "objetos": [
+                {"nombre": "A", "peso": 30, "ganancia": 100, "cantidad": 3},
+                {"nombre": "B", "peso": 45, "ganancia": 110, "cantidad": 2}
+            ]
+        })
+        assert resultado['ganancia_total'] == 300
+        assert resultado['seleccionados'] == ["A"]
+        assert resultado['cantidades'] == [3]
+
+class TestAlternativas:
+    """Pruebas para las selecciones alternativas y la sensibilidad de /optimizar."""
+    
+    OBJETOS = [
+        {"nombre": "A", "peso": 2000, "ganancia": 1500},
+        {"nombre": "B", "peso": 4000, "ganancia": 3500},
+        {"nombre": "C", "peso": 5000, "ganancia": 4000},
+        {"nombre": "D", "peso": 3000, "ganancia": 2500}
+    ]
+    
+    @staticmethod
+    def _ganancias_factibles(capacidad, pesos, ganancias):
+        """Ganancias de todas las selecciones factibles, de mayor a menor."""
+        resultado = []
+        for mascara in range(1 << len(pesos)):
+            elegidos = [i for i in range(len(pesos)) if mascara >> i & 1]
+            if sum(pesos[i] for i in elegidos) <= capacidad:
+                resultado.append(sum(ganancias[i] for i in elegidos))
+        return sorted(resultado, reverse=True)
+    
+    def test_k_mejores_fuerza_bruta(self):
+        """Prueba que las alternativas son las k mejores selecciones distintas."""
+        rng = random.Random(22)
+        for _ in range(100):
+            n = rng.randint(1, 8)
+            pesos = [rng.randint(1, 20) for _ in range(n)]
+            ganancias = [rng.randint(0, 20) for _ in range(n)]
+            capacidad = rng.randint(1, sum(pesos))
+            k = rng.randint(1, 10)
+            resultado = resolver_problema({
+                "capacidad": capacidad,
+                "alternativas": k,
+                "objetos": [{"nombre": f"P{i}", "peso": p, "ganancia": g}
+                            for i, (p, g) in enumerate(zip(pesos, ganancias))]
+            })
+            
+            alternativas = resultado['alternativas']
+            esperadas = self._ganancias_factibles(capacidad, pesos, ganancias)[:k]
+            assert [a['ganancia_total'] for a in alternativas] == esperadas
+            assert len({tuple(a['seleccionados']) for a in alternativas}) == len(alternativas)
+            assert all(a['peso_total'] <= capacidad for a in alternativas)
+            assert alternativas[0]['seleccionados'] == resultado['seleccionados']
+    
+    def test_sensibilidad_fuerza_bruta(self):
+        """Prueba que la selección sigue siendo óptima exactamente dentro de los rangos."""
+        rng = random.Random(5)
+        for _ in range(30):
+            n = rng.randint(1, 6)
+            pesos = [rng.randint(1, 12) for _ in range(n)]
+            ganancias = [rng.randint(0, 12) for _ in range(n)]
+            capacidad = rng.randint(1, sum(pesos))
+            resultado = resolver_problema({
+                "capacidad": capacidad,
+                "sensibilidad": True,
+                "objetos": [{"nombre": f"P{i}", "peso": p, "ganancia": g}
+                            for i, (p, g) in enumerate(zip(pesos, ganancias))]
+            })
+            seleccion = {int(nombre[1:]) for nombre in resultado['seleccionados']}
+            
+            def sigue_optima(pesos_nuevos, ganancias_nuevas):
+                if sum(pesos_nuevos[i] for i in seleccion) > capacidad:
+                    return False
+                mejor = self._ganancias_factibles(capacidad, pesos_nuevos, ganancias_nuevas)[0]
+                return sum(ganancias_nuevas[i] for i in seleccion) >= mejor
+            
+            def dentro(valor, minimo, maximo):
+                return (minimo is None or valor >= minimo) and (maximo is None or valor <= maximo)
+            
+            for j, rango in enumerate(resultado['sensibilidad']):
+                assert rango['seleccionado'] == (j in seleccion)
+                for valor in range(0, 30):
+                    nuevas = ganancias[:j] + [valor] + ganancias[j + 1:]
+                    assert sigue_optima(pesos, nuevas) == dentro(
+                        valor, rango['ganancia']['minima'], rango['ganancia']['maxima'])
+                for valor in range(1, 30):
+                    nuevos = pesos[:j] + [valor] + pesos[j + 1:]
+                    assert sigue_optima(nuevos, ganancias) == dentro(
+                        valor, rango['peso']['minimo'], rango['peso']['maximo'])
+    
+    def test_optimizar_alternativas(self, client):
+        """Prueba el caso básico con alternativas y sensibilidad."""
+        response = client.post('/optimizar', data=json.dumps({
+            "capacidad": 10000, "alternativas": 3, "sensibilidad": True, "objetos": self.OBJETOS
+        }), content_type='application/json')
+        assert response.status_code == 200
+        
+        resultado = json.loads(response.data)
+        assert [a['ganancia_total'] for a in resultado['alternativas']] == [8000, 7500, 7500]
+        assert set(resultado['alternativas'][0]['seleccionados']) == {"A", "C", "D"}
+        
+        rangos = {rango['nombre']: rango for rango in resultado['sensibilidad']}
+        assert rangos['A']['ganancia'] == {"minima": 1000, "maxima": None}
+        assert rangos['A']['peso'] == {"minimo": 1001, "maximo": 2000}
+        assert rangos['B']['ganancia'] == {"minima": None, "maxima": 4000}
+        assert rangos['B']['peso'] == {"minimo": 3001, "maximo": None}
+        assert 'sensibilidad' in response.headers['Server-Timing']
+    
+    def test_optimizar_alternativas_invalidas(self, client):
+        """Prueba el límite de k y las combinaciones no admitidas."""
+        limite = app.config['ALTERNATIVAS_MAX_K']
+        for extra in ({"alternativas": 0}, {"alternativas": limite + 1}, {"alternativas": True},
+                      {"sensibilidad": "si"}, {"alternativas": 2, "solver": "pareto"},
+                      {"alternativas": 2, "modo": "aproximado"}, {"sensibilidad": True, "resolucion": 100}):
+            response = client.post('/optimizar', data=json.dumps({
+                "capacidad": 10000, "objetos": self.OBJETOS, **extra
+            }), content_type='application/json')
+            assert response.status_code == 400
+        
+        response = client.post('/optimizar', data=json.dumps({
+            "capacidad": 10, "alternativas": 2,
+            "objetos": [{"nombre": "A", "peso": 3, "ganancia": 5, "cantidad": 2}]
+        }), content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_optimizar_alternativas_admision(self, client, monkeypatch):
+        """Prueba que la tabla de alternativas respeta los límites de admisión."""
+        monkeypatch.setitem(app.config, 'ADMISION_MAX_MEMORIA_BYTES', 1024)
+        response = client.post('/optimizar', data=json.dumps({
+            "capacidad": 10001, "alternativas": 5, "objetos": self.OBJETOS
+        }), content_type='application/json')
+        assert response.status_code == 422
+        assert 'alternativas' in json.loads(response.data)['error']
+
+class TestDinamicaParalela:
+    """Pruebas para la tabla dinámica repartida entre procesos."""
+    
+    @pytest.fixture
+    def paralela(self, monkeypatch):
+        """Reparte cualquier tabla entre varios procesos con tramos pequeños."""
+        monkeypatch.setattr(modulo_app, 'TRAMO_MINIMO_PARALELO', 64)
+        monkeypatch.setitem(app.config, 'DINAMICA_PROCESOS', 3)
+        monkeypatch.setitem(app.config, 'DINAMICA_CAPACIDAD_PARALELA', 100)
+    
+    def test_misma_seleccion_que_en_serie(self, paralela):
+        """Prueba que la tabla paralela devuelve la misma selección que la serie."""
+        rng = random.Random(23)
+        for _ in range(20):
+            n = rng.randint(1, 25)
+            pesos = [rng.randint(1, rng.choice([10, 300, 3000])) for _ in range(n)]
+            ganancias = [rng.randint(0, 100) for _ in range(n)]
+            capacidad = rng.randint(1, 2000)
+            bajo_consumo = rng.random() < 0.5
+            
+            fila, decisiones = modulo_app._tabla_dinamica(capacidad, pesos, ganancias, bajo_consumo)
+            esperado = (modulo_app._reconstruir(decisiones, pesos, capacidad), fila[capacidad].item())
+            procesos = rng.randint(2, 4)
+            assert modulo_app._resolver_paralelo(capacidad, pesos, ganancias, bajo_consumo,
+                                                 procesos) == esperado
+    
+    def test_bloques_con_margen_acotado(self):
+        """Prueba que cada bloque de filas tiene un margen de como mucho un cuarto del tramo."""
+        pesos = [30, 10, 200, 5, 5, 40, 1]
+        bloques = modulo_app._bloques_paralelos(pesos, list(range(len(pesos))), 200)
+        assert bloques[0][0] == 0 and bloques[-1][1] == len(pesos)
+        assert all(anterior[1] == siguiente[0] for anterior, siguiente in zip(bloques, bloques[1:]))
+        for inicio, fin in bloques:
+            assert fin - inicio == 1 or sum(pesos[inicio:fin]) <= 50
+    
+    def test_optimizar_en_paralelo(self, client, paralela):
+        """Prueba que /optimizar usa la tabla paralela por encima del umbral de capacidad."""
+        cache_resultados.limpiar()
+        problema = dict(generar_portafolio('no_correlacionado', 30, 500, 8), solver='dinamica')
+        assert modulo_app._procesos_dinamica(problema['capacidad']) == 3
+        response = client.post('/optimizar', data=json.dumps(problema), content_type='application/json')
+        assert response.status_code == 200
+        
+        app.config['DINAMICA_PROCESOS'] = 1
+        esperado = resolver_problema(problema)
+        resultado = json.loads(response.data)
+        assert resultado['seleccionados'] == esperado['seleccionados']
+        assert resultado['ganancia_total'] == esperado['ganancia_total']
+    
+    def test_presupuesto_de_procesos(self, paralela):
+        """Prueba que las tablas concurrentes comparten DINAMICA_PROCESOS - 1 procesos auxiliares."""
+        pesos = [1] * 10
+        serie = estimar_costos(1000, pesos, 0, 0, paralelo=False)['dinamica']['tiempo_ms']
+        assert estimar_costos(1000, pesos, 0, 0)['dinamica']['tiempo_ms'] < serie
+        
+        with modulo_app._reservar_procesos(3) as primera:
+            with modulo_app._reservar_procesos(3) as segunda:
+                # Sin auxiliares libres la tabla se estima y se calcula en serie
+                assert estimar_costos(1000, pesos, 0, 0)['dinamica']['tiempo_ms'] == serie
+        assert (primera, segunda) == (3, 1)
+        assert modulo_app._auxiliares_libres() == 2
+    
+    def test_interrupcion_detiene_los_procesos(self, paralela):
+        """Prueba que un plazo vencido detiene todos los procesos y libera la memoria."""
+        class Interrumpir(Exception):
+            pass
+        
+        def progreso(filas_completadas, filas_totales):
+            if filas_completadas > 0:
+                raise Interrumpir()
+        
+        # Otras pruebas pueden haber dejado vivo el pool de procesos
+        previos = set(multiprocessing.active_children())
+        pesos = [7] * 40
+        with pytest.raises(Interrumpir):
+            modulo_app._resolver_paralelo(1000, pesos, list(range(40)), False, 3, progreso)
+        assert set(multiprocessing.active_children()) <= previos
+
+class TestCarga:
+    """Pruebas para el generador de carga HTTP."""
+    
+    @pytest.fixture
+    def url(self):
+        """Sirve la aplicación en un puerto libre de localhost durante la prueba."""
+        servidor = make_server('127.0.0.1', 0, app, threaded=True)
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        yield f"http://127.0.0.1:{servidor.server_port}"
+        servidor.shutdown()
+        servidor.server_close()
+    
+    def test_cargar_coleccion(self):
+        """Prueba que se extraen los ejemplos de /optimizar con su estado esperado."""
+        cargas = cargar_coleccion()
+        estados = {carga['nombre']: carga['estado_esperado'] for carga in cargas}
+        assert estados['Optimizar - Caso Básico'] == 200
+        assert estados['Optimizar - Error Capacidad Negativa'] == 400
+        assert 'Health Check' not in estados
+        assert all(json.loads(carga['cuerpo']) for carga in cargas)
+    
+    def test_resumir_percentiles(self):
+        """Prueba los percentiles, el rendimiento y la tasa de error del resumen."""
+        registros = [("A", 200, 200, i / 1000, "HIT" if i % 2 else "MISS") for i in range(1, 101)]
+        registros[0] = ("A", 200, 500, 0.001, "-")
+        resumen = resumir(registros, 2.0)
+        assert resumen['peticiones'] == 100
+        assert resumen['errores'] == 1
+        assert resumen['rendimiento_rps'] == 50
+        assert resumen['latencia_ms']['p50'] == pytest.approx(50)
+        assert resumen['latencia_ms']['p99'] == pytest.approx(99)
+        assert resumen['estados'] == {"200": 99, "500": 1}
+        assert resumen['cache'] == {"-": 1, "HIT": 49, "MISS": 50}
+    
+    @pytest.mark.parametrize("modo", ["cerrado", "abierto"])
+    def test_ejecutar_carga(self, url, modo):
+        """Prueba una ejecución corta en ambos modos contra un servidor local."""
+        cargas, pesos = construir_mezcla(cargar_coleccion(), cargas_sinteticas([50], 2, 1), 0.5)
+        registros, segundos = ejecutar_carga(url, cargas, pesos, modo, concurrencia=4, tasa=200,
+                                             duracion=30, peticiones=20)
+        informe = generar_informe(registros, segundos, {"modo": modo})
+        
+        assert informe['total']['peticiones'] == 20
+        assert informe['total']['errores'] == 0
+        assert informe['total']['latencia_ms']['p99'] >= informe['total']['latencia_ms']['p50'] > 0
+        assert sum(resumen['peticiones'] for resumen in informe['por_carga'].values()) == 20
+        assert sum(resumen['peticiones'] for resumen in informe['por_cache'].values()) == 20
+        # Cada petición sintética es un problema distinto y se resuelve
+        for nombre, resumen in informe['por_carga'].items():
+            if nombre.startswith('sintetico'):
+                assert set(resumen['cache']) == {'MISS'}
+        
+        lineas = comparar_informes(informe, informe)
+        assert any(linea.startswith("total rendimiento_rps") for linea in lineas)
+
+class TestAlmacenResultados:
+    """Pruebas para el almacén persistente de resultados."""
+    
+    @pytest.fixture
+    def almacen(self, tmp_path, monkeypatch):
+        """Almacén en un directorio temporal, activo en la aplicación."""
+        almacen = AlmacenResultados(str(tmp_path / "datos" / "resultados.db"), 1024 ** 2)
+        monkeypatch.setattr(modulo_app, 'almacen_resultados', almacen)
+        cache_resultados.limpiar()
+        yield almacen
+        cache_resultados.limpiar()
+        almacen.cerrar()
+    
+    def test_persiste_entre_instancias(self, almacen):
+        """Prueba que un resultado guardado se recupera tras reabrir el fichero."""
+        almacen.guardar("a", {"seleccionados": ["X"], "ganancia_total": 1.5})
+        almacen.cerrar()
+        
+        reabierto = AlmacenResultados(almacen.ruta, almacen.max_bytes)
+        assert reabierto.obtener("a") == {"seleccionados": ["X"], "ganancia_total": 1.5}
+        assert reabierto.obtener("b") is None
+        assert reabierto.estadisticas()['entradas'] == 1
+        reabierto.cerrar()
+    
+    def test_desalojo_por_tamano(self, tmp_path):
+        """Prueba que se desalojan los menos usados al superar el tamaño máximo."""
+        almacen = AlmacenResultados(str(tmp_path / "resultados.db"), 250)
+        for clave in "abc":
+            almacen.guardar(clave, {"relleno": "x" * 90})
+            time.sleep(0.01)
+        
+        estadisticas = almacen.estadisticas()
+        assert estadisticas['evictions'] == 1
+        assert estadisticas['bytes'] <= 250
+        assert almacen.obtener("a") is None
+        assert almacen.obtener("c") is not None
+        almacen.cerrar()
+    
+    def test_mas_usados(self, almacen):
+        """Prueba que los usos (también los de la caché en memoria) ordenan la precarga."""
+        for clave in "abc":
+            almacen.guardar(clave, {"clave": clave})
+        for _ in range(3):
+            almacen.registrar_uso("c")
+        almacen.obtener("b")
+        
+        assert [clave for clave, _ in almacen.mas_usados(2)] == ["c", "b"]
+        assert precargar_cache(2) == 2
+        assert cache_resultados.obtener("c") == {"clave": "c"}
+        assert cache_resultados.obtener("a") is None
+    
+    def test_escritores_concurrentes(self, almacen):
+        """Prueba escrituras y lecturas simultáneas desde varios procesos."""
+        def escribir(proceso):
+            for i in range(50):
+                almacen.guardar(f"{proceso}-{i}", {"proceso": proceso, "i": i})
+                assert almacen.obtener(f"{proceso}-{i // 2}") is not None
+        
+        contexto = multiprocessing.get_context('fork')
+        procesos = [contexto.Process(target=escribir, args=(p,)) for p in range(4)]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join(30)
+        
+        assert [proceso.exitcode for proceso in procesos] == [0] * 4
+        assert almacen.estadisticas()['entradas'] == 200
+        assert almacen.obtener("3-49") == {"proceso": 3, "i": 49}
+    
+    def test_optimizar_desde_almacen(self, client, almacen):
+        """Prueba que /optimizar sirve del almacén un resultado que otro proceso calculó."""
+        datos = json.dumps({"capacidad": 2000, "objetos": [
+            {"nombre": "Cripto_1", "peso": 500, "ganancia": 700},
+            {"nombre": "ETF_1", "peso": 1500, "ganancia": 1300}
+        ]})
+        
+        primera = client.post('/optimizar', data=datos, content_type='application/json')
+        # Simula un reinicio (u otro proceso): la caché en memoria está vacía
+        cache_resultados.limpiar()
+        segunda = client.post('/optimizar', data=datos, content_type='application/json')
+        tercera = client.post('/optimizar', data=datos, content_type='application/json')
+        
+        assert primera.headers['X-Cache'] == 'MISS'
+        assert segunda.headers['X-Cache'] == 'PERSISTENTE'
+        assert tercera.headers['X-Cache'] == 'HIT'
+        assert json.loads(primera.data) == json.loads(segunda.data)
+        
+        estadisticas = json.loads(client.get('/cache/stats').data)['almacen']
+        assert estadisticas['hits'] == 1
+        assert estadisticas['entradas'] == 1
+
 class TestValidation:
     """Pruebas para la validación de entrada."""
     
@@ -319,6 +1976,345 @@ class TestAPIEndpoints:
         data = json.loads(response.data)
         assert 'error' in data
     
+    def test_optimizar_con_resolucion(self, client):
+        """Prueba optimización redondeando los pesos a una resolución."""
+        data = {
+            "capacidad": 1000,
+            "resolucion": 100,
+            "objetos": [
+                {"nombre": "A", "peso": 450, "ganancia": 500},
+                {"nombre": "B", "peso": 520, "ganancia": 600},
+                {"nombre": "C", "peso": 480, "ganancia": 400}
+            ]
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        
+        result = json.loads(response.data)
+        assert result['peso_total'] <= 1000
+        assert set(result['seleccionados']) == {"A", "C"}
+        assert result['ganancia_total'] == 900
+    
+    def test_optimizar_bajo_consumo(self, client):
+        """Prueba que /optimizar cambia a bajo consumo al superar el umbral."""
+        data = {
+            "capacidad": 8000,
+            "solver": "dinamica",
+            "objetos": [
+                {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+                {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+                {"nombre": "Acción_Z", "peso": 3000, "ganancia": 2800},
+                {"nombre": "Bono_P", "peso": 4000, "ganancia": 3000},
+                {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+            ]
+        }
+        umbral = app.config['UMBRAL_CELDAS_BAJO_CONSUMO']
+        app.config['UMBRAL_CELDAS_BAJO_CONSUMO'] = 0
+        try:
+            response = client.post('/optimizar',
+                                 data=json.dumps(data),
+                                 content_type='application/json')
+        finally:
+            app.config['UMBRAL_CELDAS_BAJO_CONSUMO'] = umbral
+        
+        assert response.status_code == 200
+        
+        seleccionados, ganancia_total, peso_total = knapsack_dynamic_programming(8000, data['objetos'])
+        result = json.loads(response.data)
+        assert result['seleccionados'] == seleccionados
+        assert result['ganancia_total'] == ganancia_total
+        assert result['peso_total'] == peso_total
+    
+    def test_optimizar_pesos_decimales(self, client):
+        """Prueba optimización con pesos decimales."""
+        data = {
+            "capacidad": 10.5,
+            "objetos": [
+                {"nombre": "A", "peso": 4.25, "ganancia": 3},
+                {"nombre": "B", "peso": 6.25, "ganancia": 4},
+                {"nombre": "C", "peso": 5.5, "ganancia": 5}
+            ]
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        
+        result = json.loads(response.data)
+        assert result['seleccionados'] == ["A", "C"]
+        assert result['solver'] in ('reduccion', 'ramificacion', 'pareto')
+    
+    def test_optimizar_solver_forzado(self, client):
+        """Prueba que el campo solver elige el motor."""
+        data = {
+            "capacidad": 8000,
+            "objetos": [
+                {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+                {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+                {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+            ]
+        }
+        
+        for solver in ('dinamica', 'pareto', 'ramificacion'):
+            data['solver'] = solver
+            response = client.post('/optimizar',
+                                 data=json.dumps(data),
+                                 content_type='application/json')
+            
+            assert response.status_code == 200
+            
+            result = json.loads(response.data)
+            assert result['solver'] == solver
+            assert result['ganancia_total'] == 4200
+            assert result['optimo_probado'] is True
+    
+    def test_optimizar_aproximado(self, client):
+        """Prueba el modo aproximado con capacidad grande y pesos decimales."""
+        generador = random.Random(23)
+        data = {
+            "capacidad": 10 ** 9 + 0.5,
+            "modo": "aproximado",
+            "epsilon": 0.05,
+            "objetos": [
+                {"nombre": f"P{i}",
+                 "peso": generador.uniform(10 ** 6, 10 ** 8),
+                 "ganancia": generador.randint(1, 10 ** 6)}
+                for i in range(300)
+            ]
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        
+        result = json.loads(response.data)
+        assert result['solver'] == 'fptas'
+        assert result['epsilon'] == 0.05
+        assert result['peso_total'] <= data['capacidad']
+        assert result['ganancia_total'] <= result['cota_superior']
+        assert result['ganancia_total'] >= (1 - 0.05) * result['cota_superior']
+    
+    def test_optimizar_epsilon_invalido(self, client):
+        """Prueba el modo aproximado con un epsilon fuera de rango."""
+        data = {
+            "capacidad": 10,
+            "objetos": [{"nombre": "A", "peso": 1, "ganancia": 50}],
+            "modo": "aproximado",
+            "epsilon": 1.5
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert "epsilon" in json.loads(response.data)['error']
+    
+    def test_optimizar_presupuesto_invalido(self, client):
+        """Prueba optimización con un presupuesto de nodos no válido."""
+        data = {
+            "capacidad": 10,
+            "objetos": [{"nombre": "A", "peso": 1, "ganancia": 50}],
+            "max_nodos": 0
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert "max_nodos" in json.loads(response.data)['error']
+    
+    def test_optimizar_solver_invalido(self, client):
+        """Prueba optimización con un solver desconocido o incompatible."""
+        objetos = [{"nombre": "A", "peso": 1.5, "ganancia": 50}]
+        
+        for solver in ('genetico', 'dinamica'):
+            data = {"capacidad": 10, "objetos": objetos, "solver": solver}
+            response = client.post('/optimizar',
+                                 data=json.dumps(data),
+                                 content_type='application/json')
+            
+            assert response.status_code == 400
+            assert "solver" in json.loads(response.data)['error']
+    
+    def test_optimizar_resolucion_invalida(self, client):
+        """Prueba optimización con resolución no positiva."""
+        data = {
+            "capacidad": 1000,
+            "resolucion": 0,
+            "objetos": [{"nombre": "A", "peso": 100, "ganancia": 50}]
+        }
+        
+        response = client.post('/optimizar',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert "resolución" in json.loads(response.data)['error']
+    
+    def test_optimizar_frontera(self, client):
+        """Prueba la frontera de ganancia por presupuesto."""
+        data = {
+            "capacidad": 10000,
+            "objetos": [
+                {"nombre": "A", "peso": 2000, "ganancia": 1500},
+                {"nombre": "B", "peso": 4000, "ganancia": 3500},
+                {"nombre": "C", "peso": 5000, "ganancia": 4000},
+                {"nombre": "D", "peso": 3000, "ganancia": 2500}
+            ],
+            "puntos": [6000, 10000]
+        }
+        
+        response = client.post('/optimizar/frontera',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        
+        result = json.loads(response.data)
+        assert result['presupuestos'] == [0, 2000, 3000, 4000, 5000, 6000, 7000, 8000, 9000, 10000]
+        assert result['ganancias'] == [0, 1500, 2500, 3500, 4000, 5000, 6000, 6500, 7500, 8000]
+        for seleccion in result['selecciones']:
+            seleccionados, ganancia_total, _ = knapsack_dynamic_programming(seleccion['presupuesto'], data['objetos'])
+            assert seleccion['seleccionados'] == seleccionados
+            assert seleccion['ganancia_total'] == ganancia_total
+    
+    def test_optimizar_frontera_punto_invalido(self, client):
+        """Prueba la frontera con un presupuesto mayor que la capacidad."""
+        data = {
+            "capacidad": 100,
+            "objetos": [{"nombre": "A", "peso": 10, "ganancia": 5}],
+            "puntos": [200]
+        }
+        
+        response = client.post('/optimizar/frontera',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert 'error' in json.loads(response.data)
+    
+    def test_optimizar_cache(self, client):
+        """Prueba que un portafolio repetido en otro orden se sirve de la caché."""
+        cache_resultados.limpiar()
+        objetos = [
+            {"nombre": "Cripto_1", "peso": 500, "ganancia": 700},
+            {"nombre": "Cripto_2", "peso": 800, "ganancia": 1000},
+            {"nombre": "ETF_1", "peso": 1500, "ganancia": 1300}
+        ]
+        
+        primera = client.post('/optimizar',
+                            data=json.dumps({"capacidad": 2000, "objetos": objetos}),
+                            content_type='application/json')
+        segunda = client.post('/optimizar',
+                            data=json.dumps({"capacidad": 2000, "objetos": objetos[::-1]}),
+                            content_type='application/json')
+        
+        assert primera.headers['X-Cache'] == 'MISS'
+        assert segunda.headers['X-Cache'] == 'HIT'
+        assert json.loads(primera.data) == json.loads(segunda.data)
+        
+        response = client.get('/cache/stats')
+        assert response.status_code == 200
+        
+        estadisticas = json.loads(response.data)
+        assert estadisticas['hits'] == 1
+        assert estadisticas['misses'] == 1
+        assert estadisticas['entradas'] == 1
+    
+    def test_optimizar_lote(self, client):
+        """Prueba la optimización de varios problemas en una petición."""
+        problema = {
+            "capacidad": 8000,
+            "objetos": [
+                {"nombre": "Acción_X", "peso": 1000, "ganancia": 800},
+                {"nombre": "Acción_Y", "peso": 2500, "ganancia": 2200},
+                {"nombre": "Bono_Q", "peso": 1500, "ganancia": 1200}
+            ]
+        }
+        data = {
+            "problemas": [
+                problema,
+                {"capacidad": -1, "objetos": problema['objetos']},
+                dict(problema, capacidad=3000),
+                "no es un problema"
+            ]
+        }
+        
+        response = client.post('/optimizar/lote',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        
+        resultados = json.loads(response.data)['resultados']
+        assert len(resultados) == 4
+        assert resultados[0]['ganancia_total'] == 4200
+        assert "positivo" in resultados[1]['error']
+        assert resultados[2]['ganancia_total'] == 2200
+        assert "diccionario" in resultados[3]['error']
+    
+    def test_optimizar_lote_pool_roto(self, client, monkeypatch):
+        """Prueba que un proceso muerto falla sólo sus problemas y el siguiente lote recrea el pool."""
+        monkeypatch.setitem(app.config, 'LOTE_PROCESOS', 2)
+        modulo_app.detener_pool()
+        problema = {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 4, "ganancia": 5}]}
+        data = json.dumps({"problemas": [problema, dict(problema, capacidad=3)]})
+        
+        enviar = modulo_app._enviar_al_pool
+        def enviar_y_matar(funcion, *args):
+            # Los procesos mueren con las tareas ya enviadas, como con un OOM
+            pool, futuro = enviar(funcion, *args)
+            for proceso in list(pool._processes.values()):
+                os.kill(proceso.pid, signal.SIGKILL)
+            return pool, futuro
+        
+        try:
+            monkeypatch.setattr(modulo_app, '_enviar_al_pool', enviar_y_matar)
+            response = client.post('/optimizar/lote', data=data, content_type='application/json')
+            assert response.status_code == 200
+            assert all('error' in resultado for resultado in json.loads(response.data)['resultados'])
+            
+            monkeypatch.setattr(modulo_app, '_enviar_al_pool', enviar)
+            for _ in range(3):
+                response = client.post('/optimizar/lote', data=data, content_type='application/json')
+                assert response.status_code == 200
+                resultados = json.loads(response.data)['resultados']
+                assert [resultado['ganancia_total'] for resultado in resultados] == [5, 0]
+        finally:
+            modulo_app.detener_pool()
+    
+    def test_optimizar_lote_lista(self, client):
+        """Prueba que el lote también se acepta como lista directa."""
+        data = [
+            {"capacidad": 10, "objetos": [{"nombre": "A", "peso": 4, "ganancia": 5}]}
+        ]
+        
+        response = client.post('/optimizar/lote',
+                             data=json.dumps(data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['resultados'][0]['seleccionados'] == ["A"]
+    
+    def test_optimizar_lote_vacio(self, client):
+        """Prueba un lote vacío."""
+        response = client.post('/optimizar/lote',
+                             data=json.dumps({"problemas": []}),
+                             content_type='application/json')
+        
+        assert response.status_code == 400
+        assert 'error' in json.loads(response.data)
+    
     def test_endpoint_no_encontrado(self, client):
         """Prueba endpoint inexistente."""
         response = client.get('/endpoint-inexistente')
@@ -334,6 +2330,70 @@ class TestAPIEndpoints:
         
         data = json.loads(response.data)
         assert 'error' in data
+    
+    def test_optimizar_con_cantidad(self, client):
+        """Prueba que la respuesta informa las unidades elegidas de cada proyecto."""
+        data = {
+            "capacidad": 10000,
+            "objetos": [
+                {"nombre": "Fondo_A", "peso": 3000, "ganancia": 2500, "cantidad": 3},
+                {"nombre": "Fondo_B", "peso": 4000, "ganancia": 2000}
+            ]
+        }
+        
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 200
+        
+        resultado = json.loads(response.data)
+        assert resultado['seleccionados'] == ['Fondo_A']
+        assert resultado['cantidades'] == [3]
+        assert resultado['ganancia_total'] == 7500
+        assert resultado['peso_total'] == 9000
+    
+    def test_optimizar_cantidad_invalida(self, client):
+        """Prueba la validación del campo cantidad."""
+        for cantidad in (0, 2.5, True):
+            data = {
+                "capacidad": 100,
+                "objetos": [{"nombre": "A", "peso": 10, "ganancia": 5, "cantidad": cantidad}]
+            }
+            response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+            assert response.status_code == 400
+            assert 'cantidad' in json.loads(response.data)['error']
+    
+    def test_optimizar_columnar(self, client):
+        """Prueba que /optimizar acepta el cuerpo columnar y comparte la caché."""
+        cache_resultados.limpiar()
+        objetos = {
+            "capacidad": 7000,
+            "objetos": [
+                {"nombre": "A", "peso": 2000, "ganancia": 1500},
+                {"nombre": "B", "peso": 4000, "ganancia": 3500},
+                {"nombre": "C", "peso": 5000, "ganancia": 4000}
+            ]
+        }
+        columnar = {
+            "capacidad": 7000,
+            "nombres": ["A", "B", "C"],
+            "pesos": [2000, 4000, 5000],
+            "ganancias": [1500, 3500, 4000]
+        }
+        
+        response = client.post('/optimizar', data=json.dumps(objetos), content_type='application/json')
+        assert response.headers['X-Cache'] == 'MISS'
+        
+        response_columnar = client.post('/optimizar', data=json.dumps(columnar), content_type='application/json')
+        assert response_columnar.status_code == 200
+        assert response_columnar.headers['X-Cache'] == 'HIT'
+        assert json.loads(response_columnar.data) == json.loads(response.data)
+    
+    def test_optimizar_columnar_nombres_invalidos(self, client):
+        """Prueba que un nombre que no es texto ni número se rechaza con 400."""
+        data = {"capacidad": 5, "nombres": [["x"], ["y"]], "pesos": [2, 3], "ganancias": [3, 4],
+                "formato_seleccion": "indices"}
+        response = client.post('/optimizar', data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 400
+        assert json.loads(response.data)['error'] == "El nombre del objeto 0 debe ser un texto o un número"
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -111,7 +111,33 @@ def run_manual_tests():
     except Exception as e:
         print(f"❌ Error en caso 2: {e}")
 
+def run_benchmarks(argumentos):
+    """Ejecuta la suite de rendimiento de los motores contra la línea base."""
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    os.chdir(backend_dir)
+    sys.path.insert(0, backend_dir)
+    
+    import benchmark
+    return benchmark.main(argumentos)
+
+def run_carga(argumentos):
+    """Ejecuta la prueba de carga HTTP (arranca un servidor local si no se da --url)."""
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    os.chdir(backend_dir)
+    sys.path.insert(0, backend_dir)
+    
+    import carga
+    return carga.main(argumentos)
+
 if __name__ == "__main__":
+    # La suite de rendimiento y la prueba de carga no necesitan el servidor levantado
+    if '--benchmark' in sys.argv[1:]:
+        resto = [arg for arg in sys.argv[1:] if arg != '--benchmark']
+        sys.exit(0 if run_benchmarks(resto) else 1)
+    if '--carga' in sys.argv[1:]:
+        resto = [arg for arg in sys.argv[1:] if arg != '--carga']
+        sys.exit(0 if run_carga(resto) else 1)
+    
     print("🧪 Ejecutando pruebas del microservicio de optimización de portafolio")
     print("=" * 60)
     